@@ -1,25 +1,37 @@
 import logging
 import json
 import asyncio
+import concurrent.futures
 import os
 from google import genai
 from google.genai import types
 from google.genai import errors
 from tools import MockAmazonConnector, DatabaseManager
+from product_cache import LRUCache
 from price_tracker import PriceTracker
+from dedup import merge_duplicates
+from ranking import Ranker
+from leases import ScrapeLeases
+from background_loop import get_background_loop
 
 # Import Async Scrapers
 from scrapers.amazon import AmazonScraper
 from scrapers.flipkart import FlipkartScraper
 from scrapers.ebay import EbayScraper
+from scrapers.query_normalizer import cache_key, canonicalize
+from scrapers.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Extra time a sync caller waits beyond the search deadline (ranking, caching)
+SYNC_SEARCH_GRACE_SECONDS = 5.0
+
 class ShoppingAgent:
     def __init__(self):
         self.connector = MockAmazonConnector()
         self.db_manager = DatabaseManager() 
         self.price_tracker = PriceTracker()
+        self.ranker = Ranker.from_env()
         
         logger.info("Agent: Initializing Models...")
         # Initialize Google Gemini
@@ -71,9 +83,27 @@ class ShoppingAgent:
             "Flipkart": FlipkartScraper(),
             "eBay": EbayScraper(),
         }
+        self.search_flight = SingleFlight("agent.search")
+        # Other gunicorn workers wait for a scrape in progress instead of repeating it
+        self.scrape_leases = ScrapeLeases.from_env(os.path.join(self.db_manager.base_path, 'scrape_leases.sqlite3'))
+        # Latency budget for chat searches; slow sources finish in the background
+        self.search_deadline = float(os.getenv("SEARCH_DEADLINE_SECONDS", "8"))
+        self._background = set()
+        # user_id -> (connector data version, rendered profile)
+        self._profile_str = LRUCache(max_entries=int(os.getenv("PROFILE_CACHE_USERS", "1024")))
         
-    def get_user_profile_str(self):
-        data = self.connector.get_user_data()
+    def get_user_profile_str(self, user_id=None):
+        """Profile summary for the prompt, rebuilt only when the profile data changed."""
+        user_id = user_id or self.connector.current_user_id
+        version = self.connector.data_version(user_id)
+        cached = self._profile_str.get(user_id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        summary = self._render_profile(self.connector.get_user_data(user_id))
+        self._profile_str.put(user_id, (version, summary))
+        return summary
+
+    def _render_profile(self, data):
         if not data: return "User Profile: Guest"
         
         # Enhanced Profile String
@@ -94,84 +124,225 @@ class ShoppingAgent:
                 
         return summary
 
-    async def search_online_async(self, query):
+    async def search_online_async(self, query, deadline=None):
         """
         Async Cache-First Search.
+
+        With ``deadline`` (seconds) the search returns whatever sources have
+        answered by then; slower ones keep running in the background and
+        fill the cache when they finish. Concurrent identical searches with
+        the same deadline share one run.
         """
-        # 1. Check Cache
-        cached = self.db_manager.get_cached_results(query)
+        if deadline is not None:
+            return await self.search_flight.do(
+                (cache_key(query), deadline), lambda: self._search_until(query, deadline)
+            )
+
+        # 1. Check Cache (disk reads and TTL bookkeeping writes: off the loop)
+        cached = await asyncio.get_running_loop().run_in_executor(None, self._cached_results, query)
         if cached:
             logger.info("✅ Cache Hit!")
             return cached
 
-        # 2. Parallel Async Scrape
-        logger.info("⚡ parallel Scraping started...")
-        tasks = []
-        for name, scraper in self.scrapers.items():
-            tasks.append(scraper.search(query))
-            
-        results_lists = await asyncio.gather(*tasks, return_exceptions=True)
+        # 2. Concurrent identical queries wait on one in-flight scrape
+        return await self.search_flight.do(canonicalize(query), lambda: self._scrape_and_rank(query))
 
+    async def _search_until(self, query, deadline):
+        """Top results from the cache or from the sources answering within ``deadline``."""
         flat_results = []
-        for res in results_lists:
-            if isinstance(res, list):
-                flat_results.extend(res)
-        
-        # Cold-start price advice: compute relative price ranking across all sources
-        prices = [p.get('price', 0) for p in flat_results if isinstance(p.get('price', 0), (int, float)) and p.get('price', 0) > 0]
-        prices_sorted = sorted(prices) if prices else []
-
-        # Filter & Track Prices
-        final_results = []
-        for p in flat_results:
-            if p['score'] > 0.2:
-                # Compute cold-start trend if we have a comparable price set
-                price = p.get('price', 0)
-                trend = None
-                if prices_sorted and isinstance(price, (int, float)) and price > 0:
-                    # percentile rank
-                    rank = sum(1 for x in prices_sorted if x <= price) / len(prices_sorted)
-                    if rank <= 0.30:
-                        trend = "✅ Good Deal vs peers (low percentile)"
-                    elif rank >= 0.70:
-                        trend = "⏳ High Price vs peers (consider waiting)"
-                    else:
-                        trend = "➡️ Fair Price vs peers"
-                    p['trend'] = trend
-
-                final_results.append(p)
-                # Auto-track promising items
-                if 'url' in p and p['url'] != "#":
-                    self.price_tracker.track_item(
-                        p.get('url'),
-                        p.get('url'),
-                        p.get('title'),
-                        p.get('price', 0),
-                        p.get('currency', 'USD'),
-                        p.get('source', '')
-                    )
+        async for source, products in self.search_progressive(query, deadline):
+            if source == "cache":
+                return products
+            flat_results.extend(products)
+        # Rank copies: _finalize ranks (and annotates) the complete set later
+        return self._rank([dict(p) for p in flat_results])[:5]
+
+    def _cached_results(self, query):
+        """Exact cache entry for the canonical query, else a near-duplicate's.
+
+        Blocking: a disk hit refreshes the entry and an expired one is
+        deleted (SQLite writes), so async callers run it in an executor.
+        """
+        return self.db_manager.get_cached_results(query) or self.db_manager.get_similar_cached_results(query)
+
+    async def search_progressive(self, query, deadline=None):
+        """
+        Yield ``(source, products)`` as each scraper completes, until ``deadline``.
+
+        A cache hit yields a single ``("cache", products)``. Scrapers still
+        running at the deadline (or when the caller stops iterating) are left
+        to finish in the background; the full result set is then ranked,
+        tracked and cached as in ``search_online_async``.
+        """
+        loop = asyncio.get_running_loop()
+        cached = await loop.run_in_executor(None, self._cached_results, query)
+        if cached:
+            logger.info("✅ Cache Hit!")
+            yield "cache", cached
+            return
+
+        if deadline is None:
+            deadline = self.search_deadline
+        end = loop.time() + deadline
+        cached = await self._claim_scrape(query, deadline)
+        if cached is not None:
+            if cached:
+                yield "cache", cached
+            return
+        tasks = {
+            asyncio.ensure_future(scraper.search(query)): name
+            for name, scraper in self.scrapers.items()
+        }
+        pending = set(tasks)
+        flat_results = []
+        try:
+            while pending:
+                remaining = end - loop.time()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                arrived = []
+                for task in done:
+                    if task.cancelled() or task.exception() is not None:
+                        continue
+                    if isinstance(task.result(), list):
+                        flat_results.extend(task.result())
+                        arrived.append((tasks[task], task.result()))
+                for source, products in arrived:
+                    yield source, products
+        finally:
+            # The lease is released once the complete result set is cached
+            if pending:
+                logger.info(f"⏱️ Deadline hit; {len(pending)} source(s) finishing in background")
+                finisher = asyncio.ensure_future(self._finish_in_background(query, flat_results, pending))
+                self._background.add(finisher)
+                finisher.add_done_callback(self._background.discard)
+            else:
+                try:
+                    await loop.run_in_executor(None, self._finalize, query, flat_results)
+                finally:
+                    await self._release_scrape(query)
+
+    async def _finish_in_background(self, query, flat_results, pending):
+        try:
+            results_lists = await asyncio.gather(*pending, return_exceptions=True)
+            flat_results = list(flat_results)
+            for res in results_lists:
+                if isinstance(res, list):
+                    flat_results.extend(res)
+            await asyncio.get_running_loop().run_in_executor(None, self._finalize, query, flat_results)
+        finally:
+            await self._release_scrape(query)
+
+    async def _claim_scrape(self, query, timeout):
+        """Take the cross-worker scrape lease for ``query`` (see ``leases.ScrapeLeases``).
+
+        Returns None once the caller holds the lease and should scrape. If
+        another worker holds it, waits up to ``timeout`` for that worker's
+        results and returns them from the cache, or [] if they have not
+        arrived by then (they reach the cache when that scrape finishes).
+        A holder that finished without caching anything hands the lease on
+        to the next claimant. Lease I/O runs off the event loop.
+        """
+        key = canonicalize(query)
+        loop = asyncio.get_running_loop()
+        end = loop.time() + timeout
+        try:
+            while not await loop.run_in_executor(None, self.scrape_leases.acquire, key):
+                logger.info(f"Another worker is scraping '{key}'; waiting for its results")
+                remaining = end - loop.time()
+                if remaining <= 0 or not await self.scrape_leases.wait(key, remaining):
+                    return []
+                cached = await loop.run_in_executor(None, self._cached_results, query)
+                if cached:
+                    return cached
+        except Exception as e:
+            # The lease table is unavailable: scraping uncoordinated beats not answering
+            logger.error(f"Scrape lease error for '{key}': {e}")
+        return None
+
+    async def _release_scrape(self, query):
+        """Release the scrape lease for ``query``, even if the caller is being cancelled."""
+        release = asyncio.get_running_loop().run_in_executor(None, self.scrape_leases.release, canonicalize(query))
+        try:
+            await asyncio.shield(release)
+        except Exception as e:
+            logger.error(f"Scrape lease error for '{query}': {e}")
+
+    async def _scrape_and_rank(self, query):
+        """Scrape all sources, rank, track and cache the results."""
+        cached = await self._claim_scrape(query, self.scrape_leases.ttl)
+        if cached is not None:
+            return cached
+
+        try:
+            # Parallel Async Scrape
+            logger.info("⚡ parallel Scraping started...")
+            tasks = []
+            for name, scraper in self.scrapers.items():
+                tasks.append(scraper.search(query))
+
+            results_lists = await asyncio.gather(*tasks, return_exceptions=True)
+
+            flat_results = []
+            for res in results_lists:
+                if isinstance(res, list):
+                    flat_results.extend(res)
+
+            final_results = await asyncio.get_running_loop().run_in_executor(None, self._finalize, query, flat_results)
+            return final_results[:5] # Return top 5
+        finally:
+            await self._release_scrape(query)
+
+    def _rank(self, flat_results):
+        """Merge cross-source duplicates, then filter, annotate with cold-start
+        price trends and sort (see ``dedup.merge_duplicates`` and ``ranking.Ranker``)."""
+        merged = merge_duplicates(flat_results, self.ranker.normalized_prices(flat_results).tolist())
+        return self.ranker.rank(merged)
+
+    def _finalize(self, query, flat_results):
+        """Rank the complete result set, track prices and store the cache."""
+        final_results = self._rank(flat_results)
+
+        # Auto-track promising items (one batched write)
+        self.price_tracker.track_many(final_results)
 
         # 3. Store Cache
         if final_results:
-            # Sort by price mostly
-            final_results.sort(key=lambda x: x['price'] if x['price'] > 0 else 999999)
             self.db_manager.cache_results(query, final_results[:10]) # Store top 10
-            
-        return final_results[:5] # Return top 5
+
+        return final_results
 
     def search_online_sync_wrapper(self, query):
-        """Wrapper to call async search from synchronous context if needed."""
-        # For Flask, we might run this. 
-        # But ideally app.py handles event loop, or we just run loop here.
+        """Run the async search on the process-wide background loop.
+
+        Blocks the calling (request) thread for at most the search deadline
+        plus a small grace period; returns [] if that is exceeded or the
+        search is cancelled (loop shutting down).
+        """
+        timeout = self.search_deadline + SYNC_SEARCH_GRACE_SECONDS
         try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        return loop.run_until_complete(self.search_online_async(query))
-
-    def chat(self, user_input, history_context=""):
-        profile_context = self.get_user_profile_str()
+            return get_background_loop().run(
+                self.search_online_async(query, deadline=self.search_deadline),
+                timeout=timeout,
+            )
+        except TimeoutError:
+            logger.error(f"Search for '{query}' timed out after {timeout:.0f}s")
+            return []
+        except (concurrent.futures.CancelledError, asyncio.CancelledError):
+            logger.error(f"Search for '{query}' was cancelled")
+            return []
+
+    def chat(self, user_input, history_context="", user_id=None):
+        return "".join(self.chat_stream(user_input, history_context, user_id))
+
+    def chat_stream(self, user_input, history_context="", user_id=None):
+        """Yield the response as it is generated (one piece per Gemini chunk).
+
+        The conversation log is written once the stream ends.
+        """
+        user_id = user_id or self.connector.current_user_id
+        profile_context = self.get_user_profile_str(user_id)
         online_context = ""
 
         # Fast path for explicit greetings / smalltalk: avoid heavy LLM + scraping
@@ -179,10 +350,11 @@ class ShoppingAgent:
         simple_greetings = {"hi", "hello", "hey", "yo", "sup", "hii", "hiii"}
         if msg in simple_greetings:
             # Very short, friendly reply
-            return "Hi! I am your shopping assistant. Tell me what you want to buy or your budget, and I will find options for you."
+            yield "Hi! I am your shopping assistant. Tell me what you want to buy or your budget, and I will find options for you."
+            return
         # Retrieve recent interactions from Chroma (conversation memory)
         try:
-            recent = self.db_manager.get_recent_interactions("current_user", limit=8)
+            recent = self.db_manager.get_recent_interactions(user_id, limit=8)
             if recent:
                 mem_lines = []
                 for e in reversed(recent):  # oldest to newest for readability
@@ -199,9 +371,13 @@ class ShoppingAgent:
              
              if products:
                  online_context = "LIVE MARKET DATA:\n"
+                 # Prefer cold-start trend if provided, else fall back to historical forecast (one batch)
+                 # Items users actually see get rescanned sooner
+                 self.price_tracker.note_interest([p['url'] for p in products])
+                 missing = [p['url'] for p in products if not p.get('trend')]
+                 forecasts = dict(zip(missing, self.price_tracker.get_forecasts(missing)))
                  for p in products:
-                     # Prefer cold-start trend if provided, else fall back to historical forecast
-                     trend = p.get('trend') or self.price_tracker.get_forecast(p['url'])
+                     trend = p.get('trend') or forecasts.get(p['url'])
                      online_context += f"- [{p['source']}] {p['title']} - {p['price']} {p['currency']}\n  ({trend}) [Link: {p['url']}]\n"
              else:
                  online_context = "No live results found.\n"
@@ -233,6 +409,7 @@ class ShoppingAgent:
         Response:
         """
         
+        chunks = []
         try:
             if not self.gemini_ready:
                 raise RuntimeError("Gemini not configured")
@@ -250,24 +427,25 @@ class ShoppingAgent:
                 ),
             ]
             generate_content_config = types.GenerateContentConfig()
-            chunks = []
-            for chunk in self.genai_client.models.generate_content_stream(
-                model=self.model_name,
-                contents=contents,
-                config=generate_content_config,
-            ):
-                if getattr(chunk, "text", None):
-                    chunks.append(chunk.text)
-            response = "".join(chunks)
-            # Log interaction to conversation memory
             try:
-                self.db_manager.log_interaction("current_user", "user", user_input)
-                self.db_manager.log_interaction("current_user", "assistant", str(response))
-            except Exception:
-                pass
-            return response
+                for chunk in self.genai_client.models.generate_content_stream(
+                    model=self.model_name,
+                    contents=contents,
+                    config=generate_content_config,
+                ):
+                    if getattr(chunk, "text", None):
+                        chunks.append(chunk.text)
+                        yield chunk.text
+            finally:
+                # Log interaction to conversation memory (also if the client
+                # went away or generation failed part-way through)
+                if chunks:
+                    self._log_turn(user_id, user_input, "".join(chunks))
         except Exception as e:
             logger.error(f"Inference error: {e}")
+            if chunks:
+                # Part of the answer already went out; don't append a fallback
+                return
             # Fallback: Compose a simple response without LLM
             summary_lines = [
                 "[AUTO RESPONSE - LLM unavailable]",
@@ -280,17 +458,20 @@ class ShoppingAgent:
                 online_context or "No live results found.",
             ]
             fallback = "\n".join(summary_lines)
-            try:
-                self.db_manager.log_interaction("current_user", "user", user_input)
-                self.db_manager.log_interaction("current_user", "assistant", fallback)
-            except Exception:
-                pass
-            return fallback
+            self._log_turn(user_id, user_input, fallback)
+            yield fallback
+
+    def _log_turn(self, user_id, user_input, response):
+        try:
+            self.db_manager.log_interaction(user_id, "user", user_input)
+            self.db_manager.log_interaction(user_id, "assistant", str(response))
+        except Exception:
+            pass
 
-    def train_preference(self, product_name, liked=True):
+    def train_preference(self, product_name, liked=True, user_id=None):
         # Update user profile dynamically
         if liked:
-            self.connector.update_profile("liked_brands", [product_name]) # Simplified
+            self.connector.update_profile("liked_brands", [product_name], user_id=user_id) # Simplified
         else:
-             self.connector.update_profile("disliked_brands", [product_name])
+             self.connector.update_profile("disliked_brands", [product_name], user_id=user_id)
         return True
@@ -1,8 +1,17 @@
 import os
+import json
 import time
+import uuid
+import atexit
 import logging
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, session, stream_with_context
 from agent import ShoppingAgent
+from background_loop import shutdown_background_loop
+from scrapers.session import close_all_sessions
+from scrapers.rate_limit import host_limiter
+from scrapers.http_cache import http_cache
+from scrapers.singleflight import search_flight
+from scrapers.circuit_breaker import breaker_stats
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -26,6 +35,18 @@ def init_agent():
 # Call init immediately
 init_agent()
 
+# Stop the scraping loop and release pooled connections when the process
+# (or gunicorn worker, see gunicorn.conf.py) exits
+atexit.register(close_all_sessions)
+atexit.register(shutdown_background_loop)
+
+def current_user_id():
+    """Per-browser user ID kept in the signed session cookie."""
+    if "user_id" not in session:
+        session["user_id"] = uuid.uuid4().hex
+        session.permanent = True
+    return session["user_id"]
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -42,12 +63,65 @@ def chat():
         
         # We can eventually pass history here if the frontend sends it, 
         # or rely on the agent's internal memory (Chroma)
-        response_text = agent.chat(user_input)
+        response_text = agent.chat(user_input, user_id=current_user_id())
         return jsonify({"response": response_text})
     except Exception as e:
         logger.error(f"Route error: {e}")
         return jsonify({"error": str(e)}), 500
 
+def _sse(data, event=None):
+    """Format one server-sent event; data is JSON so newlines survive."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Streaming variant of /chat: pushes each generated chunk over SSE."""
+    if not agent:
+        return jsonify({"error": "Agent not initialized"}), 500
+
+    user_input = request.form.get('user_input')
+    if not user_input:
+        return jsonify({"error": "No input provided"}), 400
+    # Read before streaming starts: the session cookie goes out with the headers
+    user_id = current_user_id()
+
+    def generate():
+        # Flush headers + a first event right away; searching may take a while
+        yield _sse({"status": "thinking"}, event="status")
+        try:
+            for chunk in agent.chat_stream(user_input, user_id=user_id):
+                yield _sse({"delta": chunk})
+            yield _sse({}, event="done")
+        except Exception as e:
+            logger.error(f"Stream error: {e}")
+            yield _sse({"error": str(e)}, event="error")
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Operational counters for the scraping layer."""
+    return jsonify({
+        "rate_limit": host_limiter.stats(),
+        "http_cache": http_cache.stats(),
+        "sources": breaker_stats(),
+        "product_cache": agent.db_manager.cache.stats() if agent else {},
+        "semantic_cache": agent.db_manager.semantic.stats() if agent and agent.db_manager.semantic else {},
+        "single_flight": {
+            "scraper": search_flight.stats(),
+            "agent": agent.search_flight.stats() if agent else {},
+        },
+        "leases": {
+            "scrape": agent.scrape_leases.stats() if agent else {},
+            "price_tracker_writes": agent.price_tracker.write_lock.stats() if agent else {},
+        },
+    })
+
 @app.route('/reset', methods=['POST'])
 def reset():
     # For now, we just acknowledge. The Agent manages state.
@@ -61,7 +135,7 @@ def simulate_purchase():
         product = request.form.get('product', 'Generic Item')
         category = request.form.get('category', 'General')
         
-        if agent and agent.connector.simulate_purchase(product, category):
+        if agent and agent.connector.simulate_purchase(product, category, user_id=current_user_id()):
              return jsonify({"status": "success", "message": f"Successfully purchased {product}!"})
         else:
              return jsonify({"error": "Failed to simulate purchase"}), 500
@@ -81,7 +155,7 @@ def train():
         if not product:
              return jsonify({"error": "No product specified"}), 400
 
-        if agent and agent.train_preference(product, liked):
+        if agent and agent.train_preference(product, liked, user_id=current_user_id()):
             action = "Liked" if liked else "Disliked"
             return jsonify({"status": "success", "message": f"Agent learned you {action} {product}"})
         return jsonify({"error": "Training failed"}), 500
@@ -0,0 +1,103 @@
+import asyncio
+import concurrent.futures
+import logging
+import os
+import threading
+
+from scrapers.session import close_session
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundLoop:
+    """A dedicated event-loop thread that owns all async scraping in a process.
+
+    Sync callers (Flask request threads, ``ShoppingAgent.chat``) hand
+    coroutines over with ``run``. Because every scrape runs on this one
+    loop, the pooled aiohttp session, single-flight table and background
+    tasks (e.g. sources finishing after a search deadline) all live on a
+    loop that keeps running between requests.
+    """
+
+    def __init__(self, name="scraper-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._started = threading.Event()
+        self._thread.start()
+        self._started.wait()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self._started.set)
+        self.loop.run_forever()
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        """Run ``coro`` on the loop and block for its result.
+
+        On timeout the coroutine is cancelled and ``TimeoutError`` raised.
+        """
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Background task exceeded {timeout}s")
+
+    def is_alive(self):
+        return self._thread.is_alive() and not self.loop.is_closed()
+
+    def shutdown(self, timeout=10.0):
+        """Let pending tasks finish (up to ``timeout``), close sessions, stop the loop."""
+        if not self.is_alive():
+            return
+
+        async def _drain():
+            current = asyncio.current_task()
+            pending = [t for t in asyncio.all_tasks() if t is not current]
+            if pending:
+                _, still_running = await asyncio.wait(pending, timeout=timeout)
+                for task in still_running:
+                    task.cancel()
+                await asyncio.gather(*still_running, return_exceptions=True)
+            await close_session()
+
+        try:
+            self.submit(_drain()).result(timeout + 5)
+        except Exception as e:
+            logger.warning(f"Background loop drain failed: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+        if not self._thread.is_alive():
+            self.loop.close()
+        logger.info("Background event loop stopped")
+
+
+_instance = None
+_instance_pid = None
+_lock = threading.Lock()
+
+
+def get_background_loop() -> BackgroundLoop:
+    """Return this process's loop, starting it on first use.
+
+    Keyed by PID so a forked gunicorn worker never reuses a thread that only
+    existed in its parent.
+    """
+    global _instance, _instance_pid
+    with _lock:
+        if _instance is None or _instance_pid != os.getpid() or not _instance.is_alive():
+            _instance = BackgroundLoop()
+            _instance_pid = os.getpid()
+        return _instance
+
+
+def shutdown_background_loop():
+    """Shutdown hook for atexit / gunicorn ``worker_exit``."""
+    global _instance
+    with _lock:
+        instance, _instance = _instance, None
+    if instance is not None and _instance_pid == os.getpid():
+        instance.shutdown()
@@ -0,0 +1,57 @@
+"""Linking a new listing to its product cluster as the tracked catalog grows.
+
+Run with ``python bench_dedup.py``. Fills ``ProductClusters`` with
+synthetic listings (brand, model number, product type, a few extra
+words; every product listed ~3 times with small title/price changes)
+and times one more ``assign`` via the LSH buckets against comparing
+the listing with every tracked title.
+"""
+import os
+import random
+import tempfile
+import time
+
+from dedup import ProductClusters, close_prices, same_title, title_tokens
+
+BRANDS = ["Logitech", "HP", "Dell", "Lenovo", "ASUS", "Acer", "Razer", "Sony", "Boat", "Redgear"]
+TYPES = ["Wireless Mouse", "Wired Mouse", "Keyboard", "Laptop", "Headphones", "Monitor", "Webcam", "Speaker"]
+EXTRAS = ["Black", "Grey", "USB", "Bluetooth", "Silent", "Ergonomic", "Gaming", "Compact", "2024", "Pro"]
+
+
+def listing(rng, product):
+    brand, model, kind, price = product
+    words = [brand, model, kind] + rng.sample(EXTRAS, rng.randint(0, 2))
+    return " ".join(words), round(price * rng.uniform(0.95, 1.05), 2)
+
+
+def main():
+    rng = random.Random(9)
+    print(f"{'catalog':>8}  {'clusters':>8}  {'lsh assign (ms)':>16}  {'full scan (ms)':>15}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in (1_000, 10_000, 50_000):
+            clusters = ProductClusters(os.path.join(tmp, f"clusters-{size}.sqlite3"))
+            products = [(rng.choice(BRANDS), f"{rng.choice('MXKGP')}{rng.randint(100, 9999)}", rng.choice(TYPES),
+                         rng.uniform(5, 900)) for _ in range(size // 3)]
+            rows = []
+            for i in range(size):
+                title, price = listing(rng, products[i % len(products)])
+                rows.append((f"url-{i}", title, price))
+            clusters.assign(rows)
+
+            probes = [listing(rng, rng.choice(products)) for _ in range(50)]
+            started = time.perf_counter()
+            for n, (title, price) in enumerate(probes):
+                clusters.assign([(f"probe-{size}-{n}", title, price)])
+            lsh_ms = (time.perf_counter() - started) * 1000 / len(probes)
+
+            catalog = [(title_tokens(title), price) for _, title, price in rows]
+            started = time.perf_counter()
+            for title, price in probes[:5]:
+                tokens = title_tokens(title)
+                [i for i, (other, p) in enumerate(catalog) if same_title(tokens, other) and close_prices(price, p)]
+            scan_ms = (time.perf_counter() - started) * 1000 / 5
+            print(f"{size:>8}  {clusters.stats()['clusters']:>8}  {lsh_ms:>16.2f}  {scan_ms:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
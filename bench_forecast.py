@@ -0,0 +1,53 @@
+"""Forecast advice: one ``get_forecast`` per product vs. one ``get_forecasts`` batch.
+
+Run with ``python bench_forecast.py [items]``. Fills a columnar store
+with synthetic 60-day histories, then times a chat turn's worth of
+products (15) and a large batch (all items) both ways.
+"""
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+from price_store import ColumnarPriceStore
+from price_tracker import PriceTracker
+
+DAYS = 60
+
+
+def main(items):
+    rng = random.Random(5)
+    start = datetime.date(2025, 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ColumnarPriceStore(os.path.join(tmp, "price_store"))
+        tracker = PriceTracker(os.path.join(tmp, "price_history.json"), store=store)
+        urls = [f"amazon://demo/item-{i}" for i in range(items)]
+        prices = {url: rng.uniform(100, 50000) for url in urls}
+        started = time.perf_counter()
+        for d in range(DAYS):
+            day = start + datetime.timedelta(days=d)
+            points = []
+            for url in urls:
+                prices[url] = round(prices[url] * rng.choice([1.0, 1.0, 0.97, 1.03, 0.8]), 2)
+                points.append((url, day, prices[url], url, "INR", "Amazon"))
+            store.append_many(points)
+        fill = time.perf_counter() - started
+
+        print(f"{items} items x {DAYS} days (filled with daily batches in {fill:.1f}s)\n")
+        print(f"{'batch size':>10}  {'per item (ms)':>14}  {'batched (ms)':>12}")
+        for size in (15, items):
+            batch = rng.sample(urls, size)
+            started = time.perf_counter()
+            one_by_one = [tracker.get_forecast(url) for url in batch]
+            per_item = (time.perf_counter() - started) * 1000
+            started = time.perf_counter()
+            batched = tracker.get_forecasts(batch)
+            batch_ms = (time.perf_counter() - started) * 1000
+            assert batched == one_by_one
+            print(f"{size:>10}  {per_item:>14.2f}  {batch_ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
@@ -0,0 +1,69 @@
+"""Interaction history: legacy single JSON file vs. the segmented per-user log.
+
+Run with ``python bench_interaction_log.py``. Both stores are pre-filled
+with the same history (50 users), then timed on one chat turn's worth of
+work: append two records and read the user's last 8.
+"""
+import json
+import os
+import tempfile
+import time
+
+from interaction_log import InteractionLog
+
+USERS = 50
+HISTORY = 20_000
+TURNS = 200
+
+
+def _record(i):
+    user = f"user{i % USERS}"
+    return {"id": f"{user}:{i}", "user_id": user, "role": "user" if i % 2 else "assistant",
+            "text": f"message number {i} " + "x" * 80, "ts": f"2025-01-01T00:00:00.{i:06d}"}
+
+
+def legacy_turn(path, i):
+    for n in (i, i + 1):
+        with open(path) as f:
+            history = json.load(f)
+        history.append(_record(n))
+        with open(path, "w") as f:
+            json.dump(history, f, indent=2)
+    with open(path) as f:
+        history = json.load(f)
+    entries = [h for h in history if h["user_id"] == "user0"]
+    entries.sort(key=lambda x: x["ts"], reverse=True)
+    return entries[:8]
+
+
+def log_turn(log, i):
+    log.append(_record(i))
+    log.append(_record(i + 1))
+    return log.tail("user0", 8)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = os.path.join(tmp, "user_history.json")
+        with open(legacy, "w") as f:
+            json.dump([_record(i) for i in range(HISTORY)], f, indent=2)
+        log = InteractionLog(os.path.join(tmp, "interactions"))
+        log.append_many(_record(i) for i in range(HISTORY))
+
+        started = time.perf_counter()
+        for t in range(TURNS // 10):
+            legacy_turn(legacy, HISTORY + 2 * t)
+        legacy_ms = (time.perf_counter() - started) * 1000 / (TURNS // 10)
+
+        started = time.perf_counter()
+        for t in range(TURNS):
+            log_turn(log, HISTORY + 2 * t)
+        log_ms = (time.perf_counter() - started) * 1000 / TURNS
+
+    print(f"history of {HISTORY} records, {USERS} users")
+    print(f"legacy JSON file : {legacy_ms:8.2f} ms per turn")
+    print(f"segmented log    : {log_ms:8.3f} ms per turn ({legacy_ms / log_ms:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
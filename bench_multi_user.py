@@ -0,0 +1,60 @@
+"""Many concurrent users: profile reads/writes and interaction logging.
+
+Run with ``python bench_multi_user.py [users] [workers]``. Each worker
+process plays a slice of the users: per turn it reads the user's profile,
+logs a user and an assistant message and reads the recent history; every
+fifth turn also records a purchase. Runs once with a single interaction
+shard (the old one-table layout) and once with ``INTERACTION_SHARDS``
+shards, and reports turns per second.
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from storage import SQLiteStorage
+from tools import MockAmazonConnector
+
+TURNS = 40
+
+
+def worker(args):
+    tmp, shards, users = args
+    storage = SQLiteStorage(os.path.join(tmp, "storage.sqlite3"), interaction_shards=shards)
+    connector = MockAmazonConnector(os.path.join(tmp, "mock_data.json"), profiles_dir=os.path.join(tmp, "profiles"))
+    for turn in range(TURNS):
+        for user in users:
+            connector.get_user_data(user)
+            for role in ("user", "assistant"):
+                storage.append_interaction({"id": f"{user}:{turn}:{role}", "user_id": user, "role": role,
+                                            "text": f"turn {turn}", "ts": "2025-01-01T00:00:00"})
+            storage.recent_interactions(user, 10)
+            if turn % 5 == 0:
+                connector.simulate_purchase(f"Item {turn}", "Electronics", 499.0, user_id=user)
+    return TURNS * len(users)
+
+
+def run(shards, users, workers):
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "mock_data.json"), "w") as f:
+            f.write('{"users": {}}')
+        SQLiteStorage(os.path.join(tmp, "storage.sqlite3"), interaction_shards=shards)
+        names = [f"user-{i}" for i in range(users)]
+        slices = [(tmp, shards, names[w::workers]) for w in range(workers)]
+        started = time.perf_counter()
+        with multiprocessing.Pool(workers) as pool:
+            turns = sum(pool.map(worker, slices))
+        return turns / (time.perf_counter() - started)
+
+
+def main(users, workers):
+    shards = int(os.getenv("INTERACTION_SHARDS", "8"))
+    print(f"{users} users, {workers} worker processes, {TURNS} turns each\n")
+    for n in (1, shards):
+        print(f"{n:>2} interaction shard(s): {run(n, users, workers):>8.0f} turns/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 64,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 8)
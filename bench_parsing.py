@@ -0,0 +1,80 @@
+"""Per-page parse time: full html.parser tree vs. lxml restricted to result cards.
+
+Run with ``python bench_parsing.py``. Pages are synthetic but sized and
+shaped like real search pages (~0.8 MB, mostly scripts/nav/markup noise
+around a few dozen result cards), so no network access is needed.
+"""
+import time
+
+from bs4 import BeautifulSoup
+
+from scrapers.amazon import AmazonScraper
+from scrapers.ebay import EbayScraper
+from scrapers.flipkart import FlipkartScraper
+from scrapers.parsing import parse_html
+
+NOISE = (
+    '<div class="nav-row"><ul>' + "".join(f'<li class="nav-item"><a href="/c/{i}">Category {i}</a></li>' for i in range(40)) + "</ul></div>"
+    '<script type="text/javascript">var cfg = {' + ",".join(f'"k{i}": "{"x" * 40}"' for i in range(60)) + "};</script>"
+    '<div class="ad-slot"><span class="sponsored">Sponsored</span><img src="/ad.png"/></div>'
+)
+
+
+def _page(card_html, cards=48, noise_per_card=3):
+    body = []
+    for i in range(cards):
+        body.extend([NOISE] * noise_per_card)
+        body.append(card_html(i))
+    return "<html><head><title>Results</title></head><body>" + "".join(body) + "</body></html>"
+
+
+def amazon_card(i):
+    return (
+        f'<div data-component-type="s-search-result" data-asin="B0{i:08d}"><div class="s-card">'
+        f'<h2><a class="a-link-normal a-text-normal" href="/dp/B0{i:08d}"><span>Wireless Mouse {i}</span></a></h2>'
+        f'<span class="a-price"><span class="a-price-whole">{500 + i}</span><span class="a-price-fraction">00</span></span>'
+        "</div></div>"
+    )
+
+
+def ebay_card(i):
+    return (
+        f'<li class="s-item s-item__pl-on-bottom"><a class="s-item__link" href="https://www.ebay.com/itm/{i}">'
+        f'<h3 class="s-item__title">Wireless Mouse {i}</h3></a><span class="s-item__price">${10 + i}.99</span></li>'
+    )
+
+
+def flipkart_card(i):
+    return (
+        f'<div class="_4ddWXP"><a class="s1Q9rs" href="/p/itm{i}">Wireless Mouse {i}</a>'
+        f'<div class="_30jeq3">₹{400 + i}</div></div>'
+    )
+
+
+def _time(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    cases = [
+        ("Amazon", AmazonScraper.result_strainer, amazon_card, "div[data-component-type='s-search-result']"),
+        ("eBay", EbayScraper.result_strainer, ebay_card, "li.s-item"),
+        ("Flipkart", FlipkartScraper.result_strainer, flipkart_card, "div._4ddWXP, div._1AtVbE"),
+    ]
+    print(f"{'source':<10}{'page KB':>9}{'html.parser ms':>16}{'lxml+strainer ms':>18}{'speedup':>9}{'cards':>7}")
+    for name, strainer, card, selector in cases:
+        html = _page(card)
+        before, full = _time(lambda: BeautifulSoup(html, "html.parser"))
+        after, strained = _time(lambda: parse_html(html, strainer))
+        n_full, n_strained = len(full.select(selector)), len(strained.select(selector))
+        assert n_full == n_strained, (name, n_full, n_strained)
+        print(f"{name:<10}{len(html) / 1024:>9.0f}{before * 1000:>16.1f}{after * 1000:>18.1f}{before / after:>8.1f}x{n_strained:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Price history at 100k tracked items: legacy JSON file vs. columnar store.
+
+Run with ``python bench_price_store.py [items]``. Builds a synthetic
+``price_history.json`` (30 daily points per item), imports it into a
+``ColumnarPriceStore`` and compares per-call latency of what
+``PriceTracker`` does on every search (forecast read, daily append)
+plus the Python heap each approach holds.
+"""
+import datetime
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from price_tracker import PriceTracker
+from price_store import ColumnarPriceStore, JSONPriceStore
+
+POINTS = 30
+
+
+def build(path, items):
+    start = datetime.date(2025, 1, 1)
+    days = [(start + datetime.timedelta(days=d)).isoformat() for d in range(POINTS)]
+    tracked = {}
+    for i in range(items):
+        url = f"amazon://demo/item-{i}"
+        base = 500.0 + i % 5000
+        tracked[url] = {
+            "title": f"Synthetic product {i}", "url": url, "currency": "INR", "source": "Amazon",
+            "history": [{"date": day, "price": round(base * (1 + 0.01 * ((i + d) % 7 - 3)), 2)} for d, day in enumerate(days)],
+        }
+    with open(path, "w") as f:
+        json.dump({"tracked_items": tracked}, f)
+
+
+def timed(fn, n):
+    started = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - started) * 1000 / n
+
+
+def heap_of(fn):
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak / 1024 / 1024
+
+
+def main(items):
+    rng = random.Random(1)
+    urls = [f"amazon://demo/item-{i}" for i in range(items)]
+    today = datetime.date(2025, 1, 1) + datetime.timedelta(days=POINTS)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "price_history.json")
+        build(path, items)
+        print(f"{items} items x {POINTS} points, JSON file {os.path.getsize(path) / 1e6:.1f} MB\n")
+
+        json_tracker = PriceTracker(path, store=JSONPriceStore(path))
+        _, json_heap = heap_of(json_tracker.store._load)
+        json_forecast = timed(lambda: json_tracker.get_forecast(rng.choice(urls)), 3)
+
+        started = time.perf_counter()
+        store = ColumnarPriceStore(os.path.join(tmp, "price_store"))
+        store.import_json_file(path)
+        import_s = time.perf_counter() - started
+        tracker = PriceTracker(path, store=store)
+        col_forecast = timed(lambda: tracker.get_forecast(rng.choice(urls)), 5000)
+        _, col_heap = heap_of(lambda: [tracker.get_forecast(rng.choice(urls)) for _ in range(1000)])
+        col_append = timed(lambda: store.append(rng.choice(urls), today, 499.0), 2000)
+        stats = store.stats()
+
+    print(f"{'':22}{'json':>12}{'columnar':>12}")
+    print(f"{'get_forecast (ms)':22}{json_forecast:>12.1f}{col_forecast:>12.3f}")
+    print(f"{'python heap (MB)':22}{json_heap:>12.1f}{col_heap:>12.2f}")
+    print(f"\ncolumnar: import {import_s:.1f}s, append {col_append:.3f} ms, "
+          f"column files {stats['file_bytes'] / 1e6:.1f} MB")
+    print("(json track_item costs a full load plus a full rewrite, so more than get_forecast)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
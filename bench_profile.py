@@ -0,0 +1,58 @@
+"""Profile lookup per chat turn: parse-and-render every time vs. cached.
+
+Run with ``python bench_profile.py``. Uses a copy of
+``data/mock_data.json`` with a longer purchase history and compares the
+old path (open + json.load + build the string on every call) with
+``ShoppingAgent.get_user_profile_str`` on the mtime-checked connector.
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from agent import ShoppingAgent
+from product_cache import LRUCache
+from tools import MockAmazonConnector
+
+CALLS = 2000
+
+
+def legacy_profile(path, render):
+    with open(path, 'r') as f:
+        data = json.load(f)['users'].get("current_user", {})
+    return render(data)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "mock_data.json")
+        shutil.copy(os.path.join("data", "mock_data.json"), path)
+        with open(path) as f:
+            data = json.load(f)
+        user = data["users"]["current_user"]
+        user["purchase_history"] = user["purchase_history"] * 200
+        with open(path, "w") as f:
+            json.dump(data, f)
+        size_kb = os.path.getsize(path) / 1024
+
+        agent = ShoppingAgent.__new__(ShoppingAgent)
+        agent.connector = MockAmazonConnector(path, profiles_dir=os.path.join(tmp, "profiles"))
+        agent._profile_str = LRUCache()
+
+        started = time.perf_counter()
+        for _ in range(CALLS):
+            legacy_profile(path, agent._render_profile)
+        legacy_us = (time.perf_counter() - started) * 1e6 / CALLS
+
+        started = time.perf_counter()
+        for _ in range(CALLS):
+            agent.get_user_profile_str()
+        cached_us = (time.perf_counter() - started) * 1e6 / CALLS
+
+    print(f"profile file {size_kb:.0f} KB")
+    print(f"legacy: {legacy_us:.1f} us/turn, cached: {cached_us:.1f} us/turn")
+
+
+if __name__ == "__main__":
+    main()
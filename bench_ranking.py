@@ -0,0 +1,49 @@
+"""Ranking cost per query: legacy per-item percentile loop vs. ``ranking.Ranker``.
+
+Run with ``python bench_ranking.py``. Ranks synthetic mixed INR/USD
+result sets of growing size the way ``ShoppingAgent._rank`` did before
+(an O(n^2) percentile scan on raw prices) and with the vectorized
+ranker (one sort plus ``searchsorted`` on normalized prices).
+"""
+import random
+import time
+
+from ranking import FxRates, Ranker
+
+
+def legacy_rank(flat_results):
+    prices = [p.get('price', 0) for p in flat_results if isinstance(p.get('price', 0), (int, float)) and p.get('price', 0) > 0]
+    prices_sorted = sorted(prices) if prices else []
+    final_results = []
+    for p in flat_results:
+        if p['score'] > 0.2:
+            price = p.get('price', 0)
+            if prices_sorted and isinstance(price, (int, float)) and price > 0:
+                rank = sum(1 for x in prices_sorted if x <= price) / len(prices_sorted)
+                p['trend'] = "good" if rank <= 0.30 else "high" if rank >= 0.70 else "fair"
+            final_results.append(p)
+    final_results.sort(key=lambda x: x['price'] if x['price'] > 0 else 999999)
+    return final_results
+
+
+def main():
+    rng = random.Random(2)
+    ranker = Ranker(FxRates({"USD": 1.0, "INR": 83.0}), currency="INR")
+    print(f"{'candidates':>10}  {'legacy (ms)':>12}  {'ranker (ms)':>12}")
+    for n in (50, 500, 2000, 5000):
+        products = [
+            {"title": str(i), "price": rng.uniform(5, 500) if i % 3 == 0 else rng.uniform(300, 50000),
+             "currency": "USD" if i % 3 == 0 else "INR", "score": 1.0}
+            for i in range(n)
+        ]
+        started = time.perf_counter()
+        legacy_rank([dict(p) for p in products])
+        legacy_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        ranker.rank([dict(p) for p in products])
+        ranker_ms = (time.perf_counter() - started) * 1000
+        print(f"{n:>10}  {legacy_ms:>12.2f}  {ranker_ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
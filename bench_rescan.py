@@ -0,0 +1,51 @@
+"""Searches per daily scan: rescan everything vs. the rescan scheduler.
+
+Run with ``python bench_rescan.py``. Simulates 60 days of daily scans
+over catalogs of growing size where 10% of items move price often,
+20% now and then and the rest almost never, and a few hundred items
+a day show up in users' search results.
+"""
+import os
+import random
+import tempfile
+
+from rescan_scheduler import DAY_SECONDS, RescanScheduler
+
+DAYS = 60
+START = 1_700_000_000.0
+
+
+def simulate(items, budget, rng, tmp):
+    scheduler = RescanScheduler(os.path.join(tmp, f"schedule-{items}.sqlite3"))
+    urls = [f"item-{i}" for i in range(items)]
+    move_odds = {url: (0.6 if i % 10 == 0 else 0.1 if i % 10 < 3 else 0.01) for i, url in enumerate(urls)}
+    prices = {url: 100.0 for url in urls}
+    searches = []
+    for day in range(DAYS):
+        now = START + day * DAY_SECONDS
+        scheduler.note_interest(rng.sample(urls, min(300, items)), now=now)
+        due = scheduler.due_times(urls)
+        todo = {url for _, url in sorted((d, url) for url, d in due.items() if scheduler.is_due(d, now))[:budget]}
+        observations = []
+        for url in urls:
+            old = prices[url]
+            if rng.random() < move_odds[url]:
+                prices[url] = round(old * rng.uniform(0.85, 1.15), 2)
+            if url in todo:
+                observations.append((url, old, prices[url]))
+        scheduler.record_checks(observations, now=now)
+        searches.append(len(todo))
+    return sum(searches[-30:]) / 30
+
+
+def main():
+    rng = random.Random(7)
+    print(f"{'items':>8}  {'rescan all / day':>17}  {'scheduled / day':>16}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for items in (1_000, 5_000, 20_000):
+            per_day = simulate(items, budget=10_000_000, rng=rng, tmp=tmp)
+            print(f"{items:>8}  {items:>17}  {per_day:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Semantic query cache: hit rate, false-hit rate and lookup cost.
+
+Run with ``python bench_semantic_cache.py``. Each labelled pair is a
+cached query and a new query; ``same`` pairs should be served from the
+cache, ``different`` pairs must not be (a hit there is a false hit).
+Timing uses an index of 10k synthetic cached queries.
+"""
+import random
+import time
+
+from semantic_cache import SemanticQueryIndex
+
+SAME = [
+    ("gaming mouse", "gaming mosue"),
+    ("mechanical keyboard", "mechanical keybord"),
+    ("noise cancelling headphones", "noise canceling headphones"),
+    ("bluetooth speaker", "bluetooth speeker"),
+    ("samsung galaxy s24", "samsng galaxy s24"),
+    ("wireless earbuds", "wirless earbuds"),
+    ("running shoes for men", "mens running shoes"),
+    ("external hard drive 1tb", "external hardrive 1tb"),
+    ("air purifier", "air purifer"),
+    ("office chair", "ofice chair"),
+]
+
+DIFFERENT = [
+    ("gaming mouse", "wireless mouse"),
+    ("laptop", "laptop bag"),
+    ("iphone", "iphone case"),
+    ("wireless mouse", "wireless mouse pad"),
+    ("running shoes", "running shorts"),
+    ("mechanical keyboard", "mechanical pencil"),
+    ("smart watch", "smart patch"),
+    ("iphone 14", "iphone 15"),
+    ("usb cable", "usb table"),
+    ("laptop under 50000", "laptop under 80000"),
+    ("phone charger", "phone case"),
+    ("gaming laptop", "gaming chair"),
+    ("gaming chair", "gaming chain"),
+    ("red shirt", "red skirt"),
+    ("bluetooth speaker", "bluetooth sneaker"),
+    ("steel bottle", "steel battle"),
+]
+
+WORDS = ("wireless gaming mechanical bluetooth portable smart usb led ergonomic noise cancelling "
+         "mouse keyboard headphone speaker monitor laptop charger cable stand lamp chair desk "
+         "router camera tablet phone case backpack bottle watch tripod microphone").split()
+
+
+def hit_rates(threshold):
+    hits = false_hits = 0
+    for pairs, is_same in ((SAME, True), (DIFFERENT, False)):
+        for cached, asked in pairs:
+            index = SemanticQueryIndex(threshold)
+            index.add(cached, cached)
+            if index.nearest(asked) is not None:
+                if is_same:
+                    hits += 1
+                else:
+                    false_hits += 1
+    return hits / len(SAME), false_hits / len(DIFFERENT)
+
+
+def timing(entries=10_000, lookups=2_000):
+    rng = random.Random(7)
+    index = SemanticQueryIndex()
+    started = time.perf_counter()
+    for i in range(entries):
+        words = rng.sample(WORDS, 3)
+        index.add(f"q{i}", " ".join(words) + f" {i}")
+    build = time.perf_counter() - started
+    for _ in range(lookups):
+        index.nearest(" ".join(rng.sample(WORDS, 3)))
+    return build, index.stats()
+
+
+def main():
+    print(f"{'threshold':>9}  {'hit rate':>8}  {'false hits':>10}")
+    for threshold in (0.5, 0.6, 0.7, 0.8):
+        hit, false_hit = hit_rates(threshold)
+        print(f"{threshold:>9.2f}  {hit:>8.0%}  {false_hit:>10.0%}")
+    build, stats = timing()
+    print(f"\nindex of {stats['entries']} queries built in {build:.2f}s")
+    print(f"avg embed {stats['avg_embed_ms']:.3f} ms, avg lookup {stats['avg_lookup_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+import hashlib
+import logging
+import math
+import os
+import sqlite3
+import threading
+import zlib
+
+import numpy as np
+
+from scrapers.query_normalizer import query_tokens
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 64
+# 16 bands of 4 rows: two shingle sets with Jaccard J share a bucket with
+# probability 1 - (1 - J^4)^16, ~0.97 at J = 0.67 but ~0.06 at J = 0.33,
+# so candidates are mostly true lookalikes; the exact check follows
+BANDS = 16
+# Model/spec tokens count this many times in the shingle set: listings of
+# different models from one brand and category rarely share a bucket
+MODEL_WEIGHT = 3
+# Share of the shorter title's tokens the longer one must contain
+CONTAINMENT = 0.8
+# Max relative price gap between two listings of the same product
+PRICE_TOLERANCE = 0.25
+
+_PRIME = 4294967311  # smallest prime above 2**32
+
+
+def title_tokens(title):
+    """Normalized token set of a listing title (see ``query_tokens``)."""
+    return frozenset(query_tokens(title or ""))
+
+
+def _model_tokens(tokens):
+    return {t for t in tokens if any(ch.isdigit() for ch in t)}
+
+
+def shingles(tokens):
+    """MinHash input for a token set: tokens plus weighted model tokens."""
+    out = set(tokens)
+    for token in _model_tokens(tokens):
+        out.update(f"{token}#{k}" for k in range(1, MODEL_WEIGHT))
+    return sorted(out)
+
+
+def same_title(a, b):
+    """Token sets ``a`` and ``b`` name the same product.
+
+    The shorter title must be (mostly) contained in the longer one, and
+    model/spec tokens (anything with a digit: ``m185``, ``i5``, ``512gb``)
+    may only be missing on one side: "HP 15s i5" vs "HP 15s i3" differ.
+    Two-token titles additionally need a shared model token.
+    """
+    small = min(len(a), len(b))
+    if small < 2 or len(a & b) / small < CONTAINMENT:
+        return False
+    model_a, model_b = _model_tokens(a), _model_tokens(b)
+    if not (model_a <= model_b or model_b <= model_a):
+        return False
+    return small >= 3 or bool(model_a & model_b)
+
+
+def close_prices(a, b, tolerance=PRICE_TOLERANCE):
+    """Prices within ``tolerance`` of each other; unknown prices never conflict."""
+    if not (a and b and a > 0 and b > 0 and math.isfinite(a) and math.isfinite(b)):
+        return True
+    return abs(a - b) / min(a, b) <= tolerance
+
+
+class MinHasher:
+    """MinHash signatures of token sets (``num_perm`` universal hashes)."""
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, 2 ** 32 - 1, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 2 ** 32 - 1, size=num_perm, dtype=np.uint64)
+
+    def signature(self, tokens):
+        x = np.array([zlib.crc32(t.encode()) for t in tokens] or [0], dtype=np.uint64)
+        return ((self.a[:, None] * x[None, :] + self.b[:, None]) % np.uint64(_PRIME)).min(axis=1)
+
+    def band_keys(self, signature, bands=BANDS):
+        """One 63-bit bucket key per band of ``signature``."""
+        rows = len(signature) // bands
+        keys = []
+        for band in range(bands):
+            digest = hashlib.blake2b(signature[band * rows:(band + 1) * rows].tobytes(), digest_size=8,
+                                     salt=band.to_bytes(2, "little")).digest()
+            keys.append(int.from_bytes(digest, "little") >> 1)
+        return keys
+
+
+_hasher = MinHasher()
+
+
+def merge_duplicates(products, prices):
+    """Merge listings of the same product within one result set.
+
+    ``prices`` are the products' prices in one currency (NaN if unknown,
+    e.g. ``Ranker.normalized_prices``). Each duplicate group keeps its
+    cheapest listing; the others are attached to it as ``also_at``
+    (source, price, currency, url). Candidates come from an LSH index, so
+    each listing is compared with a handful of lookalikes, not all others.
+    """
+    buckets = {}
+    groups = []  # [representative index, [member indexes]]
+    group_of = {}
+    for i, p in enumerate(products):
+        tokens = title_tokens(p.get('title'))
+        keys = _hasher.band_keys(_hasher.signature(shingles(tokens))) if tokens else []
+        match = None
+        for g in sorted({group_of[j] for key in keys for j in buckets.get(key, ())}):
+            rep = groups[g][0]
+            if same_title(tokens, title_tokens(products[rep].get('title'))) and close_prices(prices[i], prices[rep]):
+                match = g
+                break
+        if match is None:
+            match = len(groups)
+            groups.append([i, []])
+        else:
+            groups[match][1].append(i)
+        group_of[i] = match
+        for key in keys:
+            buckets.setdefault(key, []).append(i)
+
+    merged = []
+    for rep, others in groups:
+        if not others:
+            merged.append(products[rep])
+            continue
+        members = [rep] + others
+        best = min(members, key=lambda j: (not math.isfinite(prices[j]), prices[j] if math.isfinite(prices[j]) else 0.0, j))
+        item = dict(products[best])
+        item['also_at'] = [
+            {k: products[j].get(k) for k in ("source", "price", "currency", "url")}
+            for j in members if j != best
+        ]
+        merged.append(item)
+    return merged
+
+
+class ProductClusters:
+    """Tracked URLs linked into product clusters, persisted in SQLite.
+
+    Each URL's MinHash band keys are stored in an indexed ``lsh`` table,
+    so finding the clusters a new listing may belong to is one indexed
+    ``IN`` query over its bucket keys that reads only its lookalikes. A URL
+    joins the cluster of the first candidate passing ``same_title`` and
+    ``close_prices``; otherwise it starts its own (cluster id = its URL).
+    Prices are compared in whatever single currency the caller uses.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS members (
+            url      TEXT PRIMARY KEY,
+            cluster  TEXT NOT NULL,
+            title    TEXT NOT NULL DEFAULT '',
+            price    REAL
+        );
+        CREATE INDEX IF NOT EXISTS members_cluster ON members (cluster);
+        CREATE TABLE IF NOT EXISTS lsh (
+            bucket   INTEGER NOT NULL,
+            url      TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS lsh_bucket ON lsh (bucket);
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().executescript(self.SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _known(self, conn, urls):
+        known = {}
+        for i in range(0, len(urls), 500):
+            chunk = urls[i:i + 500]
+            for row in conn.execute(f"SELECT url, cluster FROM members WHERE url IN ({','.join('?' * len(chunk))})", chunk):
+                known[row["url"]] = row["cluster"]
+        return known
+
+    def assign(self, items):
+        """Cluster new ``(url, title, price)`` items; returns ``{url: cluster}`` for all of them."""
+        items = [(url, title, price) for url, title, price in items if url]
+        if not items:
+            return {}
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            clusters = self._known(conn, [url for url, _, _ in items])
+            for url, title, price in items:
+                if url in clusters:
+                    continue
+                tokens = title_tokens(title)
+                keys = _hasher.band_keys(_hasher.signature(shingles(tokens))) if tokens else []
+                cluster = url
+                if keys:
+                    rows = conn.execute(
+                        "SELECT m.url, m.cluster, m.title, m.price FROM members m WHERE m.url IN "
+                        f"(SELECT DISTINCT url FROM lsh WHERE bucket IN ({','.join('?' * len(keys))})) ORDER BY m.rowid",
+                        keys,
+                    ).fetchall()
+                    for row in rows:
+                        if same_title(tokens, title_tokens(row["title"])) and close_prices(price, row["price"]):
+                            cluster = row["cluster"]
+                            break
+                conn.execute("INSERT INTO members (url, cluster, title, price) VALUES (?, ?, ?, ?)",
+                             (url, cluster, title or "", price))
+                conn.executemany("INSERT INTO lsh (bucket, url) VALUES (?, ?)", [(key, url) for key in keys])
+                clusters[url] = cluster
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return clusters
+
+    def clusters_of(self, urls):
+        """``{url: cluster}`` for URLs already assigned."""
+        return self._known(self._conn(), list(urls))
+
+    def members(self, url):
+        """All URLs in the same cluster as ``url`` (just ``[url]`` if unknown)."""
+        conn = self._conn()
+        row = conn.execute("SELECT cluster FROM members WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return [url]
+        return [r["url"] for r in conn.execute("SELECT url FROM members WHERE cluster = ? ORDER BY rowid", (row["cluster"],))]
+
+    def stats(self):
+        row = self._conn().execute("SELECT COUNT(*), COUNT(DISTINCT cluster) FROM members").fetchone()
+        return {"items": row[0], "clusters": row[1]}
@@ -0,0 +1,72 @@
+import numpy as np
+
+from price_store import ROLLING_FIELDS, WINDOW
+
+NEW_ITEM = "🆕 New Item: collecting data..."
+RISING = "📈 Price Rising: Wait (Was cheaper recently)"
+GOOD_DEAL = "✅ Good Deal: 5% below monthly average."
+STABLE = "➡️ Price Stable: Monitor for drops."
+
+# Advice codes, in the order the rules are checked
+_NEW, _FIRE, _DROP, _RISING, _GOOD, _STABLE = range(6)
+
+
+def compute_signals(states, window=WINDOW):
+    """Trend signals for many items at once from their rolling aggregates.
+
+    ``states`` is a sequence of ``price_store.rolling_state`` dicts (None for
+    untracked items). Returns a dict of equally long arrays: ``length``,
+    ``latest``, ``previous``, ``delta_pct`` (latest vs previous), ``mean``
+    (rolling mean over the last ``window`` points), ``ema`` and ``slope``
+    (least-squares price change per point over the window).
+    """
+    empty = dict.fromkeys(ROLLING_FIELDS, 0.0)
+    table = np.array([[(s or empty)[f] for f in ROLLING_FIELDS] for s in states], dtype=np.float64).reshape(-1, len(ROLLING_FIELDS))
+    length, latest, previous, win_sum, win_xy, ema = table.T
+
+    count = np.minimum(length, window)
+    mean = np.divide(win_sum, count, out=np.zeros_like(win_sum), where=count > 0)
+    delta_pct = np.divide(latest - previous, previous, out=np.zeros_like(latest), where=previous > 0) * 100.0
+
+    # Window covers indexes lo..hi; sums of x and x^2 in closed form
+    lo, hi = length - count, length - 1
+    sum_x = count * (lo + hi) / 2.0
+    sum_xx = (hi * (hi + 1) * (2 * hi + 1) - (lo - 1) * lo * (2 * lo - 1)) / 6.0
+    denom = count * sum_xx - sum_x ** 2
+    slope = np.divide(count * win_xy - sum_x * win_sum, denom, out=np.zeros_like(denom), where=denom > 0)
+
+    return {
+        "length": length.astype(np.int64),
+        "latest": latest,
+        "previous": previous,
+        "delta_pct": delta_pct,
+        "mean": mean,
+        "ema": ema,
+        "slope": slope,
+    }
+
+
+def advice(signals):
+    """The tracker's advice strings for every item in ``signals``."""
+    length, latest, previous, mean = signals["length"], signals["latest"], signals["previous"], signals["mean"]
+    drop_pct = -signals["delta_pct"]
+    codes = np.select(
+        [
+            length < 2,
+            (latest < previous) & (drop_pct > 20),
+            latest < previous,
+            latest > previous,
+            latest < mean * 0.95,
+        ],
+        [_NEW, _FIRE, _DROP, _RISING, _GOOD],
+        default=_STABLE,
+    )
+    texts = []
+    for code, pct in zip(codes.tolist(), drop_pct.tolist()):
+        if code == _FIRE:
+            texts.append(f"🔥 FIRE DEAL: Dropped {pct:.1f}%!")
+        elif code == _DROP:
+            texts.append(f"📉 Price Drop: Down {pct:.1f}% (Buy Now)")
+        else:
+            texts.append((NEW_ITEM, None, None, RISING, GOOD_DEAL, STABLE)[code])
+    return texts
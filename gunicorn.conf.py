@@ -0,0 +1,7 @@
+# Picked up automatically by gunicorn when started from the project root.
+from background_loop import shutdown_background_loop
+
+
+def worker_exit(server, worker):
+    # Drain background scrapes and close pooled connections for this worker
+    shutdown_background_loop()
@@ -0,0 +1,277 @@
+import json
+import logging
+import os
+import struct
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: threads of one process are still serialized
+    fcntl = None
+
+from leases import FileLock
+from user_shards import user_hash
+
+logger = logging.getLogger(__name__)
+
+OFFSET = struct.Struct("<Q")
+
+
+class InteractionLog:
+    """Append-only interaction log, one directory of segments per user.
+
+    A segment is ``000001.jsonl`` (one record per line) plus
+    ``000001.idx``, the uint64 byte offset of every record in it. An
+    append writes one line and one offset; reading the last N records
+    seeks into the newest segment's index and reads only those lines.
+
+    Once a segment reaches ``segment_bytes`` the next append opens a new
+    one. When a user has more than ``max_segments``, the sealed segments
+    are compacted into one, keeping the newest ``retain`` records
+    (0 keeps everything).
+    """
+
+    MARKER = ".migrated"
+
+    def __init__(self, directory, segment_bytes=1024 * 1024, max_segments=8, retain=10_000):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.retain = retain
+        self._repaired = set()
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls, directory):
+        return cls(
+            directory,
+            segment_bytes=int(float(os.getenv("INTERACTION_LOG_SEGMENT_KB", "1024")) * 1024),
+            max_segments=int(os.getenv("INTERACTION_LOG_MAX_SEGMENTS", "8")),
+            retain=int(os.getenv("INTERACTION_LOG_RETAIN", "10000")),
+        )
+
+    # -- layout -----------------------------------------------------------
+
+    def _user_dir(self, user_id):
+        return os.path.join(self.directory, user_hash(user_id)[:16])
+
+    @staticmethod
+    def _paths(user_dir, number):
+        base = os.path.join(user_dir, f"{number:06d}")
+        return base + ".jsonl", base + ".idx"
+
+    @staticmethod
+    def _segments(user_dir):
+        try:
+            names = os.listdir(user_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(int(n[:-6]) for n in names if n.endswith(".jsonl") and n[:-6].isdigit())
+
+    @contextmanager
+    def _locked(self, user_dir):
+        """Serialize writers across threads and, where supported, processes."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(user_dir, ".lock"), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # -- writes -----------------------------------------------------------
+
+    def append(self, record):
+        self.append_many([record])
+
+    def append_many(self, records):
+        by_user = {}
+        for record in records:
+            line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+            by_user.setdefault(record["user_id"], []).append(line)
+        for user_id, lines in by_user.items():
+            user_dir = self._user_dir(user_id)
+            os.makedirs(user_dir, exist_ok=True)
+            with self._locked(user_dir):
+                self._append_lines(user_dir, lines)
+
+    def _active_segment(self, user_dir):
+        # Listed under the lock on every append: another process may have
+        # rolled over or compacted, and compaction keeps the list short.
+        number = (self._segments(user_dir) or [1])[-1]
+        if user_dir not in self._repaired:
+            self._repair(user_dir, number)
+            self._repaired.add(user_dir)
+        return number
+
+    def _append_lines(self, user_dir, lines):
+        number = self._active_segment(user_dir)
+        data_path, idx_path = self._paths(user_dir, number)
+        data, idx = open(data_path, "ab"), open(idx_path, "ab")
+        try:
+            offset = data.tell()
+            for line in lines:
+                if offset >= self.segment_bytes:
+                    data.close()
+                    idx.close()
+                    number += 1
+                    data_path, idx_path = self._paths(user_dir, number)
+                    data, idx = open(data_path, "ab"), open(idx_path, "ab")
+                    offset = 0
+                data.write(line)
+                idx.write(OFFSET.pack(offset))
+                offset += len(line)
+        finally:
+            data.close()
+            idx.close()
+        if len(self._segments(user_dir)) > self.max_segments:
+            self._compact(user_dir, active=number)
+
+    def _repair(self, user_dir, number):
+        """Bring a segment's index back in line with its data after a crash."""
+        data_path, idx_path = self._paths(user_dir, number)
+        if not os.path.exists(data_path):
+            return
+        data_size = os.path.getsize(data_path)
+        idx_size = os.path.getsize(idx_path) if os.path.exists(idx_path) else 0
+        if idx_size % OFFSET.size == 0 and idx_size:
+            with open(idx_path, "rb") as idx:
+                idx.seek(idx_size - OFFSET.size)
+                (last,) = OFFSET.unpack(idx.read(OFFSET.size))
+            with open(data_path, "rb") as data:
+                data.seek(last)
+                tail = data.read()
+            if tail.count(b"\n") == 1 and tail.endswith(b"\n"):
+                return
+        elif not idx_size and not data_size:
+            return
+        with open(data_path, "rb") as data:
+            content = data.read()
+        end = content.rfind(b"\n") + 1  # drop a torn last line
+        offsets, pos = [], 0
+        while pos < end:
+            offsets.append(pos)
+            pos = content.index(b"\n", pos) + 1
+        with open(data_path, "r+b") as data:
+            data.truncate(end)
+        with open(idx_path, "wb") as idx:
+            idx.write(b"".join(OFFSET.pack(o) for o in offsets))
+        logger.warning(f"Interaction log: rebuilt index of {data_path} ({len(offsets)} records)")
+
+    def _compact(self, user_dir, active):
+        sealed = [n for n in self._segments(user_dir) if n < active]
+        if len(sealed) < 2:
+            return
+        lines = []
+        for number in sealed:
+            with open(self._paths(user_dir, number)[0], "rb") as data:
+                lines.extend(l + b"\n" for l in data.read().split(b"\n") if l)
+        if self.retain:
+            lines = lines[-self.retain:]
+        target_data, target_idx = self._paths(user_dir, sealed[0])
+        offsets, pos = [], 0
+        for line in lines:
+            offsets.append(pos)
+            pos += len(line)
+        with open(target_data + ".tmp", "wb") as data:
+            data.write(b"".join(lines))
+        with open(target_idx + ".tmp", "wb") as idx:
+            idx.write(b"".join(OFFSET.pack(o) for o in offsets))
+        os.replace(target_idx + ".tmp", target_idx)
+        os.replace(target_data + ".tmp", target_data)
+        for number in sealed[1:]:
+            for path in self._paths(user_dir, number):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        logger.info(f"Interaction log: compacted {len(sealed)} segments into {len(lines)} records")
+
+    # -- reads ------------------------------------------------------------
+
+    def tail(self, user_id, limit):
+        """The user's newest ``limit`` records, newest first."""
+        user_dir = self._user_dir(user_id)
+        if limit <= 0 or not os.path.isdir(user_dir):
+            return []
+        records = []
+        with self._locked(user_dir):
+            for number in reversed(self._segments(user_dir)):
+                need = limit - len(records)
+                if need <= 0:
+                    break
+                records.extend(reversed(self._read_last(user_dir, number, need)))
+        return records
+
+    def _read_last(self, user_dir, number, count):
+        data_path, idx_path = self._paths(user_dir, number)
+        try:
+            indexed = os.path.getsize(idx_path) // OFFSET.size
+        except FileNotFoundError:
+            return []
+        count = min(count, indexed)
+        if not count:
+            return []
+        with open(idx_path, "rb") as idx:
+            idx.seek((indexed - count) * OFFSET.size)
+            (first,) = OFFSET.unpack(idx.read(OFFSET.size))
+        with open(data_path, "rb") as data:
+            data.seek(first)
+            chunk = data.read()
+        records = []
+        for line in chunk.split(b"\n")[:count]:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        return records
+
+    def records(self):
+        """Every record of every user, oldest first per user (for migrations)."""
+        for name in sorted(os.listdir(self.directory)):
+            user_dir = os.path.join(self.directory, name)
+            if not os.path.isdir(user_dir):
+                continue
+            for number in self._segments(user_dir):
+                with open(self._paths(user_dir, number)[0], "rb") as data:
+                    for line in data:
+                        try:
+                            yield json.loads(line)
+                        except ValueError:
+                            continue
+
+    # -- migration --------------------------------------------------------
+
+    def import_json_history(self, history_file):
+        """One-shot import of the legacy ``user_history.json``; a no-op once done.
+
+        Workers starting together take turns on a file lock, so only the
+        first one imports and the others find the marker.
+        """
+        with FileLock(os.path.join(self.directory, ".migrate.lock")):
+            return self._import_json_history(history_file)
+
+    def _import_json_history(self, history_file):
+        marker = os.path.join(self.directory, self.MARKER)
+        if os.path.exists(marker):
+            return False
+        history = []
+        if os.path.exists(history_file):
+            try:
+                with open(history_file, "r") as f:
+                    history = json.load(f)
+            except Exception as e:
+                logger.error(f"Interaction log: could not read {history_file}: {e}")
+                return False
+        history = [h for h in history if isinstance(h, dict) and h.get("user_id")]
+        history.sort(key=lambda h: h.get("ts", ""))
+        self.append_many(history)
+        with open(marker, "w") as f:
+            f.write(str(len(history)))
+        logger.info(f"Interaction log: imported {len(history)} records from {os.path.basename(history_file)}")
+        return True
@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: no other worker processes to exclude
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapeLeases:
+    """Time-limited claims on scrape keys, shared by all worker processes.
+
+    gunicorn workers each run their own agent, so ``SingleFlight`` only
+    coalesces scrapes within one process. Before scraping a query a worker
+    ``acquire``s its lease in a SQLite table next to the shared cache; a
+    worker that finds it taken ``wait``s for the holder to ``release`` it
+    and then reads the cache instead of scraping again. A lease expires
+    after ``ttl`` seconds, so a worker that dies mid-scrape blocks the key
+    for at most that long.
+
+    ``acquire``, ``release`` and ``held`` block on SQLite (up to its busy
+    timeout); async callers run them in an executor.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS leases (
+            key      TEXT PRIMARY KEY,
+            owner    TEXT NOT NULL,
+            expires  REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path, ttl=30.0, poll=0.1):
+        self.path = path
+        self.ttl = ttl
+        self.poll = poll
+        self.owner = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.acquired = 0
+        self.contended = 0
+        self.taken_over = 0
+        self.wait_timeouts = 0
+        self.wait_seconds = 0.0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().executescript(self.SCHEMA)
+
+    @classmethod
+    def from_env(cls, path):
+        return cls(path, ttl=float(os.getenv("SCRAPE_LEASE_SECONDS", "30")))
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def acquire(self, key, now=None):
+        """Claim ``key``; False if another holder's lease is still live."""
+        now = time.time() if now is None else now
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT expires FROM leases WHERE key = ?", (key,)).fetchone()
+            if row is not None and row["expires"] > now:
+                conn.execute("COMMIT")
+                self._count("contended")
+                return False
+            conn.execute("INSERT OR REPLACE INTO leases (key, owner, expires) VALUES (?, ?, ?)",
+                         (key, self.owner, now + self.ttl))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if row is not None:
+            logger.warning(f"Lease '{key}' expired without release; taking it over")
+            self._count("taken_over")
+        self._count("acquired")
+        return True
+
+    def release(self, key):
+        """Give up ``key`` if this instance holds it (no-op otherwise)."""
+        self._conn().execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, self.owner))
+
+    def held(self, key, now=None):
+        now = time.time() if now is None else now
+        row = self._conn().execute("SELECT expires FROM leases WHERE key = ?", (key,)).fetchone()
+        return row is not None and row["expires"] > now
+
+    async def wait(self, key, timeout):
+        """Wait until ``key`` is released or expired; False on ``timeout``.
+
+        Each check runs in the loop's default executor: a busy database
+        must not stall the other tasks on the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            while await loop.run_in_executor(None, self.held, key):
+                if loop.time() - started >= timeout:
+                    self._count("wait_timeouts")
+                    return False
+                await asyncio.sleep(self.poll)
+            return True
+        finally:
+            self._count("wait_seconds", loop.time() - started)
+
+    def stats(self):
+        live = self._conn().execute("SELECT COUNT(*) FROM leases WHERE expires > ?", (time.time(),)).fetchone()[0]
+        with self._stats_lock:
+            return {
+                "acquired": self.acquired,
+                "contended": self.contended,
+                "taken_over": self.taken_over,
+                "wait_timeouts": self.wait_timeouts,
+                "wait_seconds": round(self.wait_seconds, 3),
+                "live": live,
+            }
+
+
+class FileLock:
+    """Exclusive lock shared by threads and processes (``flock`` on ``path``).
+
+    Use as a context manager. ``contended`` counts acquisitions that had to
+    wait for another holder, ``wait_seconds`` the total time spent waiting.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+        self.acquired = 0
+        self.contended = 0
+        self.wait_seconds = 0.0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def __enter__(self):
+        started = time.perf_counter()
+        contended = not self._lock.acquire(blocking=False)
+        if contended:
+            self._lock.acquire()
+        try:
+            if fcntl is not None:
+                if self._file is None:
+                    self._file = open(self.path, "a")
+                try:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    contended = True
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        except BaseException:
+            self._lock.release()
+            raise
+        self.acquired += 1
+        if contended:
+            self.contended += 1
+            self.wait_seconds += time.perf_counter() - started
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._lock.release()
+
+    def stats(self):
+        return {
+            "acquired": self.acquired,
+            "contended": self.contended,
+            "wait_seconds": round(self.wait_seconds, 3),
+        }
@@ -0,0 +1,528 @@
+import datetime
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import threading
+from array import array
+
+logger = logging.getLogger(__name__)
+
+# Rolling aggregates kept per item (see ``rolling_state``)
+WINDOW = 30
+EMA_SPAN = 7
+ROLLING_FIELDS = ("length", "last_price", "prev_price", "win_sum", "win_xy", "ema")
+
+
+def _to_ordinal(day):
+    if isinstance(day, int):
+        return day
+    if isinstance(day, str):
+        day = datetime.date.fromisoformat(day[:10])
+    return day.toordinal()
+
+
+def rolling_state(prices, window=WINDOW, span=EMA_SPAN):
+    """Aggregates of a whole series, as maintained incrementally on append.
+
+    ``win_sum`` / ``win_xy`` are the sums of ``price`` and ``index * price``
+    over the last ``window`` points (index = position in the series), which
+    is all a rolling mean and least-squares slope need.
+    """
+    n = len(prices)
+    alpha = 2.0 / (span + 1)
+    ema = 0.0
+    for i, price in enumerate(prices):
+        ema = price if i == 0 else alpha * price + (1 - alpha) * ema
+    lo = max(0, n - window)
+    return {
+        "length": n,
+        "last_price": prices[-1] if n else 0.0,
+        "prev_price": prices[-2] if n > 1 else 0.0,
+        "win_sum": float(sum(prices[lo:])),
+        "win_xy": float(sum(i * prices[i] for i in range(lo, n))),
+        "ema": ema,
+    }
+
+
+def advance_state(state, price, dropped=None, window=WINDOW, span=EMA_SPAN):
+    """Fold one appended ``price`` into ``state``; ``dropped`` is the price leaving the window."""
+    i = state["length"]
+    if dropped is not None:
+        state["win_sum"] -= dropped
+        state["win_xy"] -= (i - window) * dropped
+    state["win_sum"] += price
+    state["win_xy"] += i * price
+    alpha = 2.0 / (span + 1)
+    state["ema"] = price if i == 0 else alpha * price + (1 - alpha) * state["ema"]
+    state["prev_price"], state["last_price"] = state["last_price"], price
+    state["length"] = i + 1
+    return state
+
+
+class JSONPriceStore:
+    """The original layout: every tracked item in one JSON document.
+
+    Each call reloads (and each write rewrites) the whole file; kept for
+    ``PRICE_STORE=json`` and as the import/export format.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        if not os.path.exists(self.path):
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._save({"tracked_items": {}})
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except Exception:
+            return {"tracked_items": {}}
+
+    def _save(self, data):
+        with open(self.path, 'w') as f:
+            json.dump(data, f, indent=2)
+
+    def append(self, url, day, price, title="", currency="", source=""):
+        """Add one point; False if the item already has a point for ``day`` or later."""
+        return self.append_many([(url, day, price, title, currency, source)]) == 1
+
+    def append_many(self, points):
+        """Add ``(url, day, price, title, currency, source)`` points with one load and one save."""
+        added = 0
+        with self._lock:
+            data = self._load()
+            for url, day, price, *meta in points:
+                title, currency, source = (list(meta) + ["", "", ""])[:3]
+                day = datetime.date.fromordinal(_to_ordinal(day)).isoformat()
+                item = data['tracked_items'].setdefault(url, {
+                    "title": title, "url": url, "currency": currency, "source": source or "", "history": [],
+                })
+                history = item['history']
+                if history and history[-1]['date'] >= day:
+                    continue
+                history.append({"date": day, "price": price})
+                added += 1
+            if added:
+                self._save(data)
+        return added
+
+    def prices(self, url, last=None):
+        item = self._load()['tracked_items'].get(url)
+        if not item:
+            return array('d')
+        history = item['history'][-last:] if last else item['history']
+        return array('d', (p['price'] for p in history))
+
+    def get(self, url):
+        return self._load()['tracked_items'].get(url)
+
+    def rolling_stats(self, urls):
+        """``{url: rolling_state}`` computed from each full history (one load)."""
+        tracked = self._load()['tracked_items']
+        return {
+            url: rolling_state([p['price'] for p in tracked[url]['history']])
+            for url in urls if url in tracked
+        }
+
+    def items(self):
+        for url, info in self._load()['tracked_items'].items():
+            yield url, {k: info.get(k, "") for k in ("title", "currency", "source")}
+
+    def export_json(self):
+        return self._load()
+
+    def __len__(self):
+        return len(self._load()['tracked_items'])
+
+
+class _Column:
+    """A memory-mapped file of fixed-width values (``array`` typecode).
+
+    Growing the file swaps in a new, larger map. Maps are replaced by
+    reference and the old ones stay open until ``close``, so a thread
+    still reading from one never sees it closed; both map the same file,
+    so writes through either are visible in both.
+    """
+
+    def __init__(self, path, typecode):
+        self.path = path
+        self.typecode = typecode
+        self.itemsize = array(typecode).itemsize
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, 'wb') as f:
+                f.truncate(4096 * self.itemsize)
+        self._file = open(path, 'r+b')
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._retired = []
+        self._remap_lock = threading.Lock()
+
+    @property
+    def capacity(self):
+        return len(self._map) // self.itemsize
+
+    def _remap(self):
+        with self._remap_lock:
+            current = self._map
+            new = mmap.mmap(self._file.fileno(), 0)
+            if len(new) <= len(current):
+                new.close()
+                return current
+            self._retired.append(current)
+            self._map = new
+            return new
+
+    def ensure(self, slots):
+        """Grow the file (geometrically) to hold at least ``slots`` values."""
+        if slots <= self.capacity:
+            return
+        size = os.fstat(self._file.fileno()).st_size // self.itemsize
+        if size < slots:
+            size = max(slots, size * 2)
+            self._file.truncate(size * self.itemsize)
+        self._remap()
+
+    def _map_for(self, index, count):
+        mapped = self._map
+        if (index + count) * self.itemsize > len(mapped):
+            mapped = self._remap()  # grown by another thread or process
+        return mapped
+
+    def write(self, index, values):
+        data = array(self.typecode, values).tobytes()
+        start = index * self.itemsize
+        self._map_for(index, len(values))[start:start + len(data)] = data
+
+    def read(self, index, count):
+        start = index * self.itemsize
+        return array(self.typecode, self._map_for(index, count)[start:start + count * self.itemsize])
+
+    def flush(self):
+        self._map.flush()
+
+    def close(self):
+        for mapped in self._retired + [self._map]:
+            mapped.close()
+        self._retired = []
+        self._file.close()
+
+
+class ColumnarPriceStore:
+    """Price history as two memory-mapped columns plus a SQLite index.
+
+    ``dates.i32`` holds day ordinals and ``prices.f64`` the prices. Each
+    item owns a contiguous block of slots in both columns; a full block
+    moves to a new one of twice the capacity at the end of the files.
+    ``index.sqlite3`` maps url -> title, currency, source and the block's
+    start, capacity and length, so reading one item's series is an
+    indexed lookup plus two slice copies: no other item is touched.
+    The index also carries each item's rolling aggregates (see
+    ``rolling_state``), updated in O(1) per appended point, so forecasts
+    need no series reads at all.
+
+    Appends are serialized with ``BEGIN IMMEDIATE``, which also covers
+    other processes sharing the directory.
+    """
+
+    INITIAL_CAPACITY = 8
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS items (
+            url       TEXT PRIMARY KEY,
+            title     TEXT NOT NULL DEFAULT '',
+            currency  TEXT NOT NULL DEFAULT '',
+            source    TEXT NOT NULL DEFAULT '',
+            start     INTEGER NOT NULL,
+            capacity  INTEGER NOT NULL,
+            length    INTEGER NOT NULL DEFAULT 0,
+            last_day  INTEGER NOT NULL DEFAULT 0,
+            last_price REAL NOT NULL DEFAULT 0,
+            prev_price REAL NOT NULL DEFAULT 0,
+            win_sum    REAL NOT NULL DEFAULT 0,
+            win_xy     REAL NOT NULL DEFAULT 0,
+            ema        REAL NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key    TEXT PRIMARY KEY,
+            value  TEXT
+        );
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.db_path = os.path.join(directory, 'index.sqlite3')
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.dates = _Column(os.path.join(directory, 'dates.i32'), 'i')
+        self.prices_column = _Column(os.path.join(directory, 'prices.f64'), 'd')
+        with self._conn() as conn:
+            conn.executescript(self.SCHEMA)
+        self._upgrade()
+
+    def _upgrade(self):
+        """Add the rolling-aggregate columns to stores created before them."""
+        conn = self._conn()
+        columns = {r["name"] for r in conn.execute("PRAGMA table_info(items)")}
+        missing = [c for c in ROLLING_FIELDS[1:] if c not in columns]
+        if not missing:
+            return
+        for column in missing:
+            conn.execute(f"ALTER TABLE items ADD COLUMN {column} REAL NOT NULL DEFAULT 0")
+        rows = conn.execute("SELECT url, start, length FROM items").fetchall()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(
+            "UPDATE items SET last_price = ?, prev_price = ?, win_sum = ?, win_xy = ?, ema = ? WHERE url = ?",
+            [
+                (*self._state_values(rolling_state(self.prices_column.read(r["start"], r["length"]))), r["url"])
+                for r in rows
+            ],
+        )
+        conn.execute("COMMIT")
+        logger.info(f"Price store: computed rolling aggregates for {len(rows)} items")
+
+    @staticmethod
+    def _state_values(state):
+        return tuple(state[f] for f in ROLLING_FIELDS[1:])
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _meta(self, conn, key, default=None):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else default
+
+    def _allocate(self, conn, slots):
+        """Reserve ``slots`` contiguous slots at the end of both columns."""
+        start = int(self._meta(conn, "allocated", 0))
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('allocated', ?)", (str(start + slots),))
+        self.dates.ensure(start + slots)
+        self.prices_column.ensure(start + slots)
+        return start
+
+    def append(self, url, day, price, title="", currency="", source=""):
+        """Add one point; False if the item already has a point for ``day`` or later."""
+        return self.append_many([(url, day, price, title, currency, source)]) == 1
+
+    def append_many(self, points):
+        """Add ``(url, day, price, title, currency, source)`` points in one transaction.
+
+        Points for a day an item already has (or an earlier one) are
+        skipped; returns the number added.
+        """
+        points = [(p[0], _to_ordinal(p[1]), float(p[2])) + tuple(p[3:6]) for p in points]
+        if not points:
+            return 0
+        with self._lock:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                blocks = {}
+                urls = list({p[0] for p in points})
+                for i in range(0, len(urls), 500):
+                    chunk = urls[i:i + 500]
+                    rows = conn.execute(
+                        "SELECT url, start, capacity, last_day, " + ", ".join(ROLLING_FIELDS)
+                        + f" FROM items WHERE url IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    )
+                    for row in rows:
+                        blocks[row["url"]] = dict(row)
+                new_items, added = [], 0
+                for url, day, price, *meta in points:
+                    block = blocks.get(url)
+                    if block is None:
+                        start = self._allocate(conn, self.INITIAL_CAPACITY)
+                        block = blocks[url] = {"start": start, "capacity": self.INITIAL_CAPACITY, "last_day": 0, **rolling_state([])}
+                        title, currency, source = (list(meta) + ["", "", ""])[:3]
+                        new_items.append((url, title or "", currency or "", source or ""))
+                    length = block["length"]
+                    if length and day <= block["last_day"]:
+                        # Series are strictly increasing by day
+                        continue
+                    if length == block["capacity"]:
+                        new_start = self._allocate(conn, block["capacity"] * 2)
+                        self.dates.write(new_start, self.dates.read(block["start"], length))
+                        self.prices_column.write(new_start, self.prices_column.read(block["start"], length))
+                        block["start"], block["capacity"] = new_start, block["capacity"] * 2
+                    dropped = self.prices_column.read(block["start"] + length - WINDOW, 1)[0] if length >= WINDOW else None
+                    self.dates.write(block["start"] + length, [day])
+                    self.prices_column.write(block["start"] + length, [price])
+                    advance_state(block, price, dropped)
+                    block["last_day"] = day
+                    added += 1
+                conn.executemany(
+                    "INSERT INTO items (url, title, currency, source, start, capacity) VALUES (?, ?, ?, ?, 0, 0)",
+                    new_items,
+                )
+                conn.executemany(
+                    "UPDATE items SET start = ?, capacity = ?, length = ?, last_day = ?, "
+                    "last_price = ?, prev_price = ?, win_sum = ?, win_xy = ?, ema = ? WHERE url = ?",
+                    [
+                        (b["start"], b["capacity"], b["length"], b["last_day"], *self._state_values(b), url)
+                        for url, b in blocks.items()
+                    ],
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return added
+
+    def _block(self, url):
+        return self._conn().execute("SELECT start, length FROM items WHERE url = ?", (url,)).fetchone()
+
+    def prices(self, url, last=None):
+        """The item's prices, oldest first; ``last`` limits the read to the tail."""
+        row = self._block(url)
+        if row is None:
+            return array('d')
+        count = min(last, row["length"]) if last else row["length"]
+        return self.prices_column.read(row["start"] + row["length"] - count, count)
+
+    def series(self, url):
+        """``(day ordinals, prices)`` for one item."""
+        row = self._block(url)
+        if row is None:
+            return array('i'), array('d')
+        return self.dates.read(row["start"], row["length"]), self.prices_column.read(row["start"], row["length"])
+
+    def rolling_stats(self, urls):
+        """``{url: rolling_state}`` straight from the index: no series are read."""
+        stats = {}
+        urls = list(urls)
+        for i in range(0, len(urls), 500):
+            chunk = urls[i:i + 500]
+            rows = self._conn().execute(
+                "SELECT url, " + ", ".join(ROLLING_FIELDS) + f" FROM items WHERE url IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for row in rows:
+                stats[row["url"]] = {f: row[f] for f in ROLLING_FIELDS}
+        return stats
+
+    def get(self, url):
+        """One item in the legacy JSON shape, or None."""
+        row = self._conn().execute(
+            "SELECT url, title, currency, source FROM items WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        dates, prices = self.series(url)
+        item = dict(row)
+        item["history"] = [
+            {"date": datetime.date.fromordinal(d).isoformat(), "price": p} for d, p in zip(dates, prices)
+        ]
+        return item
+
+    def items(self):
+        rows = self._conn().execute("SELECT url, title, currency, source FROM items").fetchall()
+        for row in rows:
+            yield row["url"], {"title": row["title"], "currency": row["currency"], "source": row["source"]}
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def import_json(self, data):
+        """Bulk-load ``{"tracked_items": {...}}``; items already present are skipped."""
+        tracked = (data or {}).get("tracked_items", {})
+        imported = 0
+        with self._lock:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                existing = {r[0] for r in conn.execute("SELECT url FROM items")}
+                new = [(url, info) for url, info in tracked.items() if url not in existing]
+                points = {}
+                for url, info in new:
+                    by_day = {}
+                    for point in info.get("history", []):
+                        try:
+                            by_day[_to_ordinal(point["date"])] = float(point["price"])
+                        except (KeyError, TypeError, ValueError):
+                            continue
+                    points[url] = sorted(by_day.items())
+                total = sum(max(self.INITIAL_CAPACITY, len(p)) for p in points.values())
+                cursor = self._allocate(conn, total)
+                rows, dates, prices = [], array('i'), array('d')
+                for url, info in new:
+                    series = points[url]
+                    capacity = max(self.INITIAL_CAPACITY, len(series))
+                    state = rolling_state([p for _, p in series])
+                    rows.append((
+                        url, info.get("title") or "", info.get("currency") or "", info.get("source") or "",
+                        cursor, capacity, len(series), series[-1][0] if series else 0, *self._state_values(state),
+                    ))
+                    dates.extend(d for d, _ in series)
+                    prices.extend(p for _, p in series)
+                    dates.extend([0] * (capacity - len(series)))
+                    prices.extend([0.0] * (capacity - len(series)))
+                    cursor += capacity
+                start = cursor - total
+                self.dates.write(start, dates)
+                self.prices_column.write(start, prices)
+                conn.executemany(
+                    "INSERT INTO items (url, title, currency, source, start, capacity, length, last_day, "
+                    "last_price, prev_price, win_sum, win_xy, ema) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                conn.execute("COMMIT")
+                imported = len(rows)
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        self.flush()
+        return imported
+
+    def import_json_file(self, path):
+        """One-shot import of the legacy ``price_history.json``; a no-op once done."""
+        conn = self._conn()
+        if self._meta(conn, "json_imported") or not os.path.exists(path):
+            return 0
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"Price store: could not read {path}: {e}")
+            return 0
+        imported = self.import_json(data)
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_imported', '1')")
+        logger.info(f"Price store: imported {imported} items from {os.path.basename(path)}")
+        return imported
+
+    def export_json(self):
+        """Everything in the legacy ``{"tracked_items": {...}}`` shape."""
+        return {"tracked_items": {url: self.get(url) for url, _ in self.items()}}
+
+    def stats(self):
+        conn = self._conn()
+        row = conn.execute("SELECT COUNT(*), COALESCE(SUM(length), 0), COALESCE(SUM(capacity), 0) FROM items").fetchone()
+        allocated = int(self._meta(conn, "allocated", 0))
+        return {
+            "items": row[0],
+            "points": row[1],
+            "reserved_slots": row[2],
+            "allocated_slots": allocated,
+            "file_bytes": os.path.getsize(self.dates.path) + os.path.getsize(self.prices_column.path),
+        }
+
+    def flush(self):
+        self.dates.flush()
+        self.prices_column.flush()
+
+    def close(self):
+        self.flush()
+        self.dates.close()
+        self.prices_column.close()
+
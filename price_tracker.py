@@ -3,7 +3,16 @@ import os
 import datetime
 import logging
 import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+import forecast
+from dedup import ProductClusters
+from leases import FileLock
 from price_history_provider import PriceHistoryProvider
+from price_store import ColumnarPriceStore, JSONPriceStore
+from ranking import FxRates
+from rescan_scheduler import RescanScheduler
+from scrapers.query_normalizer import canonicalize
 # We import scrapers dynamically or pass them in to avoid circular imports if possible, 
 # or just import here if structure allows.
 # For simplicity in this project structure, we will rely on external injection or lazy import.
@@ -11,7 +20,29 @@ from price_history_provider import PriceHistoryProvider
 logger = logging.getLogger(__name__)
 
 class PriceTracker:
-    def __init__(self, data_file_path=None, external_provider=None):
+    """
+    Daily price history per tracked item, keyed by product URL.
+
+    ``PRICE_STORE`` picks the storage: ``columnar`` (default, memory-mapped
+    arrays in ``price_store/`` next to the JSON file, which is imported on
+    first use) or ``json`` (the original single ``price_history.json``).
+
+    With ``PRICE_TRACK_BACKGROUND=true`` batched writes (``track_many``)
+    run on one writer thread instead of the caller's.
+
+    ``scheduler`` (a ``RescanScheduler``, by default
+    ``scan_schedule.sqlite3`` next to the JSON file) decides which items
+    ``scan_all`` refreshes on a given run.
+
+    Every tracked URL is linked into a product cluster
+    (``dedup.ProductClusters``, ``product_clusters.sqlite3``), so the
+    same product tracked under several URLs can be found together.
+
+    Writes hold ``write_lock`` (a ``FileLock`` on ``price_tracker.lock``),
+    so several gunicorn workers and ``run_tracker.py`` sharing one
+    directory take turns instead of overwriting each other's updates.
+    """
+    def __init__(self, data_file_path=None, external_provider=None, store=None, scheduler=None):
         if data_file_path is None:
             base = os.getenv("STORAGE_PATH") or os.path.join(os.getcwd(), 'data')
             self.data_file_path = os.path.join(base, 'price_history.json')
@@ -19,150 +50,346 @@ class PriceTracker:
             self.data_file_path = data_file_path
             
         self.external_provider = external_provider
-            
-        self._ensure_file()
-
-    def _ensure_file(self):
-        if not os.path.exists(self.data_file_path):
-            directory = os.path.dirname(self.data_file_path)
-            if not os.path.exists(directory):
-                os.makedirs(directory)
-            with open(self.data_file_path, 'w') as f:
-                json.dump({"tracked_items": {}}, f, indent=2)
-
-    def _load(self):
-        try:
-            with open(self.data_file_path, 'r') as f:
-                return json.load(f)
-        except: return {"tracked_items": {}}
+        self.store = store if store is not None else self._open_store()
+        self.scheduler = scheduler if scheduler is not None else RescanScheduler.from_env(
+            os.path.join(os.path.dirname(os.path.abspath(self.data_file_path)), 'scan_schedule.sqlite3')
+        )
+        self.clusters = ProductClusters(
+            os.path.join(os.path.dirname(os.path.abspath(self.data_file_path)), 'product_clusters.sqlite3')
+        )
+        self.fx = FxRates.from_env()
+        self.write_lock = FileLock(
+            os.path.join(os.path.dirname(os.path.abspath(self.data_file_path)), 'price_tracker.lock')
+        )
+        self.write_in_background = os.getenv("PRICE_TRACK_BACKGROUND", "false").lower() == "true"
+        self._writer = None
+        self.last_scan = {}
 
-    def _save(self, data):
-        with open(self.data_file_path, 'w') as f:
-            json.dump(data, f, indent=2)
+    def _open_store(self):
+        kind = os.getenv("PRICE_STORE", "columnar").lower()
+        if kind == "json":
+            return JSONPriceStore(self.data_file_path)
+        if kind == "columnar":
+            directory = os.path.join(os.path.dirname(os.path.abspath(self.data_file_path)), 'price_store')
+            store = ColumnarPriceStore(directory)
+            store.import_json_file(self.data_file_path)
+            return store
+        raise ValueError(f"Unknown PRICE_STORE '{kind}' (expected 'columnar' or 'json')")
 
     def track_item(self, sku, url, title, current_price, currency, source=None):
         """Register an item for tracking and log price point."""
         if current_price <= 0: return # Don't track invalid prices
 
-        data = self._load()
-        today = datetime.date.today().isoformat()
-        
-        # Unique ID: Use URL as stable ID
-        item_id = url 
-        
-        if item_id not in data['tracked_items']:
-            data['tracked_items'][item_id] = {
-                "title": title,
-                "url": url,
-                "currency": currency,
-                "source": source if source else "",
-                "history": []
-            }
-            
-        history = data['tracked_items'][item_id]['history']
-        
-        # Add history point if tracking for the first time today
-        if not history or history[-1]['date'] != today:
-            history.append({
-                "date": today,
-                "price": current_price
-            })
-            # Keep history clean: maybe limit to 365 days? 
-            # For college project, unlimited is fine.
-            
-        self._save(data)
+        # Unique ID: Use URL as stable ID; one history point per day
+        self._write_points([(url, datetime.date.today(), current_price, title, currency, source or "")])
+
+    def track_many(self, items, background=None):
+        """
+        Log today's price for many items in one store transaction.
+
+        ``items`` are dicts with url/title/price/currency/source (the shape
+        scrapers return). Items without a URL, with a price <= 0 or marked
+        ``fallback`` (demo items) are skipped. Returns the number of points added, or a Future of it
+        when the write runs in the background.
+        """
+        today = datetime.date.today()
+        points = [
+            (p['url'], today, p['price'], p.get('title', ''), p.get('currency', 'USD'), p.get('source') or "")
+            for p in items
+            if p.get('url') and p['url'] != "#" and (p.get('price') or 0) > 0 and not p.get('fallback')
+        ]
+        if background is None:
+            background = self.write_in_background
+        if background:
+            if self._writer is None:
+                # One writer keeps batches in order and off the request path
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="price-writer")
+            return self._writer.submit(self._write_points, points)
+        return self._write_points(points)
+
+    def _write_points(self, points):
+        with self.write_lock:
+            try:
+                added = self.store.append_many(points)
+            except Exception as e:
+                logger.error(f"PriceTracker: batch of {len(points)} points failed: {e}")
+                return 0
+            self._link_clusters(points)
+        return added
+
+    def _link_clusters(self, points):
+        """Put URLs seen for the first time into their product cluster."""
+        if not points:
+            return
+        try:
+            # Prices are compared in the rate table's base currency
+            prices = self.fx.convert([p[2] for p in points], [p[4] for p in points], self.fx.base)
+            self.clusters.assign(
+                (url, title, price if price == price else None)
+                for (url, _, _, title, _, _), price in zip(points, prices.tolist())
+            )
+        except Exception as e:
+            logger.error(f"PriceTracker: clustering {len(points)} items failed: {e}")
+
+    def cluster_members(self, url):
+        """Tracked URLs of the same product as ``url`` (including ``url``)."""
+        return self.clusters.members(url)
+
+    def flush(self):
+        """Wait for background writes to finish."""
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+
+    def note_interest(self, urls):
+        """Items shown to a user get rechecked sooner by ``scan_all``."""
+        try:
+            self.scheduler.note_interest(urls)
+        except Exception as e:
+            logger.error(f"PriceTracker: could not record interest: {e}")
+
+    def export_json(self, path=None):
+        """Write the whole history in the legacy ``price_history.json`` format."""
+        path = path or self.data_file_path
+        tmp = path + ".tmp"
+        data = self.store.export_json()
+        # Link duplicates: every item names its product cluster
+        clusters = self.clusters.clusters_of(data['tracked_items'].keys())
+        for url, item in data['tracked_items'].items():
+            item['cluster'] = clusters.get(url, url)
+        with open(tmp, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, path)
+        return path
 
     def get_forecast(self, url):
         """
         Analyze long-term trends (up to 30 days).
         Returns advice string.
         """
+        return self.get_forecasts([url])[0]
+
+    def get_forecasts(self, urls):
+        """
+        Advice strings for many items in one batch.
+
+        Rolling aggregates for all items come from one store call and the
+        rules (short-term move, then 30-point average) are evaluated as
+        array operations, see ``forecast.advice``.
+        """
+        results = [None] * len(urls)
         # Prefer external history provider if it has advice
+        if self.external_provider:
+            for i, url in enumerate(urls):
+                try:
+                    results[i] = self.external_provider.get_advice(url) or None
+                except Exception:
+                    pass
+
+        pending = [i for i, r in enumerate(results) if r is None]
+        if pending:
+            states = self.store.rolling_stats([urls[i] for i in pending])
+            texts = forecast.advice(forecast.compute_signals([states.get(urls[i]) for i in pending]))
+            for i, text in zip(pending, texts):
+                results[i] = text
+        return results
+
+    def get_signals(self, urls):
+        """Raw trend signals (delta, rolling mean, EMA, slope) per URL."""
+        urls = list(urls)
+        states = self.store.rolling_stats(urls)
+        signals = forecast.compute_signals([states.get(url) for url in urls])
+        return [{name: values[i].item() for name, values in signals.items()} for i in range(len(urls))]
+
+    def _scan_groups(self, scrapers_map):
+        """Tracked items grouped into one lookup each.
+
+        Real product URLs (the scraper's ``is_product_url``) are their own
+        group, refreshed from the product page. Other items (demo IDs) are
+        grouped by (source, canonical title) and refreshed by one search.
+        """
+        groups = {}
+        for url, info in self.store.items():
+            # Identify source
+            source = None
+            if "amazon" in url: source = "Amazon"
+            elif "flipkart" in url: source = "Flipkart"
+            elif "ebay" in url: source = "eBay"
+            # Fallback to stored source if URL does not contain hints (e.g., synthetic IDs)
+            if source not in scrapers_map:
+                source = (info or {}).get("source", "")
+            if source not in scrapers_map or not info.get('title'):
+                continue
+            is_product_url = getattr(scrapers_map[source], "is_product_url", None)
+            if is_product_url and is_product_url(url):
+                groups[(source, url)] = {"title": info['title'], "urls": [url], "product_url": url}
+                continue
+            key = (source, canonicalize(info['title']))
+            group = groups.setdefault(key, {"title": info['title'], "urls": []})
+            group["urls"].append(url)
+        return groups
+
+    def _load_checkpoint(self, path):
+        """Group keys already scanned today by an interrupted run."""
         try:
-            if self.external_provider:
-                external = self.external_provider.get_advice(url)
-                if external:
-                    return external
-        except Exception:
-            pass
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return set()
+        if data.get("day") != datetime.date.today().isoformat():
+            return set()
+        return {tuple(k) for k in data.get("done", [])}
 
-        data = self._load()
-        item = data['tracked_items'].get(url)
-        if not item or len(item['history']) < 2:
-            return "🆕 New Item: collecting data..."
-            
-        history = item['history']
-        latest_price = history[-1]['price']
-        
-        # 1. Check Short Term (Yesterday vs Today)
-        prev_price = history[-2]['price']
-        if latest_price < prev_price:
-            drop_pct = ((prev_price - latest_price) / prev_price) * 100
-            if drop_pct > 20:
-                return f"🔥 FIRE DEAL: Dropped {drop_pct:.1f}%!"
-            return f"📉 Price Drop: Down {drop_pct:.1f}% (Buy Now)"
-            
-        if latest_price > prev_price:
-            return "📈 Price Rising: Wait (Was cheaper recently)"
-            
-        # 2. Check Long Term (30 Day Avg)
-        # Get prices from last 30 entries
-        prices = [p['price'] for p in history[-30:]]
-        avg_price = sum(prices) / len(prices)
-        
-        if latest_price < avg_price * 0.95: # 5% below average
-            return f"✅ Good Deal: 5% below monthly average."
-            
-        return "➡️ Price Stable: Monitor for drops."
+    def _save_checkpoint(self, path, done):
+        tmp = path + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump({"day": datetime.date.today().isoformat(), "done": sorted(done)}, f)
+        os.replace(tmp, path)
 
-    async def scan_all(self, scrapers_map):
+    async def scan_all(self, scrapers_map, concurrency=None, checkpoint_path=None, checkpoint_every=None, budget=None):
         """
-        Background Task: Re-scrapes all tracked items to update their history.
+        Background Task: Re-scrapes tracked items that are due to update their history.
         scrapers_map: Dict of {Source: ScraperInstance}
+
+        Items with a real product URL are refreshed from their product page
+        (``fetch_product``); items sharing a source and canonical title
+        are refreshed by one search. Only groups with an item the scheduler marks due are
+        searched, most overdue first, at most ``budget`` searches per run
+        (``SCAN_REQUEST_BUDGET``, 0 for no limit). At most ``concurrency``
+        searches per source run at once (``SCAN_CONCURRENCY_PER_SOURCE``).
+        Prices are written in batches of ``checkpoint_every`` groups, each
+        followed by a checkpoint, so a run interrupted the same day resumes
+        with the groups still left.
+        Returns the number of items updated; ``last_scan`` holds the stats.
         """
-        data = self._load()
-        items = data.get('tracked_items', {})
-        logger.info(f"PriceTracker: Scanning {len(items)} items...")
-        
-        updates = 0
-        tasks = []
-        
-        for url, info in items.items():
-            # Identify source
-            scraper = None
-            if "amazon" in url: scraper = scrapers_map.get("Amazon")
-            elif "flipkart" in url: scraper = scrapers_map.get("Flipkart")
-            elif "ebay" in url: scraper = scrapers_map.get("eBay")
-            # Fallback to stored source if URL does not contain hints (e.g., synthetic IDs)
-            if not scraper:
-                src = (info or {}).get("source", "")
-                if src in scrapers_map:
-                    scraper = scrapers_map.get(src)
-            
-            if scraper:
-                # We need a scraper method that takes a direct URL, or we search by Title as fallback?
-                # Most scrapers built so far are 'Search' based. 
-                # Ideally we need `scrape_product_page(url)`.
-                # For this project, to avoid complexity, we key off the 'Title' and re-search.
-                # (Re-searching is safer as page parsing validation is hard).
-                tasks.append(self._update_item_by_search(scraper, info['title'], url))
-                
-        if tasks:
-            results = await asyncio.gather(*tasks)
-            updates = sum(results)
-            
+        started = time.monotonic()
+        concurrency = concurrency or int(os.getenv("SCAN_CONCURRENCY_PER_SOURCE", "2"))
+        checkpoint_every = checkpoint_every or int(os.getenv("SCAN_CHECKPOINT_EVERY", "25"))
+        budget = int(os.getenv("SCAN_REQUEST_BUDGET", "500")) if budget is None else budget
+        checkpoint_path = checkpoint_path or os.path.join(
+            os.path.dirname(os.path.abspath(self.data_file_path)), 'scan_checkpoint.json'
+        )
+
+        groups = self._scan_groups(scrapers_map)
+        done = self._load_checkpoint(checkpoint_path)
+        due_at = self.scheduler.due_times([url for group in groups.values() for url in group['urls']])
+        now = time.time()
+        ranked = sorted(
+            (min(due_at[url] for url in group['urls']), key)
+            for key, group in groups.items() if key not in done
+        )
+        due_keys = [key for due, key in ranked if self.scheduler.is_due(due, now)]
+        pending = {key: groups[key] for key in (due_keys[:budget] if budget > 0 else due_keys)}
+        skipped = sum(1 for key in groups if key in done)
+        logger.info(
+            f"PriceTracker: {sum(len(g['urls']) for g in groups.values())} items in {len(groups)} groups, "
+            f"{len(due_keys)} due, searching {len(pending)}"
+            + (f" ({skipped} already done today)" if skipped else "")
+        )
+
+        semaphores = {source: asyncio.Semaphore(concurrency) for source, _ in pending}
+
+        async def refresh(key, group):
+            async with semaphores[key[0]]:
+                if group.get('product_url'):
+                    return key, await self._update_item_by_product_page(scrapers_map[key[0]], group)
+                return key, await self._update_group_by_search(scrapers_map[key[0]], group['title'], group['urls'])
+
+        updates, scanned = 0, 0
+        batch, batch_keys = [], []
+
+        def flush():
+            # Store, scheduler and checkpoint I/O; runs on a worker thread
+            nonlocal updates
+            if batch_keys:
+                urls = [url for key in batch_keys for url in pending[key]['urls']]
+                before = self.store.rolling_stats(urls)
+                updates += self.track_many(batch, background=False)
+                found = {p['url']: p['price'] for p in batch}
+                self.scheduler.record_checks(
+                    (url, (before.get(url) or {}).get("last_price"), found.get(url)) for url in urls
+                )
+                done.update(batch_keys)
+                self._save_checkpoint(checkpoint_path, done)
+                batch.clear()
+                batch_keys.clear()
+
+        loop = asyncio.get_running_loop()
+        for next_done in asyncio.as_completed([refresh(k, g) for k, g in pending.items()]):
+            key, points = await next_done
+            scanned += len(pending[key]['urls'])
+            batch.extend(points)
+            batch_keys.append(key)
+            if len(batch_keys) >= checkpoint_every:
+                await loop.run_in_executor(None, flush)
+        await loop.run_in_executor(None, flush)
+
+        # Completed: the next run starts from scratch
+        try:
+            os.remove(checkpoint_path)
+        except FileNotFoundError:
+            pass
+
+        elapsed = time.monotonic() - started
+        self.last_scan = {
+            "items": scanned,
+            "searches": sum(1 for g in pending.values() if not g.get('product_url')),
+            "product_pages": sum(1 for g in pending.values() if g.get('product_url')),
+            "skipped_groups": skipped,
+            "due_groups": len(due_keys),
+            "deferred_groups": len(due_keys) - len(pending),
+            "not_due_groups": len(ranked) - len(due_keys),
+            "updated": updates,
+            "seconds": round(elapsed, 3),
+            "items_per_sec": round(scanned / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+        logger.info(
+            f"PriceTracker: {scanned} items via {self.last_scan['searches']} searches and "
+            f"{self.last_scan['product_pages']} product pages in {elapsed:.1f}s "
+            f"({self.last_scan['items_per_sec']} items/s), {updates} updated, "
+            f"{self.last_scan['deferred_groups']} due groups deferred by the budget"
+        )
         return updates
 
-    async def _update_item_by_search(self, scraper, title, origin_url):
+    async def _update_item_by_product_page(self, scraper, group):
+        """Price point from the item's own product page; none if unavailable or unreadable."""
+        url = group['product_url']
+        try:
+            item = await scraper.fetch_product(url)
+        except Exception as e:
+            logger.error(f"Failed product page update for {url}: {e}")
+            return []
+        if not item or not item.get('available') or (item.get('price') or 0) <= 0:
+            return []
+        return [{
+            "url": url,
+            "title": item.get('title') or group['title'],
+            "price": item['price'],
+            "currency": item['currency'],
+        }]
+
+    async def _update_group_by_search(self, scraper, title, origin_urls):
+        """Re-search ``title``; returns the price points to record for ``origin_urls``.
+
+        Each URL takes the result with the same URL if the search returned
+        it, else the top result. Demo items served while the source is
+        blocked (``fallback``) are not prices: they record nothing.
+        """
         try:
             # Re-search the title
-            results = await scraper.search(title)
-            # Find the matching item (heuristically matches URL or assume top result)
-            # Simple heuristic: Top result
+            results = [r for r in await scraper.search(title) if not r.get('fallback')]
             if results:
-                best = results[0]
-                self.track_item(None, origin_url, best['title'], best['price'], best['currency'])
-                return 1
+                by_url = {r.get('url'): r for r in results}
+                points = []
+                for url in origin_urls:
+                    best = by_url.get(url, results[0])
+                    points.append({
+                        "url": url,
+                        "title": best['title'],
+                        "price": best['price'],
+                        "currency": best['currency'],
+                    })
+                return points
         except Exception as e:
             logger.error(f"Failed update for {title}: {e}")
-        return 0
+        return []
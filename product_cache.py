@@ -0,0 +1,122 @@
+import datetime
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """Small thread-safe LRU map."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            return self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+def _entry_age_seconds(entry, now=None):
+    """Age from ``metadata.timestamp``; None if missing or unparsable."""
+    try:
+        ts = datetime.datetime.fromisoformat(entry["metadata"]["timestamp"])
+    except Exception:
+        return None
+    now = now or datetime.datetime.now()
+    return (now - ts).total_seconds()
+
+
+class TieredProductCache:
+    """In-memory LRU tier in front of the persistent ``StorageBackend`` tier.
+
+    Entries older than ``ttl_seconds`` (by their ``metadata.timestamp``)
+    are treated as misses and dropped. After each write the persistent
+    tier is trimmed, least recently used first, until it fits in
+    ``quota_bytes``.
+    """
+
+    def __init__(self, storage, ttl_seconds=6 * 3600, memory_entries=256, quota_bytes=100 * 1024 * 1024):
+        self.storage = storage
+        self.ttl_seconds = ttl_seconds
+        self.quota_bytes = quota_bytes
+        self.memory = LRUCache(memory_entries)
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def _count(self, counter, n=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + n)
+
+    def _fresh(self, entry):
+        age = _entry_age_seconds(entry)
+        return age is not None and age < self.ttl_seconds
+
+    def get(self, key):
+        entry = self.memory.get(key)
+        if entry is not None:
+            if self._fresh(entry):
+                self._count("memory_hits")
+                return entry
+            self.memory.pop(key)
+
+        entry = self.storage.get_cache_entry(key)
+        if entry is None:
+            self._count("misses")
+            return None
+        if not self._fresh(entry):
+            self._count("expired")
+            self._count("misses")
+            self.storage.delete_cache_entry(key)
+            return None
+        self._count("disk_hits")
+        self.storage.touch_cache_entry(key)
+        self.memory.put(key, entry)
+        return entry
+
+    def put(self, key, entry):
+        self.storage.put_cache_entry(key, entry)
+        self.memory.put(key, entry)
+        evicted = self.storage.evict_cache(self.quota_bytes)
+        if evicted:
+            for evicted_key in evicted:
+                self.memory.pop(evicted_key)
+            self._count("evictions", len(evicted))
+            logger.info(f"Product cache: evicted {len(evicted)} entries to stay under quota")
+
+    def stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "memory_entries": len(self.memory),
+            "bytes_used": self.storage.cache_bytes(),
+            "quota_bytes": self.quota_bytes,
+        }
@@ -0,0 +1,109 @@
+import json
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+GOOD_DEAL = "✅ Good Deal vs peers (low percentile)"
+HIGH_PRICE = "⏳ High Price vs peers (consider waiting)"
+FAIR_PRICE = "➡️ Fair Price vs peers"
+
+# Results at or below this score (unparsed prices) are dropped
+MIN_SCORE = 0.2
+
+
+class FxRates:
+    """Units of each currency per one unit of ``base``, from a local JSON file.
+
+    The file (``data/fx_rates.json`` by default) is a cached rate table:
+    ``{"base": "USD", "updated": "...", "rates": {"INR": 83.0, ...}}``.
+    Nothing is fetched at runtime.
+    """
+
+    def __init__(self, rates, base="USD", updated=None):
+        self.base = base
+        self.updated = updated
+        self.rates = {code.upper(): float(rate) for code, rate in rates.items() if rate and float(rate) > 0}
+        self.rates.setdefault(base, 1.0)
+
+    @classmethod
+    def from_env(cls):
+        return cls.from_file(os.getenv("FX_RATES_FILE") or os.path.join(os.getcwd(), 'data', 'fx_rates.json'))
+
+    @classmethod
+    def from_file(cls, path):
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"FX rates unavailable ({e}); only same-currency prices are comparable")
+            return cls({})
+        return cls(data.get("rates", {}), data.get("base", "USD"), data.get("updated"))
+
+    def factors(self, currencies, target):
+        """Multipliers into ``target`` per currency; NaN where a rate is missing."""
+        target_rate = self.rates.get(target.upper(), np.nan)
+        codes, inverse = np.unique(np.array([(c or "").upper() for c in currencies], dtype=object), return_inverse=True)
+        per_code = np.array([target_rate / self.rates.get(code, np.nan) for code in codes], dtype=np.float64)
+        return per_code[inverse] if len(codes) else np.empty(0)
+
+    def convert(self, amounts, currencies, target):
+        return np.asarray(amounts, dtype=np.float64) * self.factors(currencies, target)
+
+
+class Ranker:
+    """Cross-source ranking of scraped results in one common currency.
+
+    Prices are converted to ``currency`` with ``FxRates``; each product's
+    peer percentile (share of comparable prices <= its own) comes from a
+    ``searchsorted`` over the sorted prices, and results are ordered by a
+    single key: comparable price first, then normalized price, then
+    score, then arrival order. Products whose price cannot be compared
+    (missing, zero or unknown currency) get no peer trend and go last.
+    """
+
+    def __init__(self, rates, currency="INR", min_score=MIN_SCORE):
+        self.rates = rates
+        self.currency = currency.upper()
+        self.min_score = min_score
+
+    @classmethod
+    def from_env(cls):
+        return cls(FxRates.from_env(), currency=os.getenv("RANK_CURRENCY", "INR"))
+
+    def normalized_prices(self, products):
+        raw = np.array([_number(p.get('price')) for p in products], dtype=np.float64)
+        prices = raw * self.rates.factors([p.get('currency') or "" for p in products], self.currency)
+        prices[~(raw > 0)] = np.nan
+        return prices
+
+    def rank(self, products):
+        """Filter, annotate with cold-start peer trends and sort (see class doc)."""
+        products = [p for p in products if (p.get('score') or 0) > self.min_score]
+        if not products:
+            return []
+        prices = self.normalized_prices(products)
+        comparable = np.isfinite(prices)
+
+        peers = np.sort(prices[comparable])
+        if len(peers):
+            percentile = np.searchsorted(peers, np.where(comparable, prices, 0.0), side='right') / len(peers)
+            labels = np.select([percentile <= 0.30, percentile >= 0.70], [GOOD_DEAL, HIGH_PRICE], default=FAIR_PRICE)
+            for i in np.flatnonzero(comparable).tolist():
+                products[i]['trend'] = str(labels[i])
+
+        scores = np.array([_number(p.get('score')) for p in products], dtype=np.float64)
+        # np.lexsort: last key is primary
+        order = np.lexsort((
+            np.arange(len(products)),
+            -scores,
+            np.where(comparable, prices, 0.0),
+            ~comparable,
+        ))
+        return [products[i] for i in order.tolist()]
+
+
+def _number(value):
+    return float(value) if isinstance(value, (int, float)) else 0.0
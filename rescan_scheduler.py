@@ -0,0 +1,181 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DAY_SECONDS = 86400.0
+# A run a little earlier than yesterday's still picks up daily items
+DUE_SLACK_SECONDS = 3600.0
+# Volatility is an EWMA of the absolute % price change per check; new items
+# start at PRIOR_VOLATILITY and settle towards what they actually do
+VOLATILITY_ALPHA = 0.3
+PRIOR_VOLATILITY = 3.0
+VOLATILITY_SCALE = 0.1
+INTEREST_WEIGHT = 3.0
+
+
+class RescanScheduler:
+    """Next-due times for tracked items, so a scan only refreshes what needs it.
+
+    Each item's recheck interval is ``max_days`` shrunk by how much its
+    price moves and by how much users look at it::
+
+        interval = max_days / (1 + volatility / VOLATILITY_SCALE + interest * INTEREST_WEIGHT)
+
+    clamped to ``[min_days, max_days]``. ``volatility`` is an EWMA of the
+    absolute % change seen per check, so an item that stops moving drifts
+    out to ``max_days``; ``interest`` counts appearances in search results
+    with a ``half_life_days`` decay. Items never scheduled are due at once.
+    State lives in one SQLite table (``scan_schedule.sqlite3``).
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS schedule (
+            url         TEXT PRIMARY KEY,
+            checked     REAL NOT NULL DEFAULT 0,
+            volatility  REAL NOT NULL DEFAULT 0,
+            interest    REAL NOT NULL DEFAULT 0,
+            interest_at REAL NOT NULL DEFAULT 0,
+            due         REAL NOT NULL DEFAULT 0
+        );
+    """
+
+    def __init__(self, path, min_days=1.0, max_days=30.0, half_life_days=7.0):
+        self.path = path
+        self.min_days = min_days
+        self.max_days = max_days
+        self.half_life_days = half_life_days
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().executescript(self.SCHEMA)
+
+    @classmethod
+    def from_env(cls, path):
+        return cls(
+            path,
+            min_days=float(os.getenv("RESCAN_MIN_DAYS", "1")),
+            max_days=float(os.getenv("RESCAN_MAX_DAYS", "30")),
+            half_life_days=float(os.getenv("RESCAN_INTEREST_HALF_LIFE_DAYS", "7")),
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _rows(self, conn, urls):
+        rows = {}
+        urls = list(urls)
+        for i in range(0, len(urls), 500):
+            chunk = urls[i:i + 500]
+            for row in conn.execute(f"SELECT * FROM schedule WHERE url IN ({','.join('?' * len(chunk))})", chunk):
+                rows[row["url"]] = dict(row)
+        return rows
+
+    def _decayed_interest(self, row, now):
+        age_days = max(0.0, now - row["interest_at"]) / DAY_SECONDS
+        return row["interest"] * 0.5 ** (age_days / self.half_life_days)
+
+    def interval_days(self, volatility, interest):
+        """Days between checks for an item with this volatility and interest."""
+        days = self.max_days / (1.0 + volatility / VOLATILITY_SCALE + interest * INTEREST_WEIGHT)
+        return min(self.max_days, max(self.min_days, days))
+
+    def _upsert(self, conn, rows):
+        conn.executemany(
+            "INSERT OR REPLACE INTO schedule (url, checked, volatility, interest, interest_at, due) "
+            "VALUES (:url, :checked, :volatility, :interest, :interest_at, :due)",
+            rows,
+        )
+
+    def note_interest(self, urls, weight=1.0, now=None):
+        """Users saw these items (search results, cache hits): check them sooner."""
+        urls = {u for u in urls if u and u != "#"}
+        if not urls:
+            return
+        now = time.time() if now is None else now
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self._rows(conn, urls)
+            updated = []
+            for url in urls:
+                row = rows.get(url)
+                if row is None:
+                    # Never checked: already due, remember the interest for later
+                    updated.append({"url": url, "checked": 0.0, "volatility": PRIOR_VOLATILITY,
+                                    "interest": weight, "interest_at": now, "due": 0.0})
+                    continue
+                row["interest"] = self._decayed_interest(row, now) + weight
+                row["interest_at"] = now
+                if row["checked"]:
+                    interval = self.interval_days(row["volatility"], row["interest"])
+                    row["due"] = min(row["due"], row["checked"] + interval * DAY_SECONDS)
+                updated.append(row)
+            self._upsert(conn, updated)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def record_checks(self, observations, now=None):
+        """Record finished checks and schedule the next ones.
+
+        ``observations`` are ``(url, old_price, new_price)``. A None
+        ``old_price`` (no history yet) counts as a check without a price
+        change. A None ``new_price`` means the lookup failed: the item was
+        not checked, so it keeps its schedule and, if due, the next scan
+        tries again.
+        """
+        observations = [obs for obs in observations if obs[2] is not None]
+        if not observations:
+            return
+        now = time.time() if now is None else now
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self._rows(conn, [url for url, _, _ in observations])
+            updated = []
+            for url, old_price, new_price in observations:
+                row = rows.get(url) or {"url": url, "volatility": PRIOR_VOLATILITY,
+                                        "interest": 0.0, "interest_at": now}
+                change = 0.0
+                if old_price and new_price:
+                    change = abs(new_price - old_price) / old_price * 100.0
+                row["volatility"] += VOLATILITY_ALPHA * (change - row["volatility"])
+                row["interest"] = self._decayed_interest(row, now)
+                row["interest_at"] = now
+                row["checked"] = now
+                row["due"] = now + self.interval_days(row["volatility"], row["interest"]) * DAY_SECONDS
+                rows[url] = row
+                updated.append(row)
+            self._upsert(conn, updated)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def due_times(self, urls):
+        """``{url: due timestamp}``; 0 for items never checked."""
+        rows = self._rows(self._conn(), urls)
+        return {url: (rows[url]["due"] if url in rows else 0.0) for url in urls}
+
+    def is_due(self, due, now=None):
+        now = time.time() if now is None else now
+        return due <= now + DUE_SLACK_SECONDS
+
+    def stats(self, now=None):
+        now = time.time() if now is None else now
+        row = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(due <= ?), 0), COALESCE(AVG(volatility), 0) FROM schedule",
+            (now + DUE_SLACK_SECONDS,),
+        ).fetchone()
+        return {"items": row[0], "due": row[1], "avg_volatility_pct": round(row[2], 3)}
@@ -10,6 +10,7 @@ from price_tracker import PriceTracker
 from scrapers.amazon import AmazonScraper
 from scrapers.flipkart import FlipkartScraper
 from scrapers.ebay import EbayScraper
+from scrapers.session import close_session
 
 # Setup Logging
 logging.basicConfig(
@@ -31,12 +32,24 @@ async def run_daily_scan():
         # "Walmart": WalmartScraper()
     }
     
-    # Run Scan
-    updated_count = await tracker.scan_all(scrapers)
+    # Run Scan (all scrapers share one pooled HTTP session)
+    try:
+        updated_count = await tracker.scan_all(scrapers)
+    finally:
+        await close_session()
+
+    # Human-readable snapshot of the (columnar) history store
+    export_path = tracker.export_json()
     
     print(f"✅ Monitor Complete!")
     print(f"📊 Updated {updated_count} products with fresh prices.")
-    print("💡 Check 'data/price_history.json' for the new log.")
+    stats = tracker.last_scan
+    if stats:
+        print(f"⏱️ {stats['items']} items via {stats['searches']} searches and {stats['product_pages']} product pages in {stats['seconds']}s "
+              f"({stats['items_per_sec']} items/s, {stats['skipped_groups']} resumed from checkpoint)")
+        print(f"🗓️ {stats['due_groups']} groups due, {stats['deferred_groups']} deferred by the request budget, "
+              f"{stats['not_due_groups']} not due yet")
+    print(f"💡 Check '{export_path}' for the new log.")
 
 if __name__ == "__main__":
     try:
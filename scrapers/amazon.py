@@ -1,24 +1,44 @@
 import asyncio
-from typing import List, Dict, Any
+import os
+import re
+from typing import List, Dict, Any, Optional
 
 import urllib.parse
 from bs4 import BeautifulSoup
 
-from .base import AsyncECommerceScraper, Product
+from .base import AsyncECommerceScraper
+from .parsing import parse_price, strainer
+from .query_normalizer import query_tokens, search_text
+from .session import run_with_session
 
 
 class AmazonScraper(AsyncECommerceScraper):
-    async def search(self, query: str) -> List[Dict[str, Any]]:
+    source = "Amazon"
+    currency = "INR"
+    cache_ttl = float(os.getenv("HTTP_CACHE_TTL_AMAZON", "900"))
+
+    # Only result cards are built into the tree
+    result_strainer = strainer("div", **{"data-component-type": "s-search-result"})
+
+    # /dp/<ASIN> or /gp/product/<ASIN>, optionally behind a title slug
+    product_url_pattern = re.compile(r"https?://(www\.)?amazon\.[a-z.]+/(.+/)?(dp|gp/product)/[A-Z0-9]{10}")
+    product_strainer = strainer(None, ids=(
+        "productTitle", "corePrice_feature_div", "corePriceDisplay_desktop_feature_div",
+        "priceblock_dealprice", "priceblock_ourprice", "availability",
+    ))
+
+    async def _search(self, query: str) -> List[Dict[str, Any]]:
         """HTTP-based Amazon search parsing using aiohttp + rotating headers.
 
-        If parsing fails (Amazon may block or obfuscate), return stable demo items.
+        If parsing fails (Amazon may block or obfuscate), returns [] and
+        ``search`` falls back to stable demo items.
         """
-        search_q = "laptop" if ("laptop" in (query or "").lower() or "notebook" in (query or "").lower()) else (query or "").strip()
+        search_q = search_text(query)
         url = f"https://www.amazon.in/s?k={urllib.parse.quote_plus(search_q)}"
         items: List[Dict[str, Any]] = []
 
         try:
-            soup = await self.fetch(url)
+            soup = await self.fetch(url, parse_only=self.result_strainer)
             if soup:
                 for div in soup.select("div[data-component-type='s-search-result']"):
                     title_el = div.select_one("h2 a.a-link-normal.a-text-normal") or div.select_one("h2 a.a-link-normal")
@@ -48,64 +68,73 @@ class AmazonScraper(AsyncECommerceScraper):
         except Exception:
             items = []
 
-        if not items:
-            ql = (query or "").lower()
-            if "laptop" in ql or "notebook" in ql:
-                items = [
-                    {
-                        "title": "HP 15s 12th Gen i5 Laptop (16GB/512GB SSD)",
-                        "price": 52990.0,
-                        "currency": "INR",
-                        "source": "Amazon",
-                        "url": "amazon://demo/hp-15s-i5",
-                    },
-                    {
-                        "title": "Lenovo IdeaPad Slim 3 Ryzen 5 5500U (8GB/512GB)",
-                        "price": 42990.0,
-                        "currency": "INR",
-                        "source": "Amazon",
-                        "url": "amazon://demo/lenovo-ideapad-slim-3",
-                    },
-                    {
-                        "title": "ASUS VivoBook 15 i3 12th Gen (8GB/512GB)",
-                        "price": 38990.0,
-                        "currency": "INR",
-                        "source": "Amazon",
-                        "url": "amazon://demo/asus-vivobook-15",
-                    },
-                ]
-            else:
-                items = [
-                    {
-                        "title": "Logitech M185 Wireless Mouse",
-                        "price": 799.0,
-                        "currency": "INR",
-                        "source": "Amazon",
-                        "url": "amazon://demo/logitech-m185",
-                    },
-                    {
-                        "title": "HP X1000 Wired Mouse",
-                        "price": 399.0,
-                        "currency": "INR",
-                        "source": "Amazon",
-                        "url": "amazon://demo/hp-x1000",
-                    },
-                ]
-
-        products: List[Dict[str, Any]] = []
-        for item in items:
-            p = Product()
-            p.title = item.get("title", "")
-            p.price = float(item.get("price", 0.0) or 0.0)
-            p.currency = item.get("currency", "INR")
-            p.source = item.get("source", "Amazon")
-            p.url = item.get("url", "#")
-            p.score = 1.0 if p.price > 0 else 0.1
-            products.append(p.to_dict())
-
-        return products
+        return items
+
+    def _parse_product(self, soup: BeautifulSoup) -> Optional[Dict[str, Any]]:
+        title_el = soup.select_one("#productTitle")
+        price_el = soup.select_one(
+            "#corePriceDisplay_desktop_feature_div .a-offscreen, #corePrice_feature_div .a-offscreen, "
+            "#priceblock_dealprice, #priceblock_ourprice"
+        )
+        availability_el = soup.select_one("#availability")
+        availability = availability_el.get_text(" ", strip=True).lower() if availability_el else ""
+        available = not ("unavailable" in availability or "out of stock" in availability)
+
+        price = parse_price(price_el.get_text()) if price_el else None
+        if price is None and available:
+            return None
+        return {
+            "title": title_el.get_text(strip=True) if title_el else "",
+            "price": price or 0.0,
+            "currency": "INR",
+            "available": available,
+        }
+
+    def _fallback_items(self, query: str) -> List[Dict[str, Any]]:
+        """Stable demo items used when live results are unavailable."""
+        if "laptop" in query_tokens(query):
+            return [
+                {
+                    "title": "HP 15s 12th Gen i5 Laptop (16GB/512GB SSD)",
+                    "price": 52990.0,
+                    "currency": "INR",
+                    "source": "Amazon",
+                    "url": "amazon://demo/hp-15s-i5",
+                },
+                {
+                    "title": "Lenovo IdeaPad Slim 3 Ryzen 5 5500U (8GB/512GB)",
+                    "price": 42990.0,
+                    "currency": "INR",
+                    "source": "Amazon",
+                    "url": "amazon://demo/lenovo-ideapad-slim-3",
+                },
+                {
+                    "title": "ASUS VivoBook 15 i3 12th Gen (8GB/512GB)",
+                    "price": 38990.0,
+                    "currency": "INR",
+                    "source": "Amazon",
+                    "url": "amazon://demo/asus-vivobook-15",
+                },
+            ]
+        else:
+            return [
+                {
+                    "title": "Logitech M185 Wireless Mouse",
+                    "price": 799.0,
+                    "currency": "INR",
+                    "source": "Amazon",
+                    "url": "amazon://demo/logitech-m185",
+                },
+                {
+                    "title": "HP X1000 Wired Mouse",
+                    "price": 399.0,
+                    "currency": "INR",
+                    "source": "Amazon",
+                    "url": "amazon://demo/hp-x1000",
+                },
+            ]
 
 
 def scrape_amazon(query: str) -> List[Dict[str, Any]]:
-    return asyncio.run(AmazonScraper().search(query))
+    return run_with_session(AmazonScraper().search(query))
 
@@ -4,10 +4,20 @@ import asyncio
 import random
 import logging
 import os
+import re
+import urllib.parse
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+
+from .circuit_breaker import get_breaker, get_latency
+from .http_cache import http_cache, looks_blocked
+from .parsing import parse_html, parse_html_async
+from .query_normalizer import canonicalize
+from .rate_limit import host_limiter, parse_retry_after
+from .session import get_session
+from .singleflight import search_flight
 
 logger = logging.getLogger(__name__)
 
@@ -32,50 +42,129 @@ FULL_HEADERS = [
 
 
 class BaseScraper:
-    async def fetch(self, url: str) -> Optional[BeautifulSoup]:
-        """Low-level HTML fetch helper with retries.
+    # Display name; also keys the circuit breaker and latency stats
+    source: str = ""
+    currency: str = "USD"
+
+    # Seconds a cached response is served without touching the network.
+    # Subclasses override per source; after that the entry is revalidated.
+    cache_ttl: float = float(os.getenv("HTTP_CACHE_TTL", "600"))
+
+    async def fetch(
+        self,
+        url: str,
+        parse_only: Optional[SoupStrainer] = None,
+        use_cache: bool = True,
+    ) -> Optional[BeautifulSoup]:
+        """Fetch ``url`` and parse it off the event loop.
 
-        Returns a BeautifulSoup instance on success, otherwise None.
+        ``parse_only`` restricts the tree to the elements the caller selects
+        (see ``scrapers.parsing.strainer``). A new response is cached only if
+        that tree is not empty: a bot-check page served with status 200 has
+        none of the selected elements and must not be reused for other users.
+        Returns None on failure.
         """
+        text, response = await self._fetch_text(url, use_cache)
+        if text is None:
+            return None
+        soup = await parse_html_async(text, parse_only)
+        if response and (soup.find() is not None if parse_only is not None else not looks_blocked(text)):
+            await self._store(response)
+        return soup
+
+    async def fetch_text(self, url: str, use_cache: bool = True) -> Optional[str]:
+        """Low-level HTML fetch helper with retries and an on-disk cache.
+
+        Fresh cache entries (younger than ``cache_ttl``) are returned without
+        a request; stale ones are revalidated with If-None-Match /
+        If-Modified-Since. Pass ``use_cache=False`` to bypass the cache.
+        Responses that look like block pages (``looks_blocked``) are not
+        cached. Returns the response body on success, otherwise None.
+        """
+        text, response = await self._fetch_text(url, use_cache)
+        if response and not looks_blocked(text):
+            await self._store(response)
+        return text
+
+    async def _store(self, response: Tuple[str, str, Optional[str], Optional[str]]) -> None:
+        """Cache ``(url, body, etag, last_modified)`` from ``_fetch_text``."""
+        await asyncio.get_running_loop().run_in_executor(None, http_cache.put, *response)
+
+    async def _fetch_text(self, url: str, use_cache: bool) -> Tuple[Optional[str], Optional[tuple]]:
+        """``(body, response)``; ``response`` is set for a new 200 the caller may cache."""
+        loop = asyncio.get_running_loop()
+        use_cache = use_cache and http_cache.enabled
+        cached = None
+        if use_cache:
+            cached = await loop.run_in_executor(None, http_cache.get, url)
+            if cached and cached.age() < self.cache_ttl:
+                http_cache.count("hits")
+                await loop.run_in_executor(None, http_cache.mark_used, url)
+                return cached.body, None
+
         headers = random.choice(FULL_HEADERS).copy()
         # Add a referer to look more like a browser flow
         headers.setdefault("Referer", "https://www.google.com/")
-
-        # Configurable jitter and concurrency
-        try:
-            delay_min = float(os.getenv("SCRAPER_DELAY_MIN", "0.8"))
-            delay_max = float(os.getenv("SCRAPER_DELAY_MAX", "2.0"))
-            limit_per_host = int(os.getenv("SCRAPER_LIMIT_PER_HOST", "2"))
-        except Exception:
-            delay_min, delay_max, limit_per_host = 0.8, 2.0, 2
+        if cached:
+            headers.update(cached.validators())
 
         proxy = os.getenv("HTTP_PROXY") or os.getenv("HTTPS_PROXY")
+        host = urllib.parse.urlsplit(url).netloc
+        breaker = get_breaker(self.source or host)
+        latency = get_latency(self.source or host)
 
         for attempt in range(3):
+            # Don't keep retrying a site whose circuit opened meanwhile
+            if attempt and breaker.is_open():
+                break
+            # Per-host token bucket: no wait while the host has spare tokens
+            await host_limiter.acquire(host)
+            # Budget follows the source's observed p95 instead of a fixed 15s
+            budget = latency.timeout()
+            started = loop.time()
             try:
-                # Jitter between attempts to reduce 503s
-                await asyncio.sleep(random.uniform(delay_min, delay_max))
+                timeout = aiohttp.ClientTimeout(total=budget)
+                session = await get_session()
+                async with session.get(url, headers=headers, proxy=proxy, timeout=timeout) as resp:
 
-                timeout = aiohttp.ClientTimeout(total=15)
-                connector = aiohttp.TCPConnector(limit_per_host=limit_per_host)
-                async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
-                    async with session.get(url, headers=headers, proxy=proxy) as resp:
+                    if resp.status in (200, 304):
+                        latency.record(loop.time() - started)
 
-                        if resp.status == 200:
-                            text = await resp.text()
-                            return BeautifulSoup(text, "html.parser")
+                    if resp.status == 200:
+                        host_limiter.reward(host)
+                        text = await resp.text()
+                        if not use_cache:
+                            return text, None
+                        http_cache.count("misses")
+                        return text, (url, text, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
 
-                        logger.warning(f"Status {resp.status} for {url}")
-                        # Backoff more on 429/503
-                        if resp.status in (429, 503):
-                            await asyncio.sleep((attempt + 1) * 2 + random.uniform(0, 1))
+                    if resp.status == 304 and cached:
+                        host_limiter.reward(host)
+                        http_cache.count("revalidated")
+                        await loop.run_in_executor(None, http_cache.touch, url)
+                        return cached.body, None
 
+                    logger.warning(f"Status {resp.status} for {url}")
+                    # Slow this host down on 429/503; the bucket spaces out the retry
+                    if resp.status in (429, 503):
+                        host_limiter.penalize(host, parse_retry_after(resp.headers.get("Retry-After")))
+                        continue
+
+            except asyncio.TimeoutError:
+                latency.record_timeout(budget)
+                logger.error(f"Fetch timeout ({budget:.1f}s) attempt {attempt+1} for {url}")
             except Exception as e:
                 logger.error(f"Fetch error attempt {attempt+1}: {e}")
 
-            await asyncio.sleep(1)
+            # Short backoff only when another attempt follows
+            if attempt < 2:
+                await asyncio.sleep(0.5 * (2 ** attempt) + random.uniform(0, 0.25))
 
-        return None
+        if cached:
+            # Stale beats nothing when the site is unreachable
+            logger.warning(f"Serving stale cached page for {url}")
+            return cached.body, None
+        return None, None
 
 
 @dataclass
@@ -112,11 +201,114 @@ class Product:
 class AsyncECommerceScraper(BaseScraper):
     """Base class for site-specific async scrapers.
 
-    Child classes should implement ``async def search(self, query: str)``
-    and return ``List[Dict[str, Any]]`` where each dict matches
-    the structure produced by ``Product.to_dict``.
+    Child classes implement ``async def _search(self, query: str)``, which
+    fetches and parses live results (returning ``[]`` when blocked or
+    unparseable), and ``_fallback_items(query)``, which returns stable demo
+    items. Both return plain dicts with title/price/currency/source/url.
+
+    Callers use ``search``, which coalesces concurrent identical searches,
+    skips the network while the source's circuit breaker is open, falls
+    back to demo items (marked ``"fallback": True``) when nothing was
+    parsed and returns dicts matching ``Product.to_dict``.
+
+    For refreshing one known item, ``fetch_product(url)`` reads only the
+    title/price/availability blocks of its product page. Child classes
+    set ``product_url_pattern`` and ``product_strainer`` and implement
+    ``_parse_product(soup)``.
     """
 
-    async def search(self, query: str) -> List[Dict[str, Any]]:  # pragma: no cover - interface
+    # Real product page URLs for this site (demo IDs never match)
+    product_url_pattern: Optional[re.Pattern] = None
+    # Only the title, price and availability blocks are built into the tree
+    product_strainer: Optional[SoupStrainer] = None
+
+    async def search(self, query: str) -> List[Dict[str, Any]]:
+        key = (type(self).__name__, canonicalize(query))
+        return await search_flight.do(key, lambda: self._guarded_search(query))
+
+    async def _guarded_search(self, query: str) -> List[Dict[str, Any]]:
+        breaker = get_breaker(self.source)
+        items: List[Dict[str, Any]] = []
+        if breaker.allow():
+            try:
+                items = await self._search(query)
+            except Exception as e:
+                logger.error(f"{self.source} search failed: {e}")
+                items = []
+            except BaseException:
+                # Cancelled (deadline, shutdown): no verdict on the source
+                breaker.release_probe()
+                raise
+            # Fallback-only results count as a failure: we are likely blocked
+            if items:
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+        else:
+            logger.info(f"{self.source}: circuit open, serving fallback items")
+
+        if not items:
+            # Marked so price tracking never records demo prices
+            return [dict(self._to_product(item), fallback=True) for item in self._fallback_items(query)]
+        return [self._to_product(item) for item in items]
+
+    def is_product_url(self, url: str) -> bool:
+        return bool(self.product_url_pattern and self.product_url_pattern.match(url or ""))
+
+    async def fetch_product(self, url: str) -> Optional[Dict[str, Any]]:
+        """Current title, price and availability of the product at ``url``.
+
+        Returns a dict with title/price/currency/source/url/available, or
+        None when ``url`` is not a product page of this site, the circuit
+        breaker is open, or the page could not be fetched or parsed.
+        """
+        if not self.is_product_url(url):
+            return None
+        breaker = get_breaker(self.source)
+        if not breaker.allow():
+            logger.info(f"{self.source}: circuit open, skipping product page {url}")
+            return None
+        item = None
+        try:
+            soup = await self.fetch(url, parse_only=self.product_strainer)
+            item = self._parse_product(soup) if soup else None
+        except Exception as e:
+            logger.error(f"{self.source} product page failed for {url}: {e}")
+        except BaseException:
+            breaker.release_probe()
+            raise
+        if item:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+            return None
+        item.setdefault("currency", self.currency)
+        item.update(source=self.source, url=url)
+        return item
+
+    def parse_product_page(self, html: str) -> Optional[Dict[str, Any]]:
+        """``_parse_product`` on raw HTML, e.g. a saved page."""
+        return self._parse_product(parse_html(html, self.product_strainer))
+
+    def _parse_product(self, soup: BeautifulSoup) -> Optional[Dict[str, Any]]:
+        """``{"title", "price", "available"}`` from a strained product page, or None.
+
+        ``price`` is 0.0 for an unavailable item that shows no price.
+        """
+        return None
+
+    def _to_product(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        p = Product()
+        p.title = item.get("title", "")
+        p.price = float(item.get("price", 0.0) or 0.0)
+        p.currency = item.get("currency", self.currency)
+        p.source = item.get("source", self.source)
+        p.url = item.get("url", "#")
+        p.score = 1.0 if p.price > 0 else 0.1
+        return p.to_dict()
+
+    async def _search(self, query: str) -> List[Dict[str, Any]]:  # pragma: no cover - interface
         raise NotImplementedError
 
+    def _fallback_items(self, query: str) -> List[Dict[str, Any]]:
+        return []
@@ -0,0 +1,190 @@
+# scrapers/circuit_breaker.py
+import collections
+import logging
+import os
+import threading
+import time
+from typing import Deque, Dict
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+class CircuitBreaker:
+    """Per-source breaker: stop hitting a site that keeps blocking us.
+
+    ``failure_threshold`` consecutive failures (fetch errors or searches
+    that only produced fallback items) open the circuit. While open,
+    ``allow()`` is False and callers skip the network. After ``cooldown``
+    seconds one probe request is let through (half-open); success closes
+    the circuit, failure re-opens it with the cool-down doubled up to
+    ``max_cooldown``. A probe that ends without a verdict (cancelled)
+    calls ``release_probe`` so the next caller can probe instead.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, cooldown: float = 60.0, max_cooldown: float = 900.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        # stats
+        self.times_opened = 0
+        self.short_circuited = 0
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                logger.info(f"Circuit {self.name}: half-open, probing")
+                return True
+            self.short_circuited += 1
+            return False
+
+    def is_open(self) -> bool:
+        """True while requests are being short-circuited (no side effects)."""
+        with self._lock:
+            return self.state != CLOSED
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f"Circuit {self.name}: closed")
+            self.state = CLOSED
+            self.failures = 0
+            self.cooldown = self.base_cooldown
+            self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """The half-open probe ended without an answer: let another caller probe."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN:
+                self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+                self._open()
+            elif self.state == CLOSED and self.failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self._probe_in_flight = False
+        self.times_opened += 1
+        logger.warning(f"Circuit {self.name}: open for {self.cooldown:.0f}s after {self.failures} failures")
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "cooldown_s": self.cooldown,
+                "times_opened": self.times_opened,
+                "short_circuited": self.short_circuited,
+            }
+
+
+class LatencyTracker:
+    """Rolling window of response times used to size request timeouts.
+
+    The timeout is ``multiplier`` x the observed p95, clamped to
+    ``[min_timeout, max_timeout]``. Until ``min_samples`` responses have
+    been seen the fixed ``max_timeout`` is used.
+    """
+
+    def __init__(self, window: int = 50, min_samples: int = 5, multiplier: float = 2.0,
+                 min_timeout: float = 3.0, max_timeout: float = 15.0):
+        self.samples: Deque[float] = collections.deque(maxlen=window)
+        self.min_samples = min_samples
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.samples.append(seconds)
+
+    def record_timeout(self, timeout: float) -> None:
+        # Count a timeout as a slow sample so the budget grows back
+        self.record(min(self.max_timeout, timeout * 1.5))
+
+    def percentile(self, pct: float) -> float:
+        with self._lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return 0.0
+        idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[idx]
+
+    def timeout(self) -> float:
+        if len(self.samples) < self.min_samples:
+            return self.max_timeout
+        return max(self.min_timeout, min(self.max_timeout, self.percentile(95) * self.multiplier))
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "samples": len(self.samples),
+            "p50_s": round(self.percentile(50), 3),
+            "p95_s": round(self.percentile(95), 3),
+            "timeout_s": round(self.timeout(), 3),
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_latencies: Dict[str, LatencyTracker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(source: str) -> CircuitBreaker:
+    with _registry_lock:
+        if source not in _breakers:
+            _breakers[source] = CircuitBreaker(
+                source,
+                failure_threshold=int(_env_float("BREAKER_FAILURES", 3)),
+                cooldown=_env_float("BREAKER_COOLDOWN", 60.0),
+                max_cooldown=_env_float("BREAKER_MAX_COOLDOWN", 900.0),
+            )
+        return _breakers[source]
+
+
+def get_latency(source: str) -> LatencyTracker:
+    with _registry_lock:
+        if source not in _latencies:
+            _latencies[source] = LatencyTracker(
+                min_timeout=_env_float("SCRAPER_MIN_TIMEOUT", 3.0),
+                max_timeout=_env_float("SCRAPER_MAX_TIMEOUT", 15.0),
+            )
+        return _latencies[source]
+
+
+def breaker_stats() -> Dict[str, Dict[str, Dict[str, float]]]:
+    with _registry_lock:
+        sources = set(_breakers) | set(_latencies)
+    return {
+        source: {"breaker": get_breaker(source).stats(), "latency": get_latency(source).stats()}
+        for source in sorted(sources)
+    }
@@ -1,21 +1,39 @@
 import asyncio
-from typing import List, Dict, Any
+import os
+import re
+from typing import List, Dict, Any, Optional
 
 from bs4 import BeautifulSoup
 import urllib.parse
 
-from .base import AsyncECommerceScraper, Product
+from .base import AsyncECommerceScraper
+from .parsing import parse_price, strainer
+from .query_normalizer import query_tokens, search_text
+from .session import run_with_session
 
 
 class EbayScraper(AsyncECommerceScraper):
-    async def search(self, query: str) -> List[Dict[str, Any]]:
+    source = "eBay"
+    currency = "USD"
+    cache_ttl = float(os.getenv("HTTP_CACHE_TTL_EBAY", "600"))
+
+    # Only result cards are built into the tree
+    result_strainer = strainer("li", classes=("s-item",))
+
+    # /itm/<item number>, optionally after a title slug
+    product_url_pattern = re.compile(r"https?://(www\.)?ebay\.[a-z.]+/itm/([^/?#]+/)?\d{9,}")
+    product_strainer = strainer(None, classes=(
+        "x-item-title__mainTitle", "x-price-primary", "d-quantity__availability", "d-statusmessage",
+    ))
+
+    async def _search(self, query: str) -> List[Dict[str, Any]]:
         """HTTP-based eBay search parsing (no Selenium)."""
-        search_q = "laptop" if ("laptop" in (query or "").lower() or "notebook" in (query or "").lower()) else (query or "").strip()
+        search_q = search_text(query)
         url = f"https://www.ebay.com/sch/i.html?_nkw={urllib.parse.quote_plus(search_q)}"
         items: List[Dict[str, Any]] = []
 
         try:
-            soup = await self.fetch(url)
+            soup = await self.fetch(url, parse_only=self.result_strainer)
             if soup:
                 for li in soup.select("li.s-item"):
                     title_el = li.select_one("h3.s-item__title")
@@ -44,57 +62,64 @@ class EbayScraper(AsyncECommerceScraper):
         except Exception:
             items = []
 
-        if not items:
-            ql = (query or "").lower()
-            if "laptop" in ql or "notebook" in ql:
-                items = [
-                    {
-                        "title": "Lenovo ThinkPad T480 (Refurbished)",
-                        "price": 279.99,
-                        "currency": "USD",
-                        "source": "eBay",
-                        "url": "https://www.ebay.com/itm/demo-refurb-thinkpad-t480",
-                    },
-                    {
-                        "title": "Dell Latitude 7490 (Used)",
-                        "price": 329.99,
-                        "currency": "USD",
-                        "source": "eBay",
-                        "url": "https://www.ebay.com/itm/demo-used-latitude-7490",
-                    },
-                ]
-            else:
-                items = [
-                    {
-                        "title": "Logitech M510 Wireless Mouse",
-                        "price": 24.99,
-                        "currency": "USD",
-                        "source": "eBay",
-                        "url": "https://www.ebay.com/itm/demo-logitech-m510",
-                    },
-                    {
-                        "title": "Razer DeathAdder Essential Gaming Mouse",
-                        "price": 29.99,
-                        "currency": "USD",
-                        "source": "eBay",
-                        "url": "https://www.ebay.com/itm/demo-razer-deathadder",
-                    },
-                ]
+        return items
+
+    def _parse_product(self, soup: BeautifulSoup) -> Optional[Dict[str, Any]]:
+        title_el = soup.select_one(".x-item-title__mainTitle")
+        price_el = soup.select_one(".x-price-primary")
+        status = " ".join(
+            el.get_text(" ", strip=True).lower() for el in soup.select(".d-quantity__availability, .d-statusmessage")
+        )
+        available = not ("out of stock" in status or "ended" in status)
 
-        products: List[Dict[str, Any]] = []
-        for item in items:
-            p = Product()
-            p.title = item.get("title", "")
-            p.price = float(item.get("price", 0.0) or 0.0)
-            p.currency = item.get("currency", "USD")
-            p.source = item.get("source", "eBay")
-            p.url = item.get("url", "#")
-            p.score = 1.0 if p.price > 0 else 0.1
-            products.append(p.to_dict())
+        price = parse_price(price_el.get_text()) if price_el else None
+        if price is None and available:
+            return None
+        return {
+            "title": title_el.get_text(" ", strip=True) if title_el else "",
+            "price": price or 0.0,
+            "currency": "USD",
+            "available": available,
+        }
 
-        return products
+    def _fallback_items(self, query: str) -> List[Dict[str, Any]]:
+        """Stable demo items used when live results are unavailable."""
+        if "laptop" in query_tokens(query):
+            return [
+                {
+                    "title": "Lenovo ThinkPad T480 (Refurbished)",
+                    "price": 279.99,
+                    "currency": "USD",
+                    "source": "eBay",
+                    "url": "https://www.ebay.com/itm/demo-refurb-thinkpad-t480",
+                },
+                {
+                    "title": "Dell Latitude 7490 (Used)",
+                    "price": 329.99,
+                    "currency": "USD",
+                    "source": "eBay",
+                    "url": "https://www.ebay.com/itm/demo-used-latitude-7490",
+                },
+            ]
+        else:
+            return [
+                {
+                    "title": "Logitech M510 Wireless Mouse",
+                    "price": 24.99,
+                    "currency": "USD",
+                    "source": "eBay",
+                    "url": "https://www.ebay.com/itm/demo-logitech-m510",
+                },
+                {
+                    "title": "Razer DeathAdder Essential Gaming Mouse",
+                    "price": 29.99,
+                    "currency": "USD",
+                    "source": "eBay",
+                    "url": "https://www.ebay.com/itm/demo-razer-deathadder",
+                },
+            ]
 
 
 def scrape_ebay(query: str) -> List[Dict[str, Any]]:
-    return asyncio.run(EbayScraper().search(query))
+    return run_with_session(EbayScraper().search(query))
 
@@ -1,24 +1,41 @@
 import asyncio
-from typing import List, Dict, Any
+import os
+import re
+from typing import List, Dict, Any, Optional
 
 from bs4 import BeautifulSoup
 import urllib.parse
 
-from .base import AsyncECommerceScraper, Product
+from .base import AsyncECommerceScraper
+from .parsing import parse_price, strainer
+from .query_normalizer import query_tokens, search_text
+from .session import run_with_session
 
 
 class FlipkartScraper(AsyncECommerceScraper):
-    async def search(self, query: str) -> List[Dict[str, Any]]:
+    source = "Flipkart"
+    currency = "INR"
+    cache_ttl = float(os.getenv("HTTP_CACHE_TTL_FLIPKART", "900"))
+
+    # Only result cards are built into the tree
+    result_strainer = strainer("div", classes=("_4ddWXP", "_1AtVbE"))
+
+    # /<slug>/p/itm<id>
+    product_url_pattern = re.compile(r"https?://(www\.)?flipkart\.com/[^?#]+/p/itm[0-9a-z]+")
+    # Title, price and sold-out banner (older and current class names)
+    product_strainer = strainer(None, classes=("B_NuCI", "VU-ZEz", "_30jeq3", "Nx9bqj", "_16FRp0", "Z8JjpR"))
+
+    async def _search(self, query: str) -> List[Dict[str, Any]]:
         """Fetch search results via HTTP (no Selenium) and parse static HTML.
 
-        Flipkart heavily uses JS; if parsing yields no items, we return stable fallbacks.
+        Flipkart heavily uses JS; if parsing yields no items, ``search`` returns stable fallbacks.
         """
-        search_q = "laptop" if ("laptop" in (query or "").lower() or "notebook" in (query or "").lower()) else (query or "").strip()
+        search_q = search_text(query)
         url = f"https://www.flipkart.com/search?q={urllib.parse.quote_plus(search_q)}"
         items: List[Dict[str, Any]] = []
 
         try:
-            soup = await self.fetch(url)
+            soup = await self.fetch(url, parse_only=self.result_strainer)
             if soup:
                 # Try both grid and list selectors commonly seen on Flipkart
                 for card in soup.select("div._4ddWXP, div._1AtVbE"):
@@ -48,57 +65,62 @@ class FlipkartScraper(AsyncECommerceScraper):
         except Exception:
             items = []
 
-        if not items:
-            ql = (query or "").lower()
-            if "laptop" in ql or "notebook" in ql:
-                items = [
-                    {
-                        "title": "Acer Aspire 3 Ryzen 5 (8GB/512GB SSD)",
-                        "price": 35990.0,
-                        "currency": "INR",
-                        "source": "Flipkart",
-                        "url": "flipkart://demo/acer-aspire-3-r5",
-                    },
-                    {
-                        "title": "HP 14s 11th Gen i3 (8GB/512GB SSD)",
-                        "price": 32990.0,
-                        "currency": "INR",
-                        "source": "Flipkart",
-                        "url": "flipkart://demo/hp-14s-i3",
-                    },
-                ]
-            else:
-                items = [
-                    {
-                        "title": "Logitech M221 Wireless Mouse",
-                        "price": 749.0,
-                        "currency": "INR",
-                        "source": "Flipkart",
-                        "url": "flipkart://demo/logitech-m221",
-                    },
-                    {
-                        "title": "Dell MS116 Wired Optical Mouse",
-                        "price": 349.0,
-                        "currency": "INR",
-                        "source": "Flipkart",
-                        "url": "flipkart://demo/dell-ms116",
-                    },
-                ]
-
-        products: List[Dict[str, Any]] = []
-        for item in items:
-            p = Product()
-            p.title = item.get("title", "")
-            p.price = float(item.get("price", 0.0) or 0.0)
-            p.currency = item.get("currency", "INR")
-            p.source = item.get("source", "Flipkart")
-            p.url = item.get("url", "#")
-            p.score = 1.0 if p.price > 0 else 0.1
-            products.append(p.to_dict())
-
-        return products
+        return items
+
+    def _parse_product(self, soup: BeautifulSoup) -> Optional[Dict[str, Any]]:
+        title_el = soup.select_one("span.B_NuCI, span.VU-ZEz")
+        price_el = soup.select_one("div._30jeq3, div.Nx9bqj")
+        sold_out_el = soup.select_one("div._16FRp0, div.Z8JjpR")
+        available = sold_out_el is None
+
+        price = parse_price(price_el.get_text()) if price_el else None
+        if price is None and available:
+            return None
+        return {
+            "title": title_el.get_text(strip=True) if title_el else "",
+            "price": price or 0.0,
+            "currency": "INR",
+            "available": available,
+        }
+
+    def _fallback_items(self, query: str) -> List[Dict[str, Any]]:
+        """Stable demo items used when live results are unavailable."""
+        if "laptop" in query_tokens(query):
+            return [
+                {
+                    "title": "Acer Aspire 3 Ryzen 5 (8GB/512GB SSD)",
+                    "price": 35990.0,
+                    "currency": "INR",
+                    "source": "Flipkart",
+                    "url": "flipkart://demo/acer-aspire-3-r5",
+                },
+                {
+                    "title": "HP 14s 11th Gen i3 (8GB/512GB SSD)",
+                    "price": 32990.0,
+                    "currency": "INR",
+                    "source": "Flipkart",
+                    "url": "flipkart://demo/hp-14s-i3",
+                },
+            ]
+        else:
+            return [
+                {
+                    "title": "Logitech M221 Wireless Mouse",
+                    "price": 749.0,
+                    "currency": "INR",
+                    "source": "Flipkart",
+                    "url": "flipkart://demo/logitech-m221",
+                },
+                {
+                    "title": "Dell MS116 Wired Optical Mouse",
+                    "price": 349.0,
+                    "currency": "INR",
+                    "source": "Flipkart",
+                    "url": "flipkart://demo/dell-ms116",
+                },
+            ]
 
 
 def scrape_flipkart(query: str) -> List[Dict[str, Any]]:
-    return asyncio.run(FlipkartScraper().search(query))
+    return run_with_session(FlipkartScraper().search(query))
 
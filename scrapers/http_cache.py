@@ -0,0 +1,199 @@
+# scrapers/http_cache.py
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bot-check / captcha interstitials that storefronts serve with status 200
+BLOCK_MARKERS = (
+    "captcha",
+    "robot check",
+    "are you a human",
+    "are you a robot",
+    "unusual traffic",
+    "automated access",
+)
+
+
+def looks_blocked(body: str) -> bool:
+    """True if ``body`` looks like a block page rather than real content."""
+    head = body[:20000].lower()
+    return any(marker in head for marker in BLOCK_MARKERS)
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    body: str
+    stored_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidation."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HTTPCache:
+    """Size-bounded, zlib-compressed on-disk response cache keyed by URL.
+
+    One file per URL (sha1 of the URL) holding the body plus ETag /
+    Last-Modified. When the directory grows past ``max_bytes`` the least
+    recently used files (by mtime, bumped on every hit) are removed.
+    With ``enabled=False`` scrapers neither read nor write it.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 50 * 1024 * 1024, enabled: bool = True):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._sizes: Dict[str, int] = {}
+        for name in os.listdir(directory):
+            if name.endswith(".z"):
+                try:
+                    self._sizes[name] = os.path.getsize(os.path.join(directory, name))
+                except OSError:
+                    pass
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "HTTPCache":
+        base = os.getenv("STORAGE_PATH") or os.path.join(os.getcwd(), 'chroma_db')
+        directory = os.getenv("HTTP_CACHE_DIR") or os.path.join(base, 'http_cache')
+        try:
+            max_mb = float(os.getenv("HTTP_CACHE_MAX_MB", "50"))
+        except ValueError:
+            max_mb = 50.0
+        enabled = os.getenv("HTTP_CACHE_ENABLED", "true").lower() == "true"
+        return cls(directory, int(max_mb * 1024 * 1024), enabled=enabled)
+
+    def _name(self, url: str) -> str:
+        return hashlib.sha1(url.encode("utf-8")).hexdigest() + ".z"
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        path = os.path.join(self.directory, self._name(url))
+        try:
+            with open(path, "rb") as f:
+                data = json.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Dropping unreadable cache entry for {url}: {e}")
+            self._remove(self._name(url))
+            return None
+        if data.get("url") != url:  # sha1 collision, vanishingly unlikely
+            return None
+        return CachedResponse(
+            url=url,
+            body=data["body"],
+            stored_at=data["stored_at"],
+            etag=data.get("etag"),
+            last_modified=data.get("last_modified"),
+        )
+
+    def put(self, url: str, body: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        name = self._name(url)
+        payload = zlib.compress(json.dumps({
+            "url": url,
+            "body": body,
+            "stored_at": time.time(),
+            "etag": etag,
+            "last_modified": last_modified,
+        }).encode("utf-8"), 6)
+        if len(payload) > self.max_bytes:
+            return
+        path = os.path.join(self.directory, name)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(payload)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.error(f"HTTP cache write error: {e}")
+            return
+        with self._lock:
+            self._sizes[name] = len(payload)
+        self._evict()
+
+    def touch(self, url: str) -> None:
+        """Mark an entry as fresh again after a 304 Not Modified."""
+        entry = self.get(url)
+        if entry:
+            self.put(url, entry.body, entry.etag, entry.last_modified)
+
+    def mark_used(self, url: str) -> None:
+        try:
+            os.utime(os.path.join(self.directory, self._name(url)))
+        except OSError:
+            pass
+
+    def _remove(self, name: str) -> None:
+        with self._lock:
+            self._sizes.pop(name, None)
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        with self._lock:
+            total = sum(self._sizes.values())
+            if total <= self.max_bytes:
+                return
+            names = list(self._sizes)
+
+        def _mtime(name):
+            try:
+                return os.path.getmtime(os.path.join(self.directory, name))
+            except OSError:
+                return 0.0
+
+        for name in sorted(names, key=_mtime):
+            if total <= self.max_bytes:
+                break
+            total -= self._sizes.get(name, 0)
+            self._remove(name)
+            self.count("evictions")
+
+    def count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def bytes_used(self) -> int:
+        with self._lock:
+            return sum(self._sizes.values())
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses + self.revalidated
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "hit_ratio": round((self.hits + self.revalidated) / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._sizes),
+            "bytes_used": self.bytes_used(),
+        }
+
+
+http_cache = HTTPCache.from_env()
@@ -0,0 +1,80 @@
+# scrapers/parsing.py
+import asyncio
+import logging
+import re
+from typing import Optional
+
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
+
+logger = logging.getLogger(__name__)
+
+try:
+    import lxml  # noqa: F401
+    PARSER = "lxml"
+except ImportError:  # pragma: no cover - lxml is in requirements.txt
+    PARSER = "html.parser"
+    logger.warning("lxml not installed; falling back to the slower html.parser")
+
+
+def has_class(*names: str):
+    """Attribute matcher for ``SoupStrainer``.
+
+    While parsing, the strainer sees the raw ``class`` string (e.g.
+    ``"s-item s-item--large"``) rather than the split list, so ``class_=``
+    does not match multi-class elements. This splits it first.
+    """
+    wanted = set(names)
+
+    def _match(value) -> bool:
+        if not value:
+            return False
+        parts = value.split() if isinstance(value, str) else value
+        return not wanted.isdisjoint(parts)
+
+    return _match
+
+
+def strainer(tag: Optional[str], classes=(), ids=(), **attrs) -> SoupStrainer:
+    """Build a ``SoupStrainer`` limiting the tree to result containers.
+
+    ``tag=None`` matches any tag; ``ids`` keeps elements with any of
+    those ids (product pages mark their price blocks by id).
+    """
+    if classes:
+        attrs["class"] = has_class(*classes)
+    if ids:
+        wanted = set(ids)
+        attrs["id"] = lambda value: value in wanted
+    return SoupStrainer(tag, attrs=attrs)
+
+
+_PRICE_RE = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+
+def parse_price(text: Optional[str]) -> Optional[float]:
+    """First number in a price label (``"₹52,990.00"``, ``"US $24.99"``)."""
+    match = _PRICE_RE.search(text or "")
+    if not match:
+        return None
+    try:
+        return float(match.group().replace(",", ""))
+    except ValueError:
+        return None
+
+
+def parse_html(text: str, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """Parse ``text`` with the fastest available backend.
+
+    With ``parse_only`` only matching elements (and their children) are
+    built into the tree; the rest of the page is skipped by the tokenizer.
+    """
+    try:
+        return BeautifulSoup(text, PARSER, parse_only=parse_only)
+    except FeatureNotFound:  # pragma: no cover
+        return BeautifulSoup(text, "html.parser", parse_only=parse_only)
+
+
+async def parse_html_async(text: str, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """``parse_html`` on the default thread pool so the event loop stays free."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, parse_html, text, parse_only)
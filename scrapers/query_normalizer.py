@@ -0,0 +1,107 @@
+# scrapers/query_normalizer.py
+import re
+from functools import lru_cache
+
+# Conversational words that never change what the user is shopping for
+FILLER_WORDS = {
+    "a", "an", "the", "and", "or", "for", "of", "to", "in", "on", "with", "me",
+    "my", "i", "im", "want", "need", "looking", "look", "please", "pls", "can",
+    "you", "could", "would", "some", "any", "search", "find", "show", "tell",
+    "get", "buy", "purchase", "recommend", "suggest", "about", "good", "is",
+    "are", "it", "that", "this", "what", "which", "give", "options", "option",
+    "there",
+}
+
+# Equivalent product terms collapse to one spelling (applied after plural folding)
+SYNONYMS = {
+    "notebook": "laptop",
+    "mice": "mouse",
+    "cellphone": "phone",
+    "mobile": "phone",
+    "smartphone": "phone",
+    "earbud": "earphone",
+    "tv": "television",
+    "telly": "television",
+    "hdd": "hard drive",
+    "ssd": "solid state drive",
+}
+
+# Words the suffix rules would mangle: singulars that end like plurals
+# (-ss, -us, -is, -ies, -ses), pluralia tantum and brand names, which keep
+# their spelling, and irregular plurals, which map to their singular
+SINGULAR_EXCEPTIONS = {
+    # -ies / -ses / -ss / -us / -is singulars
+    "series": "series", "species": "species", "lens": "lens", "news": "news",
+    "glasses": "glasses", "sunglasses": "sunglasses", "eyeglasses": "eyeglasses",
+    "chassis": "chassis", "tennis": "tennis",
+    # -ies plurals of -ie words
+    "movies": "movie", "cookies": "cookie", "hoodies": "hoodie", "selfies": "selfie",
+    "zombies": "zombie", "calories": "calorie", "brownies": "brownie", "goalies": "goalie",
+    # -ses plurals of -s / -us words
+    "lenses": "lens", "buses": "bus", "gases": "gas", "bonuses": "bonus",
+    "viruses": "virus", "cactuses": "cactus", "statuses": "status", "campuses": "campus",
+    "bases": "base", "cases": "case", "vases": "vase", "purses": "purse", "houses": "house",
+    # Pluralia tantum
+    "pants": "pants", "jeans": "jeans", "shorts": "shorts", "trousers": "trousers",
+    "scissors": "scissors", "binoculars": "binoculars",
+    # Proper nouns
+    "adidas": "adidas", "philips": "philips", "levis": "levis", "vans": "vans",
+    "crocs": "crocs", "skechers": "skechers", "clarks": "clarks", "siemens": "siemens",
+    "havells": "havells", "hermes": "hermes", "mercedes": "mercedes", "windows": "windows",
+    "macos": "macos", "chromeos": "chromeos", "dickies": "dickies", "paris": "paris",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.-][a-z0-9]+)*")
+
+
+def _singular(token: str) -> str:
+    if token in SINGULAR_EXCEPTIONS:
+        return SINGULAR_EXCEPTIONS[token]
+    if token in SYNONYMS or len(token) <= 3 or token[-1].isdigit():
+        return token
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    if token.endswith(("ches", "shes", "xes", "sses")):
+        return token[:-2]
+    if token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+@lru_cache(maxsize=4096)
+def query_tokens(query: str) -> tuple:
+    """Canonical, de-duplicated, sorted tokens of a shopping query."""
+    tokens = set()
+    for raw in _TOKEN_RE.findall((query or "").lower()):
+        if raw in FILLER_WORDS:
+            continue
+        token = _singular(raw)
+        tokens.update(SYNONYMS.get(token, token).split())
+    return tuple(sorted(tokens))
+
+
+def search_text(query: str) -> str:
+    """The text sent to storefronts: the user's query, whitespace collapsed.
+
+    The canonical form is for keys only; its sorted, singularized tokens
+    ("sery x xbox") would be a different search on the live sites.
+    """
+    return " ".join((query or "").split())
+
+
+def canonicalize(query: str) -> str:
+    """Canonical form shared by caches and single-flight keys.
+
+    ``"search for mouse gaming and tell"`` and ``"Gaming Mice"`` both
+    become ``"gaming mouse"``. A query made only of filler words falls back
+    to its lowercased, whitespace-collapsed text.
+    """
+    tokens = query_tokens(query)
+    if tokens:
+        return " ".join(tokens)
+    return " ".join((query or "").lower().split())
+
+
+def cache_key(query: str) -> str:
+    """Key used for the product cache (same shape as the legacy keys)."""
+    return canonicalize(query).replace(" ", "_")
@@ -0,0 +1,146 @@
+# scrapers/rate_limit.py
+import asyncio
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+@dataclass
+class TokenBucket:
+    """Token bucket with AIMD slow-down.
+
+    ``rate`` is the sustained request rate (tokens/sec) and ``burst`` the
+    number of requests that may go out back-to-back after an idle period.
+    On 429/503 the rate is halved (down to ``min_rate``); each success
+    recovers a tenth of the base rate.
+    """
+
+    rate: float
+    burst: float
+    min_rate: float = 0.05
+    tokens: float = 0.0
+    updated: float = 0.0
+    base_rate: float = 0.0
+    blocked_until: float = 0.0
+    # stats
+    requests: int = 0
+    waited: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    penalties: int = 0
+
+    def __post_init__(self):
+        self.base_rate = self.base_rate or self.rate
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Take one token and return how long the caller must wait for it.
+
+        Tokens may go negative: later callers queue behind earlier reservations.
+        """
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= 1
+        wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+        wait = max(wait, self.blocked_until - now)
+
+        self.requests += 1
+        if wait > 0:
+            self.waited += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+        return wait
+
+    def penalize(self, retry_after: Optional[float] = None) -> None:
+        now = time.monotonic()
+        self._refill(now)
+        self.penalties += 1
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = min(self.tokens, 0.0)
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+
+    def reward(self) -> None:
+        if self.rate < self.base_rate:
+            self.rate = min(self.base_rate, self.rate + self.base_rate * 0.1)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "requests": self.requests,
+            "waited": self.waited,
+            "total_wait_s": round(self.total_wait, 3),
+            "avg_wait_s": round(self.total_wait / self.requests, 3) if self.requests else 0.0,
+            "max_wait_s": round(self.max_wait, 3),
+            "rate": round(self.rate, 3),
+            "penalties": self.penalties,
+        }
+
+
+class HostRateLimiter:
+    """Per-host token buckets shared by every scraper in the process.
+
+    State is guarded by a thread lock rather than an asyncio lock so the
+    limiter works regardless of which event loop the caller runs on.
+    """
+
+    def __init__(self, rate: float = 0.5, burst: float = 3.0):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "HostRateLimiter":
+        try:
+            rate = float(os.getenv("SCRAPER_RATE_PER_HOST", "0.5"))
+            burst = float(os.getenv("SCRAPER_BURST", "3"))
+        except Exception:
+            rate, burst = 0.5, 3.0
+        return cls(rate=rate, burst=burst)
+
+    def _bucket(self, host: str) -> TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(rate=self.rate, burst=self.burst)
+            self._buckets[host] = bucket
+        return bucket
+
+    async def acquire(self, host: str) -> float:
+        """Wait until a request to ``host`` is allowed. Returns the time waited."""
+        with self._lock:
+            wait = self._bucket(host).reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def penalize(self, host: str, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            self._bucket(host).penalize(retry_after)
+
+    def reward(self, host: str) -> None:
+        with self._lock:
+            self._bucket(host).reward()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {host: b.stats() for host, b in self._buckets.items()}
+
+
+host_limiter = HostRateLimiter.from_env()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header (HTTP-date values are ignored)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
@@ -0,0 +1,101 @@
+# scrapers/session.py
+import asyncio
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# One pooled session per event loop. aiohttp sessions are bound to the loop
+# they were created on, so callers that still spin up their own loops get
+# their own pool instead of a broken shared one.
+_sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+_lock = threading.Lock()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def _build_session() -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=_env_int("SCRAPER_POOL_LIMIT", 20),
+        limit_per_host=_env_int("SCRAPER_LIMIT_PER_HOST", 2),
+        ttl_dns_cache=_env_int("SCRAPER_DNS_TTL", 300),
+        keepalive_timeout=_env_float("SCRAPER_KEEPALIVE_TIMEOUT", 30.0),
+        enable_cleanup_closed=True,
+    )
+    # Per-request timeouts are passed to session.get(); this is only the default.
+    timeout = aiohttp.ClientTimeout(total=15)
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """Return the shared session for the running loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        session = _sessions.get(loop)
+        if session is None or session.closed:
+            session = _build_session()
+            _sessions[loop] = session
+            logger.info("Scraper HTTP session opened")
+        # Drop pools whose loop has gone away (e.g. asyncio.run() finished)
+        for other in [l for l in _sessions if l is not loop and l.is_closed()]:
+            _sessions.pop(other, None)
+    return session
+
+
+async def close_session() -> None:
+    """Close the shared session bound to the running loop, if any."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        session = _sessions.pop(loop, None)
+    if session is not None and not session.closed:
+        await session.close()
+        logger.info("Scraper HTTP session closed")
+
+
+def close_all_sessions() -> None:
+    """Synchronous shutdown hook (atexit, worker exit).
+
+    Sessions whose loop is still usable are closed on that loop; the rest are
+    simply dropped since their loop can no longer run the close coroutine.
+    """
+    with _lock:
+        items = list(_sessions.items())
+        _sessions.clear()
+    for loop, session in items:
+        if session.closed or loop.is_closed():
+            continue
+        try:
+            if loop.is_running():
+                asyncio.run_coroutine_threadsafe(session.close(), loop).result(timeout=5)
+            else:
+                loop.run_until_complete(session.close())
+        except Exception as e:
+            logger.warning(f"Failed to close scraper session: {e}")
+
+
+def run_with_session(coro):
+    """``asyncio.run`` for one-off scripts: closes the pooled session on the way out."""
+
+    async def _main():
+        try:
+            return await coro
+        finally:
+            await close_session()
+
+    return asyncio.run(_main())
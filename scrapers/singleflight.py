@@ -0,0 +1,91 @@
+# scrapers/singleflight.py
+import asyncio
+import concurrent.futures
+import copy
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key (the leader) starts the coroutine as its
+    own task; callers arriving while it is in flight wait for the same
+    result and get a deep copy of it, so one caller mutating its result
+    cannot affect another.
+
+    Every caller, the leader included, awaits the shared work through
+    ``asyncio.shield``: a caller that times out or is cancelled stops
+    waiting without cancelling the work for the others. If the work is
+    cancelled anyway (its event loop shut down), followers still waiting
+    start it again instead of failing.
+
+    The in-flight table holds ``concurrent.futures.Future`` objects rather
+    than asyncio futures so that callers on different threads/event loops
+    (gunicorn ``--threads``) can share one execution.
+    """
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self._inflight: Dict[Hashable, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        while True:
+            with self._lock:
+                future = self._inflight.get(key)
+                leader = future is None
+                if leader:
+                    future = concurrent.futures.Future()
+                    self._inflight[key] = future
+                    self.executions += 1
+                else:
+                    self.coalesced += 1
+
+            if leader:
+                try:
+                    task = asyncio.ensure_future(fn())
+                except BaseException as e:
+                    self._settle(key, future, e)
+                    raise
+                task.add_done_callback(lambda t, future=future: self._settle(key, future, t))
+                # shield: the leader's caller giving up must not cancel the followers' work
+                return await asyncio.shield(task)
+
+            try:
+                # shield: a cancelled follower must not cancel the leader's work
+                result = await asyncio.shield(asyncio.wrap_future(future))
+            except asyncio.CancelledError:
+                current = asyncio.current_task()
+                if future.cancelled() and not (current and current.cancelling()):
+                    continue  # the work was cancelled, this caller was not: run it again
+                raise
+            return copy.deepcopy(result)
+
+    def _settle(self, key: Hashable, future: concurrent.futures.Future, outcome: Any) -> None:
+        """Publish the finished task (or the error starting it) and free the key."""
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        if isinstance(outcome, BaseException):
+            future.set_exception(outcome)
+        elif outcome.cancelled():
+            future.cancel()
+        elif outcome.exception() is not None:
+            future.set_exception(outcome.exception())
+        else:
+            future.set_result(outcome.result())
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._inflight),
+            }
+
+
+# Shared by every scraper instance in the process, keyed by (source, query)
+search_flight = SingleFlight("scraper.search")
@@ -0,0 +1,219 @@
+import heapq
+import logging
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+
+from scrapers.query_normalizer import query_tokens
+
+logger = logging.getLogger(__name__)
+
+# Real words a query token may be a near-miss of without being a typo
+# ("chain" / "chair", "skirt" / "shirt"); the index adds every token of the
+# queries it holds. A token found here must match a cached token exactly.
+KNOWN_WORDS = frozenset(query_tokens("""
+    mouse keyboard headphone earphone speaker monitor laptop tablet phone television
+    charger cable adapter stand lamp light bulb chair desk table sofa bed mattress
+    pillow blanket curtain rug mat router camera lens tripod microphone printer
+    scanner projector drive watch band ring chain necklace bracelet earring bag
+    backpack wallet purse case cover sleeve bottle flask mug cup glass plate bowl
+    pan pot kettle toaster mixer blender oven fridge fan heater cooler purifier
+    shirt skirt dress top tshirt jacket coat sweater hoodie jeans pants shorts
+    trousers sock shoe sneaker sandal slipper boot heel cap hat glove scarf belt
+    book pen pencil notebook marker toy game puzzle doll ball bat racket battle
+    royale helmet bicycle bike cycle car tyre tire battery power bank solar
+    office gaming running walking wireless wired bluetooth mechanical portable
+    smart digital electric noise cancelling external internal hard solid state
+    red blue green black white pink yellow grey gray brown purple orange silver gold
+    steel iron wood wooden plastic leather cotton silk wool glass metal
+    men women kid boy girl baby small large mini pro max plus ultra
+"""))
+
+
+def embed(query, ngram=3):
+    """Offline sparse embedding of a query: ``{feature: weight}``, L2-normalised.
+
+    Features are character n-grams of the canonical tokens (``#mouse#``
+    -> ``#mo``, ``mou``, ...), so word order, plurals and synonyms are
+    already folded and misspellings still overlap.
+    """
+    features = defaultdict(float)
+    for token in query_tokens(query):
+        padded = f"#{token}#"
+        for i in range(max(1, len(padded) - ngram + 1)):
+            features[padded[i:i + ngram]] += 1.0
+    norm = math.sqrt(sum(w * w for w in features.values()))
+    if not norm:
+        return {}
+    return {f: w / norm for f, w in features.items()}
+
+
+def _edit_distance(a, b, limit):
+    """Optimal string alignment distance, or ``limit + 1`` once it exceeds ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2, prev = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        row = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            row[j] = min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                row[j] = min(row[j], prev2[j - 2] + 1)
+        if min(row) > limit:
+            return limit + 1
+        prev2, prev = prev, row
+    return prev[-1]
+
+
+def _same_token(asked, cached, known=KNOWN_WORDS):
+    """Equal, or ``asked`` is a plausible misspelling of ``cached``.
+
+    A misspelling is an unknown word (not in ``known``) with the same
+    first letter, no digits and 1-2 edits.
+    """
+    if asked == cached:
+        return True
+    a, b = asked, cached
+    if a in known or a[0] != b[0] or any(ch.isdigit() for ch in a + b):
+        return False
+    shortest = min(len(a), len(b))
+    limit = 2 if shortest >= 9 else 1 if shortest >= 5 else 0
+    return limit > 0 and _edit_distance(a, b, limit) <= limit
+
+
+def tokens_align(query, other, known=KNOWN_WORDS):
+    """True if every token of each query has a counterpart in the other.
+
+    This is what keeps superset queries apart: ``wireless mouse pad`` is
+    close to ``wireless mouse`` in embedding space but is a different
+    product. Only tokens of ``query`` (the one being asked) that are not
+    ``known`` words may match ``other``'s by edit distance, so ``gaming
+    chain`` never aligns with ``gaming chair``.
+    """
+    a, b = query_tokens(query), query_tokens(other)
+    if len(a) != len(b):
+        return False
+    return (all(any(_same_token(x, y, known) for y in b) for x in a)
+            and all(any(_same_token(x, y, known) for x in a) for y in b))
+
+
+class _Vocabulary:
+    """``KNOWN_WORDS`` plus the words of the indexed queries, without copying either."""
+
+    __slots__ = ("indexed",)
+
+    def __init__(self, indexed):
+        self.indexed = indexed
+
+    def __contains__(self, token):
+        return token in KNOWN_WORDS or token in self.indexed
+
+
+class SemanticQueryIndex:
+    """Nearest previously answered query, by cosine similarity.
+
+    An inverted index (feature -> {key: weight}) means a lookup only
+    scores entries sharing at least one n-gram with the query. The best
+    candidates at or above ``threshold`` are then checked with
+    ``tokens_align``, so numbers (models, budgets) must match exactly:
+    ``iphone 14`` never answers ``iphone 15``. The tokens of indexed
+    queries join ``KNOWN_WORDS``: a query using a word the index has seen
+    is not treated as a misspelling of a different one.
+    """
+
+    def __init__(self, threshold=0.7, candidates=5):
+        self.threshold = threshold
+        self.candidates = candidates
+        self._vectors = {}
+        self._queries = {}
+        self._postings = defaultdict(dict)
+        self._vocabulary = Counter()
+        self._lock = threading.Lock()
+        # stats
+        self.lookups = 0
+        self.hits = 0
+        self.embed_seconds = 0.0
+        self.lookup_seconds = 0.0
+
+    def __len__(self):
+        return len(self._vectors)
+
+    def add(self, key, query):
+        vector = embed(query)
+        if not vector:
+            return
+        with self._lock:
+            self._remove(key)
+            self._vectors[key] = vector
+            self._queries[key] = query
+            self._vocabulary.update(query_tokens(query))
+            for feature, weight in vector.items():
+                self._postings[feature][key] = weight
+
+    def remove(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key):
+        vector = self._vectors.pop(key, None)
+        query = self._queries.pop(key, None)
+        for token in query_tokens(query) if query is not None else ():
+            self._vocabulary[token] -= 1
+            if self._vocabulary[token] <= 0:
+                del self._vocabulary[token]
+        for feature in vector or ():
+            bucket = self._postings.get(feature)
+            if bucket is not None:
+                bucket.pop(key, None)
+                if not bucket:
+                    del self._postings[feature]
+
+    def nearest(self, query):
+        """Return ``(key, similarity)`` of the best match, or ``None``."""
+        started = time.perf_counter()
+        vector = embed(query)
+        embedded = time.perf_counter()
+        best = None
+        with self._lock:
+            scores = defaultdict(float)
+            for feature, weight in vector.items():
+                for key, other in self._postings.get(feature, {}).items():
+                    scores[key] += weight * other
+            ranked = heapq.nlargest(self.candidates, scores.items(), key=lambda kv: kv[1])
+            known = _Vocabulary(self._vocabulary)
+            for key, score in ranked:
+                if score < self.threshold:
+                    break
+                if tokens_align(query, self._queries[key], known):
+                    best = (key, score)
+                    break
+            self.lookups += 1
+            self.hits += best is not None
+            self.embed_seconds += embedded - started
+            self.lookup_seconds += time.perf_counter() - embedded
+        return best
+
+    def stats(self):
+        lookups = self.lookups
+        return {
+            "entries": len(self._vectors),
+            "vocabulary": len(self._vocabulary),
+            "threshold": self.threshold,
+            "lookups": lookups,
+            "hits": self.hits,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "avg_embed_ms": round(self.embed_seconds * 1000 / lookups, 4) if lookups else 0.0,
+            "avg_lookup_ms": round(self.lookup_seconds * 1000 / lookups, 4) if lookups else 0.0,
+        }
+
+    @classmethod
+    def from_storage(cls, storage, threshold=0.7):
+        """Index every query already in the product cache."""
+        index = cls(threshold)
+        for key, query in storage.cache_queries():
+            index.add(key, query or key.replace("_", " "))
+        logger.info(f"Semantic cache: indexed {len(index)} cached queries")
+        return index
+
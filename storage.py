@@ -0,0 +1,350 @@
+import os
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from interaction_log import InteractionLog
+from user_shards import shard_of
+
+logger = logging.getLogger(__name__)
+
+
+def interaction_log_dir(history_file):
+    return os.path.join(os.path.dirname(os.path.abspath(history_file)), 'interactions')
+
+
+class StorageBackend:
+    """Persistence used by ``DatabaseManager`` for the product cache and
+    the interaction log.
+
+    A cache entry is ``{"documents": [...], "metadata": {"timestamp", "query"}}``;
+    an interaction is ``{"id", "user_id", "role", "text", "ts"}``.
+    """
+
+    def get_cache_entry(self, key):  # pragma: no cover - interface
+        raise NotImplementedError
+
+    def put_cache_entry(self, key, entry):  # pragma: no cover - interface
+        raise NotImplementedError
+
+    def delete_cache_entry(self, key):  # pragma: no cover - interface
+        raise NotImplementedError
+
+    def touch_cache_entry(self, key):
+        """Record a read for LRU eviction (optional)."""
+
+    def cache_queries(self):  # pragma: no cover - interface
+        """``(key, query)`` for every cache entry."""
+        raise NotImplementedError
+
+    def cache_bytes(self):  # pragma: no cover - interface
+        raise NotImplementedError
+
+    def evict_cache(self, max_bytes):  # pragma: no cover - interface
+        """Drop least recently used entries until the cache fits; returns evicted keys."""
+        raise NotImplementedError
+
+    def append_interaction(self, record):  # pragma: no cover - interface
+        raise NotImplementedError
+
+    def recent_interactions(self, user_id, limit):  # pragma: no cover - interface
+        raise NotImplementedError
+
+
+class JSONStorage(StorageBackend):
+    """The original file layout.
+
+    The product cache is one JSON document rewritten on every write.
+    Interactions go to an append-only per-user ``InteractionLog`` in
+    ``interactions/`` next to ``history_file``; the legacy
+    ``user_history.json`` is imported once and then left untouched.
+    """
+
+    def __init__(self, cache_file, history_file):
+        self.cache_file = cache_file
+        self.history_file = history_file
+        self._lock = threading.Lock()
+        if not os.path.exists(self.cache_file):
+            with open(self.cache_file, 'w') as f:
+                json.dump({}, f)
+        self.interactions = InteractionLog.from_env(interaction_log_dir(history_file))
+        self.interactions.import_json_history(self.history_file)
+
+    def _read(self, path, default):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except Exception:
+            return default
+
+    def _write(self, path, data):
+        try:
+            with open(path, 'w') as f:
+                json.dump(data, f, indent=2)
+        except Exception as e:
+            logger.error(f"Storage write error ({os.path.basename(path)}): {e}")
+
+    def get_cache_entry(self, key):
+        return self._read(self.cache_file, {}).get(key)
+
+    def put_cache_entry(self, key, entry):
+        # The lock only serializes threads of this process
+        with self._lock:
+            all_cache = self._read(self.cache_file, {})
+            all_cache[key] = entry
+            self._write(self.cache_file, all_cache)
+
+    def delete_cache_entry(self, key):
+        with self._lock:
+            all_cache = self._read(self.cache_file, {})
+            if all_cache.pop(key, None) is not None:
+                self._write(self.cache_file, all_cache)
+
+    def cache_queries(self):
+        return [(k, v.get("metadata", {}).get("query")) for k, v in self._read(self.cache_file, {}).items()]
+
+    def cache_bytes(self):
+        try:
+            return os.path.getsize(self.cache_file)
+        except OSError:
+            return 0
+
+    def evict_cache(self, max_bytes):
+        # No access times in this format: oldest timestamp goes first
+        if self.cache_bytes() <= max_bytes:
+            return []
+        with self._lock:
+            all_cache = self._read(self.cache_file, {})
+            sizes = {k: len(json.dumps(v, indent=2)) for k, v in all_cache.items()}
+            total = sum(sizes.values())
+            evicted = []
+            for key in sorted(all_cache, key=lambda k: all_cache[k].get("metadata", {}).get("timestamp", "")):
+                if total <= max_bytes:
+                    break
+                total -= sizes[key]
+                del all_cache[key]
+                evicted.append(key)
+            self._write(self.cache_file, all_cache)
+        return evicted
+
+    def append_interaction(self, record):
+        self.interactions.append(record)
+
+    def recent_interactions(self, user_id, limit):
+        return self.interactions.tail(user_id, limit)
+
+
+class SQLiteStorage(StorageBackend):
+    """SQLite in WAL mode: indexed tables and row-level writes.
+
+    WAL lets readers proceed while a writer commits, and ``busy_timeout``
+    makes concurrent writers (gunicorn threads and workers) wait for the
+    lock instead of failing. Each thread gets its own connection.
+
+    Interactions are sharded by user: ``interaction_shards`` database
+    files (``interactions-<n>.sqlite3``, ``INTERACTION_SHARDS``) next to
+    the main one, picked by a hash of the user ID, so users in different
+    shards never wait on each other's write lock.
+    """
+
+    SHARD_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS interactions (
+            id       TEXT PRIMARY KEY,
+            user_id  TEXT NOT NULL,
+            role     TEXT NOT NULL,
+            text     TEXT NOT NULL,
+            ts       TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_interactions_user_ts ON interactions (user_id, ts);
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS cache_entries (
+            key        TEXT PRIMARY KEY,
+            query      TEXT,
+            documents  TEXT NOT NULL,
+            timestamp  TEXT NOT NULL,
+            size_bytes INTEGER NOT NULL DEFAULT 0,
+            last_access REAL NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS interactions (
+            id       TEXT PRIMARY KEY,
+            user_id  TEXT NOT NULL,
+            role     TEXT NOT NULL,
+            text     TEXT NOT NULL,
+            ts       TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_interactions_user_ts ON interactions (user_id, ts);
+        CREATE TABLE IF NOT EXISTS meta (
+            key    TEXT PRIMARY KEY,
+            value  TEXT
+        );
+    """
+
+    def __init__(self, db_path, interaction_shards=None):
+        self.db_path = db_path
+        self.interaction_shards = interaction_shards or int(os.getenv("INTERACTION_SHARDS", "8"))
+        directory = os.path.dirname(os.path.abspath(db_path))
+        self.shard_paths = [
+            os.path.join(directory, f"interactions-{n}.sqlite3") for n in range(self.interaction_shards)
+        ]
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(self.SCHEMA)
+            self._upgrade(conn)
+        for path in self.shard_paths:
+            with self._conn(path) as conn:
+                conn.executescript(self.SHARD_SCHEMA)
+        self._shard_interactions()
+
+    def _upgrade(self, conn):
+        """Add columns introduced after the first release of this schema."""
+        columns = {r["name"] for r in conn.execute("PRAGMA table_info(cache_entries)")}
+        if "size_bytes" not in columns:
+            conn.execute("ALTER TABLE cache_entries ADD COLUMN size_bytes INTEGER NOT NULL DEFAULT 0")
+            conn.execute("UPDATE cache_entries SET size_bytes = length(documents)")
+        if "last_access" not in columns:
+            conn.execute("ALTER TABLE cache_entries ADD COLUMN last_access REAL NOT NULL DEFAULT 0")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache_entries (last_access)")
+
+    def _conn(self, path=None):
+        path = path or self.db_path
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+        conn = conns.get(path)
+        if conn is None:
+            conn = sqlite3.connect(path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            conns[path] = conn
+        return conn
+
+    def _shard_conn(self, user_id):
+        return self._conn(self.shard_paths[shard_of(user_id, self.interaction_shards)])
+
+    def _insert_interactions(self, records):
+        """``(id, user_id, role, text, ts)`` rows into their users' shards."""
+        by_shard = {}
+        for row in records:
+            by_shard.setdefault(shard_of(row[1], self.interaction_shards), []).append(row)
+        for shard, rows in by_shard.items():
+            with self._conn(self.shard_paths[shard]) as conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO interactions (id, user_id, role, text, ts) VALUES (?, ?, ?, ?, ?)", rows
+                )
+
+    def _shard_interactions(self):
+        """Move interactions written before sharding out of the main database (once)."""
+        conn = self._conn()
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'interactions_sharded'").fetchone():
+            return
+        rows = [tuple(r) for r in conn.execute("SELECT id, user_id, role, text, ts FROM interactions")]
+        self._insert_interactions(rows)
+        with conn:
+            conn.execute("DELETE FROM interactions")
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('interactions_sharded', '1')")
+        if rows:
+            logger.info(f"Moved {len(rows)} interactions into {self.interaction_shards} per-user shards")
+
+    def get_cache_entry(self, key):
+        row = self._conn().execute(
+            "SELECT query, documents, timestamp FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "documents": json.loads(row["documents"]),
+            "metadata": {"timestamp": row["timestamp"], "query": row["query"]},
+        }
+
+    def put_cache_entry(self, key, entry):
+        meta = entry.get("metadata", {})
+        documents = json.dumps(entry.get("documents", []))
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, query, documents, timestamp, size_bytes, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, meta.get("query"), documents, meta.get("timestamp", ""), len(documents), time.time()),
+            )
+
+    def delete_cache_entry(self, key):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def touch_cache_entry(self, key):
+        with self._conn() as conn:
+            conn.execute("UPDATE cache_entries SET last_access = ? WHERE key = ?", (time.time(), key))
+
+    def cache_queries(self):
+        return [tuple(r) for r in self._conn().execute("SELECT key, query FROM cache_entries")]
+
+    def cache_bytes(self):
+        return self._conn().execute("SELECT COALESCE(SUM(size_bytes), 0) FROM cache_entries").fetchone()[0]
+
+    def evict_cache(self, max_bytes):
+        total = self.cache_bytes()
+        if total <= max_bytes:
+            return []
+        evicted = []
+        for row in self._conn().execute("SELECT key, size_bytes FROM cache_entries ORDER BY last_access ASC"):
+            if total <= max_bytes:
+                break
+            total -= row["size_bytes"]
+            evicted.append(row["key"])
+        with self._conn() as conn:
+            conn.executemany("DELETE FROM cache_entries WHERE key = ?", [(k,) for k in evicted])
+        return evicted
+
+    def append_interaction(self, record):
+        with self._shard_conn(record["user_id"]) as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO interactions (id, user_id, role, text, ts) VALUES (?, ?, ?, ?, ?)",
+                (record["id"], record["user_id"], record["role"], record["text"], record["ts"]),
+            )
+
+    def recent_interactions(self, user_id, limit):
+        rows = self._shard_conn(user_id).execute(
+            "SELECT id, user_id, role, text, ts FROM interactions WHERE user_id = ? ORDER BY ts DESC LIMIT ?",
+            (user_id, limit),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    def migrate_from_json(self, cache_file, history_file):
+        """One-shot import of the legacy JSON stores; a no-op once done."""
+        conn = self._conn()
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+            return False
+
+        def _load(path, default):
+            try:
+                with open(path, 'r') as f:
+                    return json.load(f)
+            except Exception:
+                return default
+
+        cache = _load(cache_file, {}) if os.path.exists(cache_file) else {}
+        history = _load(history_file, []) if os.path.exists(history_file) else []
+        # Interactions written by the json backend since it moved to the log
+        log_dir = interaction_log_dir(history_file)
+        if os.path.isdir(log_dir):
+            history.extend(InteractionLog(log_dir).records())
+        with conn:
+            for key, entry in cache.items():
+                meta = entry.get("metadata", {})
+                documents = json.dumps(entry.get("documents", []))
+                conn.execute(
+                    "INSERT OR IGNORE INTO cache_entries (key, query, documents, timestamp, size_bytes) VALUES (?, ?, ?, ?, ?)",
+                    (key, meta.get("query"), documents, meta.get("timestamp", ""), len(documents)),
+                )
+            self._insert_interactions([
+                (h.get("id"), h.get("user_id", ""), h.get("role", "user"), h.get("text", ""), h.get("ts", ""))
+                for h in history if h.get("id")
+            ])
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', '1')")
+        logger.info(f"Migrated {len(cache)} cache entries and {len(history)} interactions to SQLite")
+        return True
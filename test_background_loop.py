@@ -0,0 +1,60 @@
+import asyncio
+import threading
+
+import pytest
+
+from background_loop import BackgroundLoop
+
+
+def test_runs_coroutines_from_many_threads_on_one_loop():
+    bg = BackgroundLoop()
+    loops = []
+
+    async def whoami():
+        await asyncio.sleep(0.01)
+        return asyncio.get_running_loop()
+
+    def worker():
+        loops.append(bg.run(whoami(), timeout=5))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(loops) == 8 and all(l is bg.loop for l in loops)
+    bg.shutdown()
+    assert not bg.is_alive()
+
+
+def test_timeout_cancels_the_coroutine():
+    bg = BackgroundLoop()
+    cancelled = threading.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(TimeoutError):
+        bg.run(slow(), timeout=0.05)
+    assert cancelled.wait(1)
+    bg.shutdown()
+
+
+def test_shutdown_lets_background_tasks_finish():
+    bg = BackgroundLoop()
+    finished = threading.Event()
+
+    async def fill_cache():
+        await asyncio.sleep(0.05)
+        finished.set()
+
+    async def start_background():
+        asyncio.ensure_future(fill_cache())
+
+    bg.run(start_background(), timeout=1)
+    bg.shutdown(timeout=2)
+    assert finished.is_set()
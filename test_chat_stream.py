@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+from agent import ShoppingAgent
+
+
+class FakeModels:
+    def __init__(self, pieces, fail_after=None):
+        self.pieces, self.fail_after = pieces, fail_after
+
+    def generate_content_stream(self, **kwargs):
+        for i, piece in enumerate(self.pieces):
+            if self.fail_after is not None and i == self.fail_after:
+                raise RuntimeError("stream dropped")
+            yield SimpleNamespace(text=piece)
+
+
+def _agent(tmp_path, monkeypatch, pieces, fail_after=None):
+    monkeypatch.setenv("STORAGE_PATH", str(tmp_path))
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    agent = ShoppingAgent()
+    agent.gemini_ready = True
+    agent.model_name = "fake"
+    agent.genai_client = SimpleNamespace(models=FakeModels(pieces, fail_after))
+    return agent
+
+
+def test_chunks_are_yielded_as_generated_and_logged_once(tmp_path, monkeypatch):
+    agent = _agent(tmp_path, monkeypatch, ["Try the ", "Logitech M185."])
+    stream = agent.chat_stream("mouse")
+    assert next(stream) == "Try the "
+    assert agent.db_manager.get_recent_interactions("current_user") == []
+    assert list(stream) == ["Logitech M185."]
+
+    log = agent.db_manager.get_recent_interactions("current_user")
+    assert sorted(e["text"] for e in log) == ["Try the Logitech M185.", "mouse"]
+
+
+def test_chat_still_returns_the_joined_response(tmp_path, monkeypatch):
+    agent = _agent(tmp_path, monkeypatch, ["a", "b", "c"])
+    assert agent.chat("mouse") == "abc"
+
+
+def test_failure_before_first_chunk_streams_fallback(tmp_path, monkeypatch):
+    agent = _agent(tmp_path, monkeypatch, ["never"], fail_after=0)
+    out = list(agent.chat_stream("mouse"))
+    assert len(out) == 1 and out[0].startswith("[AUTO RESPONSE - LLM unavailable]")
+
+
+def test_sse_route_streams_deltas(tmp_path, monkeypatch):
+    import app as app_module
+
+    agent = _agent(tmp_path, monkeypatch, ["Hello", " there"])
+    monkeypatch.setattr(app_module, "agent", agent)
+    resp = app_module.app.test_client().post("/chat/stream", data={"user_input": "mouse"})
+    body = resp.get_data(as_text=True)
+    assert resp.mimetype == "text/event-stream"
+    assert 'data: {"delta": "Hello"}' in body and 'data: {"delta": " there"}' in body
+    assert body.rstrip().endswith("event: done\ndata: {}")
@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+from scrapers.base import AsyncECommerceScraper
+from scrapers import circuit_breaker
+from scrapers.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, LatencyTracker, get_breaker
+
+
+def test_opens_after_threshold_and_half_opens_after_cooldown():
+    breaker = CircuitBreaker("Amazon", failure_threshold=2, cooldown=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()          # the single probe
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()      # everyone else still short-circuits
+    breaker.record_failure()        # probe failed: re-open, longer cool-down
+    assert breaker.state == OPEN and breaker.cooldown == 0.1
+
+    time.sleep(0.11)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.cooldown == 0.05
+
+
+def test_timeout_follows_observed_latency():
+    latency = LatencyTracker(min_samples=3, multiplier=2.0, min_timeout=1.0, max_timeout=15.0)
+    assert latency.timeout() == 15.0
+    for s in (0.8, 1.0, 1.2, 0.9):
+        latency.record(s)
+    assert latency.timeout() == 2.4
+    latency.record_timeout(2.4)
+    assert latency.timeout() > 2.4
+
+
+class BlockedScraper(AsyncECommerceScraper):
+    source = "test-blocked"
+
+    def __init__(self):
+        self.network_calls = 0
+
+    async def _search(self, query):
+        self.network_calls += 1
+        return []
+
+    def _fallback_items(self, query):
+        return [{"title": "Demo", "price": 1.0, "url": "demo://1"}]
+
+
+def test_open_circuit_skips_network_and_serves_fallback():
+    scraper = BlockedScraper()
+    get_breaker(scraper.source).failure_threshold = 2
+
+    async def _run():
+        return [await scraper.search(f"q{i}") for i in range(4)]
+
+    try:
+        results = asyncio.run(_run())
+    finally:
+        # Registries are process-wide: keep this source out of other tests and breaker_stats()
+        circuit_breaker._breakers.pop(scraper.source, None)
+        circuit_breaker._latencies.pop(scraper.source, None)
+    assert scraper.network_calls == 2
+    assert all(r[0]["title"] == "Demo" and r[0]["source"] == "test-blocked" for r in results)
+    assert all(r[0]["fallback"] for r in results)
+    assert "test-blocked" not in circuit_breaker.breaker_stats()
+
+
+class HangingScraper(AsyncECommerceScraper):
+    source = "test-hanging"
+
+    def __init__(self):
+        self.network_calls = 0
+
+    async def _search(self, query):
+        self.network_calls += 1
+        await asyncio.sleep(10)
+
+
+def test_cancelled_half_open_probe_lets_the_next_caller_probe():
+    scraper = HangingScraper()
+    breaker = get_breaker(scraper.source)
+    breaker.cooldown = 0
+    breaker.state, breaker.opened_at = OPEN, time.monotonic()
+
+    async def _run():
+        try:
+            await asyncio.wait_for(scraper._guarded_search("q"), timeout=0.05)
+        except asyncio.TimeoutError:
+            pass
+
+    try:
+        asyncio.run(_run())
+        assert breaker.state == HALF_OPEN and not breaker._probe_in_flight
+        assert breaker.allow()  # the next caller gets to probe
+    finally:
+        circuit_breaker._breakers.pop(scraper.source, None)
+        circuit_breaker._latencies.pop(scraper.source, None)
+    assert scraper.network_calls == 1
+
+
+if __name__ == "__main__":
+    test_opens_after_threshold_and_half_opens_after_cooldown()
+    test_timeout_follows_observed_latency()
+    test_open_circuit_skips_network_and_serves_fallback()
+    test_cancelled_half_open_probe_lets_the_next_caller_probe()
+    print("✅ Circuit breaker OK")
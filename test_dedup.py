@@ -0,0 +1,79 @@
+import json
+import math
+
+from dedup import ProductClusters, merge_duplicates, same_title, title_tokens
+from price_tracker import PriceTracker
+
+
+def _same(a, b):
+    return same_title(title_tokens(a), title_tokens(b))
+
+
+def test_same_title_rules():
+    assert _same("Logitech M185 Wireless Mouse", "Logitech M185 Wireless Mouse, 2.4GHz with USB Nano Receiver, Grey")
+    assert _same("logitech m185 wireless mice", "Logitech Wireless Mouse M185")
+    assert not _same("HP 15s 12th Gen i5 Laptop (16GB/512GB SSD)", "HP 15s 12th Gen i3 Laptop (16GB/512GB SSD)")
+    assert not _same("Logitech M185 Wireless Mouse", "Logitech M221 Wireless Mouse")
+    assert not _same("Wireless Mouse", "Logitech M185 Wireless Mouse")
+
+
+def test_merge_keeps_cheapest_listing_per_product():
+    products = [
+        {"title": "Logitech M185 Wireless Mouse", "price": 799.0, "currency": "INR", "source": "Amazon", "url": "a"},
+        {"title": "Logitech M221 Wireless Mouse", "price": 749.0, "currency": "INR", "source": "Flipkart", "url": "f"},
+        {"title": "Logitech M185 Wireless Mouse (Grey)", "price": 9.5, "currency": "USD", "source": "eBay", "url": "e"},
+        {"title": "Logitech M185 Wireless Mouse - Refurbished lot", "price": 99.0, "currency": "USD", "source": "eBay", "url": "lot"},
+    ]
+    # Prices already in one currency (INR at 80/USD)
+    merged = merge_duplicates(products, [799.0, 749.0, 760.0, 7920.0])
+    assert [p["url"] for p in merged] == ["e", "f", "lot"]
+    assert merged[0]["also_at"] == [{"source": "Amazon", "price": 799.0, "currency": "INR", "url": "a"}]
+    assert "also_at" not in merged[1]
+    assert products[2].get("also_at") is None  # inputs are not modified
+
+
+def test_merge_with_unknown_prices():
+    products = [{"title": "Dell MS116 Wired Optical Mouse", "url": str(i)} for i in range(3)]
+    merged = merge_duplicates(products, [math.nan, 349.0, math.nan])
+    assert [p["url"] for p in merged] == ["1"] and len(merged[0]["also_at"]) == 2
+
+
+def test_clusters_persist_and_link_new_listings(tmp_path):
+    clusters = ProductClusters(str(tmp_path / "clusters.sqlite3"))
+    assigned = clusters.assign([
+        ("amazon/1", "Logitech M185 Wireless Mouse", 9.6),
+        ("flipkart/1", "Logitech M221 Wireless Mouse", 9.0),
+    ])
+    assert assigned == {"amazon/1": "amazon/1", "flipkart/1": "flipkart/1"}
+
+    reopened = ProductClusters(str(tmp_path / "clusters.sqlite3"))
+    assert reopened.assign([("ebay/9", "Logitech M185 Wireless Mouse, Grey", 9.5)]) == {"ebay/9": "amazon/1"}
+    assert reopened.assign([("ebay/10", "Logitech M185 Wireless Mouse", 30.0)]) == {"ebay/10": "ebay/10"}
+    assert reopened.members("ebay/9") == ["amazon/1", "ebay/9"]
+    assert reopened.members("unknown") == ["unknown"]
+    assert reopened.stats() == {"items": 4, "clusters": 3}
+
+
+def test_tracker_links_tracked_items_into_clusters(tmp_path):
+    tracker = PriceTracker(str(tmp_path / "price_history.json"))
+    tracker.track_many([
+        {"url": "amazon://demo/logitech-m185", "title": "Logitech M185 Wireless Mouse", "price": 799.0, "currency": "INR", "source": "Amazon"},
+        {"url": "https://www.ebay.com/itm/123456789", "title": "Logitech M185 Wireless Mouse Grey", "price": 9.99, "currency": "USD", "source": "eBay"},
+        {"url": "flipkart://demo/dell-ms116", "title": "Dell MS116 Wired Optical Mouse", "price": 349.0, "currency": "INR", "source": "Flipkart"},
+    ])
+    assert tracker.cluster_members("https://www.ebay.com/itm/123456789") == [
+        "amazon://demo/logitech-m185", "https://www.ebay.com/itm/123456789",
+    ]
+    exported = json.loads(open(tracker.export_json(str(tmp_path / "export.json"))).read())["tracked_items"]
+    assert exported["https://www.ebay.com/itm/123456789"]["cluster"] == "amazon://demo/logitech-m185"
+    assert exported["flipkart://demo/dell-ms116"]["cluster"] == "flipkart://demo/dell-ms116"
+
+
+def test_track_item_links_into_clusters(tmp_path):
+    tracker = PriceTracker(str(tmp_path / "price_history.json"))
+    tracker.track_item(None, "amazon://demo/logitech-m185", "Logitech M185 Wireless Mouse", 799.0, "INR", "Amazon")
+    tracker.track_item(None, "https://www.ebay.com/itm/123456789", "Logitech M185 Wireless Mouse Grey", 9.99, "USD", "eBay")
+    assert tracker.cluster_members("amazon://demo/logitech-m185") == [
+        "amazon://demo/logitech-m185", "https://www.ebay.com/itm/123456789",
+    ]
+    assert list(tracker.store.prices("amazon://demo/logitech-m185")) == [799.0]
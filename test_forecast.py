@@ -0,0 +1,98 @@
+import datetime
+import random
+import sqlite3
+
+import numpy as np
+import pytest
+
+import forecast
+from price_store import ColumnarPriceStore, JSONPriceStore, rolling_state
+from price_tracker import PriceTracker
+
+DAY = datetime.date(2025, 1, 1)
+
+
+def legacy_forecast(history):
+    """The original per-item rules, applied to a full price list."""
+    if len(history) < 2:
+        return "🆕 New Item: collecting data..."
+    latest_price, prev_price = history[-1], history[-2]
+    if latest_price < prev_price:
+        drop_pct = ((prev_price - latest_price) / prev_price) * 100
+        if drop_pct > 20:
+            return f"🔥 FIRE DEAL: Dropped {drop_pct:.1f}%!"
+        return f"📉 Price Drop: Down {drop_pct:.1f}% (Buy Now)"
+    if latest_price > prev_price:
+        return "📈 Price Rising: Wait (Was cheaper recently)"
+    prices = history[-30:]
+    if latest_price < (sum(prices) / len(prices)) * 0.95:
+        return "✅ Good Deal: 5% below monthly average."
+    return "➡️ Price Stable: Monitor for drops."
+
+
+def _random_series(rng, n):
+    price, series = rng.choice([99.0, 1499.0, 52990.0]), []
+    for _ in range(n):
+        roll = rng.random()
+        if roll < 0.4:
+            price = round(price * rng.uniform(0.7, 1.2), 2)
+        series.append(price)
+    if n >= 2 and rng.random() < 0.3:
+        series[-1] = series[-2]  # unchanged today: exercises the 30-point average rule
+    return series
+
+
+@pytest.mark.parametrize("kind", ["columnar", "json"])
+def test_batch_advice_matches_legacy_rules(tmp_path, kind):
+    rng = random.Random(3)
+    store = ColumnarPriceStore(str(tmp_path / "cols")) if kind == "columnar" else JSONPriceStore(str(tmp_path / "h.json"))
+    tracker = PriceTracker(str(tmp_path / "h.json"), store=store)
+    series = {f"item{i}": _random_series(rng, rng.randint(0, 70)) for i in range(60)}
+    # Incremental appends, crossing block relocations and the 30-point window
+    for d in range(70):
+        store.append_many([
+            (url, DAY + datetime.timedelta(days=d), prices[d], url, "INR", "Amazon")
+            for url, prices in series.items() if d < len(prices)
+        ])
+    urls = list(series) + ["untracked"]
+    assert tracker.get_forecasts(urls) == [legacy_forecast(series.get(u, [])) for u in urls]
+    assert tracker.get_forecast("item5") == legacy_forecast(series["item5"])
+
+
+def test_signals_match_full_recomputation(tmp_path):
+    store = ColumnarPriceStore(str(tmp_path))
+    prices = [100.0 + (d % 9) * 3 - d * 0.5 for d in range(50)]
+    for d, price in enumerate(prices):
+        store.append("a", DAY + datetime.timedelta(days=d), price)
+
+    tracker = PriceTracker(str(tmp_path / "h.json"), store=store)
+    (signals,) = tracker.get_signals(["a"])
+    window = prices[-30:]
+    assert signals["length"] == 50
+    assert signals["mean"] == pytest.approx(sum(window) / 30)
+    assert signals["slope"] == pytest.approx(np.polyfit(np.arange(20, 50), window, 1)[0])
+    assert signals["ema"] == pytest.approx(rolling_state(prices)["ema"])
+    assert signals["delta_pct"] == pytest.approx((prices[-1] - prices[-2]) / prices[-2] * 100)
+
+
+def test_compute_signals_handles_empty_and_untracked():
+    signals = forecast.compute_signals([None, rolling_state([5.0])])
+    assert signals["length"].tolist() == [0, 1]
+    assert signals["slope"].tolist() == [0.0, 0.0]
+    assert forecast.advice(signals) == [forecast.NEW_ITEM, forecast.NEW_ITEM]
+    assert forecast.advice(forecast.compute_signals([])) == []
+
+
+def test_store_without_aggregates_is_upgraded(tmp_path):
+    store = ColumnarPriceStore(str(tmp_path))
+    for d, price in enumerate([10.0, 12.0, 9.0]):
+        store.append("a", DAY + datetime.timedelta(days=d), price)
+    store.close()
+    conn = sqlite3.connect(str(tmp_path / "index.sqlite3"))
+    for column in ("last_price", "prev_price", "win_sum", "win_xy", "ema"):
+        conn.execute(f"ALTER TABLE items DROP COLUMN {column}")
+    conn.commit()
+    conn.close()
+
+    reopened = ColumnarPriceStore(str(tmp_path))
+    assert reopened.rolling_stats(["a"])["a"] == rolling_state([10.0, 12.0, 9.0])
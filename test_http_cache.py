@@ -0,0 +1,118 @@
+import asyncio
+import time
+
+from aiohttp import web
+
+import scrapers.base as base
+from scrapers.base import BaseScraper
+from scrapers.http_cache import HTTPCache
+from scrapers.parsing import strainer
+from scrapers.session import close_session
+
+
+def _serve(handler):
+    app = web.Application()
+    app.router.add_get("/s", handler)
+    return app
+
+
+def test_fresh_hit_then_etag_revalidation(tmp_path, monkeypatch):
+    cache = HTTPCache(str(tmp_path))
+    monkeypatch.setattr(base, "http_cache", cache)
+    monkeypatch.delenv("HTTP_PROXY", raising=False)
+    monkeypatch.delenv("HTTPS_PROXY", raising=False)
+    calls = []
+
+    async def handler(request):
+        calls.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304)
+        return web.Response(text="<html>results</html>", headers={"ETag": '"v1"'})
+
+    async def _run():
+        runner = web.AppRunner(_serve(handler))
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        url = f"http://127.0.0.1:{port}/s"
+        scraper = BaseScraper()
+        try:
+            first = await scraper.fetch_text(url)
+            second = await scraper.fetch_text(url)  # fresh: no request
+            scraper.cache_ttl = 0
+            third = await scraper.fetch_text(url)  # stale: 304
+            bypass = await scraper.fetch_text(url, use_cache=False)
+        finally:
+            await close_session()
+            await runner.cleanup()
+        return first, second, third, bypass
+
+    first, second, third, bypass = asyncio.run(_run())
+    assert first == second == third == bypass == "<html>results</html>"
+    assert calls == [None, '"v1"', None]
+    stats = cache.stats()
+    assert (stats["misses"], stats["hits"], stats["revalidated"]) == (1, 1, 1)
+
+
+def test_size_bound_evicts_least_recently_used(tmp_path):
+    cache = HTTPCache(str(tmp_path))
+    body = "x" * 50_000  # compresses to well under 1 KB
+    for i in range(3):
+        cache.put(f"https://example.com/{i}", body + str(i))
+        time.sleep(0.01)
+    per_entry = cache.bytes_used() // 3
+    cache.max_bytes = int(per_entry * 2.5)
+    cache.mark_used("https://example.com/0")
+    cache.put("https://example.com/3", body + "3")
+    assert cache.get("https://example.com/0") is not None
+    assert cache.get("https://example.com/1") is None
+    assert cache.bytes_used() <= cache.max_bytes
+    assert cache.stats()["evictions"] >= 1
+
+
+def test_block_pages_are_not_cached(tmp_path, monkeypatch):
+    cache = HTTPCache(str(tmp_path))
+    monkeypatch.setattr(base, "http_cache", cache)
+    monkeypatch.delenv("HTTP_PROXY", raising=False)
+    monkeypatch.delenv("HTTPS_PROXY", raising=False)
+    pages = {
+        "blocked": "<html><h4>Enter the characters you see below</h4><form action='/errors/validateCaptcha'></form></html>",
+        "empty": "<html><p>Sorry, we just need to make sure you're not a bot.</p></html>",
+        "results": "<html><div class='result'>Mouse</div></html>",
+    }
+
+    async def handler(request):
+        return web.Response(text=pages[request.query["page"]])
+
+    async def _run():
+        runner = web.AppRunner(_serve(handler))
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        url = f"http://127.0.0.1:{port}/s?page="
+        scraper = BaseScraper()
+        cards = strainer("div", classes=("result",))
+        try:
+            await scraper.fetch_text(url + "blocked")
+            await scraper.fetch(url + "empty", parse_only=cards)
+            soup = await scraper.fetch(url + "results", parse_only=cards)
+        finally:
+            await close_session()
+            await runner.cleanup()
+        return url, soup
+
+    url, soup = asyncio.run(_run())
+    assert soup.select_one("div.result").text == "Mouse"
+    assert cache.get(url + "blocked") is None
+    assert cache.get(url + "empty") is None
+    assert cache.get(url + "results") is not None
+
+
+def test_cache_can_be_disabled_from_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("HTTP_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("HTTP_CACHE_ENABLED", "false")
+    assert HTTPCache.from_env().enabled is False
+    monkeypatch.delenv("HTTP_CACHE_ENABLED")
+    assert HTTPCache.from_env().enabled is True
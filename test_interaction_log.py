@@ -0,0 +1,94 @@
+import json
+import multiprocessing
+import os
+
+from interaction_log import InteractionLog
+
+
+def _rec(user, i):
+    return {"id": f"{user}:{i}", "user_id": user, "role": "user", "text": f"msg {i}", "ts": f"2025-01-01T00:00:{i:02d}"}
+
+
+def test_tail_is_newest_first_per_user(tmp_path):
+    log = InteractionLog(str(tmp_path))
+    for i in range(10):
+        log.append(_rec("u1", i))
+        log.append(_rec("u2", i))
+    assert [r["text"] for r in log.tail("u1", 3)] == ["msg 9", "msg 8", "msg 7"]
+    assert len(log.tail("u2", 50)) == 10
+    assert log.tail("nobody", 5) == []
+
+
+def test_rollover_and_tail_across_segments(tmp_path):
+    log = InteractionLog(str(tmp_path), segment_bytes=300, max_segments=100)
+    for i in range(20):
+        log.append(_rec("u1", i))
+    user_dir = log._user_dir("u1")
+    assert len(log._segments(user_dir)) > 3
+    assert [r["id"] for r in log.tail("u1", 20)] == [f"u1:{i}" for i in reversed(range(20))]
+
+
+def test_tail_only_reads_the_newest_segment(tmp_path):
+    log = InteractionLog(str(tmp_path), segment_bytes=300, max_segments=100)
+    for i in range(20):
+        log.append(_rec("u1", i))
+    user_dir = log._user_dir("u1")
+    oldest = log._paths(user_dir, log._segments(user_dir)[0])[0]
+    with open(oldest, "wb") as f:
+        f.write(b"garbage")
+    assert log.tail("u1", 1)[0]["id"] == "u1:19"
+
+
+def test_compaction_keeps_newest_records(tmp_path):
+    log = InteractionLog(str(tmp_path), segment_bytes=300, max_segments=3, retain=5)
+    for i in range(40):
+        log.append(_rec("u1", i))
+    user_dir = log._user_dir("u1")
+    assert len(log._segments(user_dir)) <= 3
+    records = log.tail("u1", 100)
+    assert records[0]["id"] == "u1:39"
+    assert [r["id"] for r in records] == sorted((r["id"] for r in records), key=lambda k: -int(k.split(":")[1]))
+
+
+def test_torn_write_is_repaired_on_restart(tmp_path):
+    log = InteractionLog(str(tmp_path))
+    for i in range(3):
+        log.append(_rec("u1", i))
+    data_path = log._paths(log._user_dir("u1"), 1)[0]
+    with open(data_path, "ab") as f:
+        f.write(b'{"id": "u1:torn", "user_')
+
+    restarted = InteractionLog(str(tmp_path))
+    restarted.append(_rec("u1", 3))
+    assert [r["id"] for r in restarted.tail("u1", 10)] == ["u1:3", "u1:2", "u1:1", "u1:0"]
+
+
+def test_legacy_history_imported_once(tmp_path):
+    history = tmp_path / "user_history.json"
+    history.write_text(json.dumps([_rec("u1", 2), _rec("u1", 1), _rec("u2", 1)]))
+    log = InteractionLog(str(tmp_path / "interactions"))
+    assert log.import_json_history(str(history)) is True
+    assert [r["id"] for r in log.tail("u1", 5)] == ["u1:2", "u1:1"]
+    assert log.import_json_history(str(history)) is False
+    assert sorted(r["id"] for r in log.records()) == ["u1:1", "u1:2", "u2:1"]
+    assert os.path.exists(history)
+
+
+def _import(directory, history, start):
+    start.wait()
+    InteractionLog(directory).import_json_history(history)
+
+
+def test_workers_starting_together_import_once(tmp_path):
+    history = tmp_path / "user_history.json"
+    history.write_text(json.dumps([_rec(f"u{i % 5}", i) for i in range(500)]))
+    directory = str(tmp_path / "interactions")
+    ctx = multiprocessing.get_context("fork")
+    start = ctx.Event()
+    workers = [ctx.Process(target=_import, args=(directory, str(history), start)) for _ in range(4)]
+    for w in workers:
+        w.start()
+    start.set()
+    for w in workers:
+        w.join()
+    assert len(list(InteractionLog(directory).records())) == 500
@@ -0,0 +1,183 @@
+import asyncio
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+
+from agent import ShoppingAgent
+from leases import FileLock, ScrapeLeases
+from price_tracker import PriceTracker
+
+
+def test_lease_is_exclusive_until_released_or_expired(tmp_path):
+    path = str(tmp_path / "leases.sqlite3")
+    first, second = ScrapeLeases(path, ttl=10), ScrapeLeases(path, ttl=10)
+    assert first.acquire("mouse", now=100)
+    assert not second.acquire("mouse", now=101)
+    second.release("mouse")  # not the holder: no-op
+    assert second.held("mouse", now=101)
+    first.release("mouse")
+    assert second.acquire("mouse", now=102)
+    # A holder that never releases loses the lease after ttl
+    assert first.acquire("mouse", now=113)
+    assert first.stats()["taken_over"] == 1
+    assert second.stats()["contended"] == 1
+
+
+def test_wait_returns_when_released_or_times_out(tmp_path):
+    path = str(tmp_path / "leases.sqlite3")
+    holder, waiter = ScrapeLeases(path, ttl=10), ScrapeLeases(path, ttl=10, poll=0.01)
+    holder.acquire("mouse")
+    assert asyncio.run(waiter.wait("mouse", timeout=0.05)) is False
+    threading.Timer(0.05, holder.release, args=("mouse",)).start()
+    assert asyncio.run(waiter.wait("mouse", timeout=5)) is True
+    assert waiter.stats()["wait_timeouts"] == 1
+
+
+def _increment(path, times):
+    lock = FileLock(path + ".lock")
+    for _ in range(times):
+        with lock:
+            with open(path) as f:
+                value = int(f.read())
+            time.sleep(0.001)
+            with open(path, "w") as f:
+                f.write(str(value + 1))
+
+
+def test_file_lock_serializes_processes(tmp_path):
+    path = str(tmp_path / "counter")
+    with open(path, "w") as f:
+        f.write("0")
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_increment, args=(path, 30)) for _ in range(3)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    with open(path) as f:
+        assert int(f.read()) == 90
+
+
+def _track(data_file, worker):
+    tracker = PriceTracker(data_file)
+    for i in range(20):
+        tracker.track_many([{"url": f"shop://w{worker}/{i}", "title": "Item", "price": 10.0 + i, "currency": "INR"}])
+
+
+def test_json_tracker_writes_from_several_processes_are_kept(tmp_path, monkeypatch):
+    monkeypatch.setenv("PRICE_STORE", "json")
+    data_file = str(tmp_path / "price_history.json")
+    PriceTracker(data_file)
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_track, args=(data_file, w)) for w in range(3)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    assert len(PriceTracker(data_file).store) == 60
+
+
+class CountingScraper:
+    calls = 0
+
+    async def search(self, query):
+        CountingScraper.calls += 1
+        await asyncio.sleep(0.2)
+        return [{"title": "Logitech M185 mouse", "price": 799.0, "currency": "INR",
+                 "source": "Amazon", "url": "amazon://demo/m185", "score": 1.0}]
+
+
+def test_second_worker_reads_the_first_workers_scrape(tmp_path, monkeypatch):
+    monkeypatch.setenv("STORAGE_PATH", str(tmp_path))
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    CountingScraper.calls = 0
+    workers = [ShoppingAgent(), ShoppingAgent()]  # one per gunicorn worker
+    for agent in workers:
+        agent.scrapers = {"Amazon": CountingScraper()}
+        agent.scrape_leases.poll = 0.01
+
+    async def _run():
+        return await asyncio.gather(*(agent.search_online_async("wireless mouse") for agent in workers))
+
+    first, second = asyncio.run(_run())
+    assert CountingScraper.calls == 1
+    assert [p["url"] for p in first] == [p["url"] for p in second] == ["amazon://demo/m185"]
+    # Either worker may win the lease; the other waits for its results
+    assert sorted(agent.scrape_leases.stats()["contended"] for agent in workers) == [0, 1]
+    assert not workers[0].scrape_leases.held("wireless mouse")
+
+
+def _worker_agent(tmp_path, monkeypatch, scraper):
+    monkeypatch.setenv("STORAGE_PATH", str(tmp_path))
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    agent = ShoppingAgent()
+    agent.scrapers = {"Amazon": scraper}
+    agent.scrape_leases.poll = 0.01
+    return agent
+
+
+def test_waiter_never_scrapes_while_another_worker_holds_the_lease(tmp_path, monkeypatch):
+    CountingScraper.calls = 0
+    agent = _worker_agent(tmp_path, monkeypatch, CountingScraper())
+    other = ScrapeLeases(agent.scrape_leases.path, ttl=10)
+    assert other.acquire("mouse wireless")
+
+    assert asyncio.run(agent.search_online_async("wireless mouse", deadline=0.1)) == []
+    assert CountingScraper.calls == 0
+    # The holder finished without caching anything: the next search scrapes
+    other.release("mouse wireless")
+    assert asyncio.run(agent.search_online_async("wireless mouse", deadline=1))
+    assert CountingScraper.calls == 1
+
+
+def test_cancelled_scrape_releases_its_lease(tmp_path, monkeypatch):
+    agent = _worker_agent(tmp_path, monkeypatch, CountingScraper())
+
+    async def _run():
+        task = asyncio.ensure_future(agent._scrape_and_rank("wireless mouse"))
+        await asyncio.sleep(0.05)
+        assert agent.scrape_leases.held("mouse wireless")
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(_run())
+    assert not agent.scrape_leases.held("mouse wireless")
+
+
+def test_caller_giving_up_leaves_the_scrape_to_finish(tmp_path, monkeypatch):
+    agent = _worker_agent(tmp_path, monkeypatch, CountingScraper())
+
+    async def _run():
+        try:
+            await asyncio.wait_for(agent.search_online_async("wireless mouse"), timeout=0.05)
+        except asyncio.TimeoutError:
+            pass
+        assert agent.scrape_leases.held("mouse wireless")
+        while agent.search_flight.stats()["in_flight"]:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(_run())
+    assert not agent.scrape_leases.held("mouse wireless")
+    assert agent.db_manager.get_cached_results("wireless mouse")
+
+
+def test_busy_lease_table_does_not_block_the_event_loop(tmp_path, monkeypatch):
+    agent = _worker_agent(tmp_path, monkeypatch, CountingScraper())
+    blocker = sqlite3.connect(agent.scrape_leases.path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")  # another worker mid-transaction
+    ticks = []
+
+    async def ticker():
+        while len(ticks) < 20:
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.01)
+        blocker.execute("COMMIT")
+
+    async def _run():
+        results, _ = await asyncio.gather(agent.search_online_async("wireless mouse", deadline=2), ticker())
+        return results
+
+    assert asyncio.run(_run())
+    assert len(ticks) == 20
@@ -0,0 +1,33 @@
+from scrapers.amazon import AmazonScraper
+from scrapers.ebay import EbayScraper
+from scrapers.flipkart import FlipkartScraper
+from scrapers.parsing import parse_html
+
+PAGE = """
+<html><body>
+<script>var noise = 1;</script>
+<ul class="nav"><li class="nav-item">Deals</li></ul>
+<div data-component-type="s-search-result"><h2><a class="a-link-normal" href="/dp/1">Mouse A</a></h2></div>
+<li class="s-item s-item--large"><h3 class="s-item__title">Mouse B</h3></li>
+<div class="_1AtVbE col-12"><div class="_4ddWXP"><a class="s1Q9rs" href="/p/2">Mouse C</a></div></div>
+</body></html>
+"""
+
+
+def test_strainers_keep_only_result_cards():
+    amazon = parse_html(PAGE, AmazonScraper.result_strainer)
+    assert len(amazon.select("div[data-component-type='s-search-result']")) == 1
+    assert not amazon.select("script")
+
+    # multi-class elements must still match
+    ebay = parse_html(PAGE, EbayScraper.result_strainer)
+    assert [li.select_one("h3").text for li in ebay.select("li.s-item")] == ["Mouse B"]
+    assert not ebay.select("li.nav-item")
+
+    flipkart = parse_html(PAGE, FlipkartScraper.result_strainer)
+    assert flipkart.select_one("div._4ddWXP a.s1Q9rs").text == "Mouse C"
+
+
+if __name__ == "__main__":
+    test_strainers_keep_only_result_cards()
+    print("✅ Parsing OK")
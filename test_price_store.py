@@ -0,0 +1,169 @@
+import asyncio
+import datetime
+import json
+import sys
+import threading
+
+import pytest
+
+from price_store import ColumnarPriceStore, JSONPriceStore
+from price_tracker import PriceTracker
+
+DAY = datetime.date(2025, 1, 1)
+
+
+def _legacy(n_items=3, n_points=5):
+    return {"tracked_items": {
+        f"amazon://demo/{i}": {
+            "title": f"Item {i}", "url": f"amazon://demo/{i}", "currency": "INR", "source": "Amazon",
+            "history": [{"date": (DAY + datetime.timedelta(days=d)).isoformat(), "price": 100.0 + i + d} for d in range(n_points)],
+        }
+        for i in range(n_items)
+    }}
+
+
+def test_json_roundtrip(tmp_path):
+    store = ColumnarPriceStore(str(tmp_path))
+    data = _legacy()
+    assert store.import_json(data) == 3
+    assert store.import_json(data) == 0
+    assert store.export_json() == data
+
+
+def test_blocks_grow_and_keep_order(tmp_path):
+    store = ColumnarPriceStore(str(tmp_path))
+    for d in range(40):
+        assert store.append("a", DAY + datetime.timedelta(days=d), float(d), "A", "USD", "eBay")
+        store.append("b", DAY + datetime.timedelta(days=d), -float(d))
+    dates, prices = store.series("a")
+    assert list(prices) == [float(d) for d in range(40)]
+    assert dates[0] == DAY.toordinal() and dates[-1] == DAY.toordinal() + 39
+    assert list(store.prices("b", last=3)) == [-37.0, -38.0, -39.0]
+    assert store.stats()["points"] == 80
+
+
+def test_reads_during_appends_that_grow_the_files(tmp_path):
+    store = ColumnarPriceStore(str(tmp_path))
+    store.append("seed", DAY, 1.0)
+    held = store.prices_column._map  # what a reader may be slicing when the file grows
+    errors, done = [], threading.Event()
+
+    def reader():
+        try:
+            while not done.is_set():
+                assert list(store.prices("seed")) == [1.0]
+                store.series("seed")
+                store.get("seed")
+        except Exception as e:
+            errors.append(e)
+
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    switch = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # switch threads often enough to land inside a remap
+    for t in readers:
+        t.start()
+    try:
+        # 8 slots per new item: the columns grow (and are remapped) several times
+        for i in range(0, 3000, 10):
+            store.append_many([(f"item{j}", DAY, float(j)) for j in range(i, i + 10)])
+    finally:
+        done.set()
+        for t in readers:
+            t.join()
+        sys.setswitchinterval(switch)
+    assert errors == []
+    assert held is not store.prices_column._map and held[:8] == store.prices_column._map[:8]
+    assert store.dates.capacity >= 3001 * ColumnarPriceStore.INITIAL_CAPACITY
+    assert list(store.prices("item2999")) == [2999.0]
+
+
+def test_one_point_per_day(tmp_path):
+    store = ColumnarPriceStore(str(tmp_path))
+    assert store.append("a", DAY, 10.0)
+    assert not store.append("a", DAY, 9.0)
+    assert not store.append("a", DAY - datetime.timedelta(days=1), 9.0)
+    assert list(store.prices("a")) == [10.0]
+
+
+def test_reopen_sees_persisted_data(tmp_path):
+    store = ColumnarPriceStore(str(tmp_path))
+    store.import_json(_legacy(n_points=20))
+    store.append("amazon://demo/0", DAY + datetime.timedelta(days=30), 1.0)
+    store.close()
+    reopened = ColumnarPriceStore(str(tmp_path))
+    assert len(reopened) == 3
+    assert list(reopened.prices("amazon://demo/0", last=2)) == [119.0, 1.0]
+    assert reopened.get("missing") is None and len(reopened.prices("missing")) == 0
+
+
+def test_concurrent_appends(tmp_path):
+    store = ColumnarPriceStore(str(tmp_path))
+
+    def worker(w):
+        for d in range(30):
+            store.append(f"item{w}", DAY + datetime.timedelta(days=d), float(w * 100 + d))
+
+    threads = [threading.Thread(target=worker, args=(w,)) for w in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for w in range(6):
+        assert list(store.prices(f"item{w}")) == [float(w * 100 + d) for d in range(30)]
+
+
+@pytest.mark.parametrize("kind", ["columnar", "json"])
+def test_tracker_forecasts_match_across_stores(tmp_path, monkeypatch, kind):
+    monkeypatch.setenv("PRICE_STORE", kind)
+    data = _legacy()
+    data["tracked_items"]["amazon://demo/0"]["history"][-1]["price"] = 50.0
+    path = tmp_path / "price_history.json"
+    path.write_text(json.dumps(data))
+
+    tracker = PriceTracker(str(path))
+    assert tracker.get_forecast("amazon://demo/0").startswith("🔥 FIRE DEAL")
+    assert tracker.get_forecast("amazon://demo/1") == "📈 Price Rising: Wait (Was cheaper recently)"
+    assert tracker.get_forecast("new") == "🆕 New Item: collecting data..."
+    tracker.track_item(None, "new", "New", 10.0, "INR", "Amazon")
+    assert tracker.store.get("new")["history"][0]["price"] == 10.0
+
+
+@pytest.mark.parametrize("kind", ["columnar", "json"])
+def test_track_many_writes_one_batch(tmp_path, monkeypatch, kind):
+    monkeypatch.setenv("PRICE_STORE", kind)
+    tracker = PriceTracker(str(tmp_path / "price_history.json"))
+    calls = []
+    append_many = tracker.store.append_many
+    monkeypatch.setattr(tracker.store, "append_many", lambda points: calls.append(len(points)) or append_many(points))
+
+    products = [{"url": f"u{i}", "title": f"T{i}", "price": 10.0 + i, "currency": "INR", "source": "Amazon"} for i in range(15)]
+    products += [{"url": "#", "title": "no link", "price": 5.0}, {"url": "free", "title": "x", "price": 0}]
+    assert tracker.track_many(products) == 15
+    assert calls == [15]
+    assert tracker.track_many(products) == 0  # already tracked today
+    assert tracker.store.get("u3")["history"][0]["price"] == 13.0
+
+
+def test_track_many_in_background(tmp_path, monkeypatch):
+    monkeypatch.setenv("PRICE_TRACK_BACKGROUND", "true")
+    tracker = PriceTracker(str(tmp_path / "price_history.json"))
+    future = tracker.track_many([{"url": "u", "title": "T", "price": 1.0}])
+    assert future.result(timeout=5) == 1
+    tracker.flush()
+    assert list(tracker.store.prices("u")) == [1.0]
+
+
+def test_scan_all_records_one_batch(tmp_path, monkeypatch):
+    tracker = PriceTracker(str(tmp_path / "price_history.json"))
+    tracker.store.import_json(_legacy(n_items=4))
+    batches = []
+    track_many = tracker.track_many
+    monkeypatch.setattr(tracker, "track_many", lambda items, background=None: batches.append(len(items)) or track_many(items, background))
+
+    class FakeScraper:
+        async def search(self, title):
+            return [{"title": title, "price": 1.0, "currency": "INR"}]
+
+    assert asyncio.run(tracker.scan_all({"Amazon": FakeScraper()})) == 4
+    assert batches == [4]
+    assert tracker.store.prices("amazon://demo/2", last=1)[0] == 1.0
@@ -0,0 +1,63 @@
+import datetime
+
+import pytest
+
+from product_cache import LRUCache, TieredProductCache
+from storage import JSONStorage, SQLiteStorage
+
+
+def _entry(query, age_seconds=0, n=1):
+    ts = (datetime.datetime.now() - datetime.timedelta(seconds=age_seconds)).isoformat()
+    return {"documents": [{"title": f"{query} {i}", "price": 1.0} for i in range(n)], "metadata": {"timestamp": ts, "query": query}}
+
+
+def test_lru_keeps_most_recent():
+    lru = LRUCache(max_entries=2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    lru.get("a")
+    lru.put("c", 3)
+    assert lru.get("b") is None and lru.get("a") == 1 and len(lru) == 2
+
+
+@pytest.fixture(params=["sqlite", "json"])
+def storage(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteStorage(str(tmp_path / "storage.sqlite3"))
+    return JSONStorage(str(tmp_path / "cache.json"), str(tmp_path / "history.json"))
+
+
+def test_memory_tier_then_disk_tier(storage):
+    cache = TieredProductCache(storage, ttl_seconds=60)
+    cache.put("mouse", _entry("mouse"))
+    assert cache.get("mouse")["metadata"]["query"] == "mouse"
+    cache.memory.pop("mouse")
+    assert cache.get("mouse") is not None
+    assert cache.get("keyboard") is None
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["bytes_used"] > 0
+
+
+def test_expired_entries_are_misses_and_dropped(storage):
+    cache = TieredProductCache(storage, ttl_seconds=60)
+    storage.put_cache_entry("mouse", _entry("mouse", age_seconds=120))
+    assert cache.get("mouse") is None
+    assert storage.get_cache_entry("mouse") is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_sqlite_quota_evicts_least_recently_used(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "storage.sqlite3"))
+    cache = TieredProductCache(storage, ttl_seconds=60, quota_bytes=10**9)
+    for q in ("a", "b", "c"):
+        cache.put(q, _entry(q, n=20))
+    one = storage.cache_bytes() // 3
+    cache.memory.pop("a")
+    cache.get("a")  # disk hit refreshes last_access
+    cache.quota_bytes = int(one * 2.5)
+    cache.put("d", _entry("d", n=20))
+    assert storage.get_cache_entry("b") is None
+    assert storage.get_cache_entry("a") is not None
+    assert storage.cache_bytes() <= cache.quota_bytes
+    assert cache.stats()["evictions"] == 2
@@ -0,0 +1,86 @@
+import asyncio
+import datetime
+import os
+
+import pytest
+
+from price_tracker import PriceTracker
+from scrapers.amazon import AmazonScraper
+from scrapers.ebay import EbayScraper
+from scrapers.flipkart import FlipkartScraper
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def _page(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("scraper, page, expected", [
+    (AmazonScraper(), "amazon_product.html",
+     {"title": "Logitech M185 Wireless Mouse, 2.4GHz with USB Nano Receiver, Grey", "price": 799.0, "currency": "INR", "available": True}),
+    (AmazonScraper(), "amazon_product_unavailable.html",
+     {"title": "HP X1000 Wired Mouse", "price": 0.0, "currency": "INR", "available": False}),
+    (FlipkartScraper(), "flipkart_product.html",
+     {"title": "Logitech M221 Wireless Optical Mouse with Silent Buttons\xa0\xa0(2.4GHz Wireless, Charcoal)", "price": 749.0, "currency": "INR", "available": True}),
+    (FlipkartScraper(), "flipkart_product_sold_out.html",
+     {"title": "Dell MS116 Wired Optical Mouse\xa0\xa0(USB 2.0, Black)", "price": 0.0, "currency": "INR", "available": False}),
+    (EbayScraper(), "ebay_product.html",
+     {"title": "Logitech M510 Wireless Mouse - Black (910-001822)", "price": 24.99, "currency": "USD", "available": True}),
+    (EbayScraper(), "ebay_product_ended.html",
+     {"title": "Razer DeathAdder Essential Gaming Mouse", "price": 29.99, "currency": "USD", "available": False}),
+])
+def test_parse_product_page_fixtures(scraper, page, expected):
+    assert scraper.parse_product_page(_page(page)) == expected
+
+
+def test_pages_without_a_price_block_do_not_parse():
+    assert AmazonScraper().parse_product_page(_page("flipkart_product.html")) is None
+    assert EbayScraper().parse_product_page("<html><body>Robot check</body></html>") is None
+
+
+def test_product_urls():
+    assert AmazonScraper().is_product_url("https://www.amazon.in/Logitech-M185-Wireless/dp/B004IO5BMQ/ref=sr_1_1")
+    assert not AmazonScraper().is_product_url("amazon://demo/logitech-m185")
+    assert FlipkartScraper().is_product_url("https://www.flipkart.com/logitech-m221/p/itm8a6c4d6a3b8d1?pid=ACCX")
+    assert not FlipkartScraper().is_product_url("flipkart://demo/logitech-m221")
+    assert EbayScraper().is_product_url("https://www.ebay.com/itm/204351327744")
+    assert not EbayScraper().is_product_url("https://www.ebay.com/itm/demo-logitech-m510")
+
+
+class FixtureAmazon(AmazonScraper):
+    """Serves saved pages instead of the network."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.fetched = []
+        self.searched = []
+
+    async def _fetch_text(self, url, use_cache=True):
+        self.fetched.append(url)
+        return _page(self.pages[url]), None
+
+    async def search(self, query):
+        self.searched.append(query)
+        return [{"title": query, "price": 1.0, "currency": "INR", "source": "Amazon", "url": "amazon://demo/other"}]
+
+
+def test_scan_prefers_product_pages_for_real_urls(tmp_path):
+    live = "https://www.amazon.in/Logitech-M185/dp/B004IO5BMQ"
+    gone = "https://www.amazon.in/HP-X1000/dp/B00Z9WQ3T4"
+    tracker = PriceTracker(str(tmp_path / "price_history.json"))
+    day = datetime.date(2025, 1, 1)
+    tracker.store.append_many([
+        (live, day, 899.0, "Logitech M185", "INR", "Amazon"),
+        (gone, day, 399.0, "HP X1000 Wired Mouse", "INR", "Amazon"),
+        ("amazon://demo/hp-15s-i5", day, 52990.0, "HP 15s Laptop", "INR", "Amazon"),
+    ])
+    scraper = FixtureAmazon({live: "amazon_product.html", gone: "amazon_product_unavailable.html"})
+
+    assert asyncio.run(tracker.scan_all({"Amazon": scraper})) == 2
+    assert sorted(scraper.fetched) == sorted([live, gone])
+    assert scraper.searched == ["HP 15s Laptop"]
+    assert tracker.store.prices(live, last=1)[0] == 799.0
+    assert len(tracker.store.prices(gone)) == 1  # unavailable: no new point
+    assert tracker.last_scan["product_pages"] == 2 and tracker.last_scan["searches"] == 1
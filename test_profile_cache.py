@@ -0,0 +1,78 @@
+import json
+import os
+
+import tools
+from agent import ShoppingAgent
+from tools import MockAmazonConnector
+
+PROFILE = {"users": {"current_user": {"name": "Anish", "purchase_history": [], "liked_brands": ["Sony"]}}}
+
+
+def _connector(tmp_path, monkeypatch):
+    path = tmp_path / "mock_data.json"
+    path.write_text(json.dumps(PROFILE))
+    loads = []
+    real_load = json.load
+    monkeypatch.setattr(tools.json, "load", lambda f: loads.append(1) or real_load(f))
+    return MockAmazonConnector(str(path), profiles_dir=str(tmp_path / "profiles")), path, loads
+
+
+def _touch(path, data):
+    """Another process rewrites the file (mtime moves forward)."""
+    stat = os.stat(path)
+    path.write_text(json.dumps(data))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_reads_are_served_from_memory(tmp_path, monkeypatch):
+    connector, _, loads = _connector(tmp_path, monkeypatch)
+    for _ in range(5):
+        assert connector.get_user_data()["name"] == "Anish"
+    assert loads == [1]
+
+    # Callers cannot corrupt the cached copy
+    connector.get_user_data()["liked_brands"].append("HP")
+    assert connector.get_user_data()["liked_brands"] == ["Sony"]
+
+
+def test_external_change_invalidates_cache(tmp_path, monkeypatch):
+    connector, path, loads = _connector(tmp_path, monkeypatch)
+    version = connector.data_version()
+    data = json.loads(path.read_text())
+    data["users"]["current_user"]["name"] = "Ravi"
+    _touch(path, data)
+    assert connector.get_user_data()["name"] == "Ravi"
+    assert connector.data_version() != version
+
+
+def test_writes_are_atomic_and_update_cache(tmp_path, monkeypatch):
+    connector, path, loads = _connector(tmp_path, monkeypatch)
+    version = connector.data_version()
+    loads.clear()
+    assert connector.update_profile("purpose", "Gaming")
+    assert connector.simulate_purchase("Mouse", "Electronics", 799.0)
+    assert connector.get_user_data()["purpose"] == "Gaming"
+    assert loads == []  # own writes do not force a re-read
+    assert connector.data_version() != version
+    profile = connector.profile_path("current_user")
+    with open(profile) as f:
+        assert json.load(f)["purchase_history"][0]["price"] == 799.0
+    assert os.listdir(os.path.dirname(profile)) == [os.path.basename(profile)]
+    assert json.loads(path.read_text()) == PROFILE  # seed data is never rewritten
+
+
+def test_profile_string_is_memoized(tmp_path, monkeypatch):
+    monkeypatch.setenv("STORAGE_PATH", str(tmp_path))
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    agent = ShoppingAgent()
+    agent.connector, path, _ = _connector(tmp_path, monkeypatch)
+    renders = []
+    render = agent._render_profile
+    monkeypatch.setattr(agent, "_render_profile", lambda data: renders.append(1) or render(data))
+
+    first = agent.get_user_profile_str()
+    assert "Loves: Sony" in first
+    assert agent.get_user_profile_str() is first and len(renders) == 1
+
+    agent.connector.update_profile("liked_brands", ["Logitech"])
+    assert "Loves: Logitech" in agent.get_user_profile_str() and len(renders) == 2
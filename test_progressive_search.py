@@ -0,0 +1,120 @@
+import asyncio
+import sqlite3
+
+from agent import ShoppingAgent
+from tools import DatabaseManager
+
+
+class FakeScraper:
+    def __init__(self, source, delay, price):
+        self.source, self.delay, self.price = source, delay, price
+
+    async def search(self, query):
+        await asyncio.sleep(self.delay)
+        return [{
+            "title": f"{self.source} mouse",
+            "price": self.price,
+            "currency": "INR",
+            "source": self.source,
+            "url": f"{self.source.lower()}://demo/mouse",
+            "score": 1.0,
+        }]
+
+
+def _agent(tmp_path, monkeypatch):
+    monkeypatch.setenv("STORAGE_PATH", str(tmp_path))
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    agent = ShoppingAgent()
+    agent.scrapers = {
+        "Amazon": FakeScraper("Amazon", 0.01, 799.0),
+        "Flipkart": FakeScraper("Flipkart", 0.05, 749.0),
+        "eBay": FakeScraper("eBay", 0.5, 2000.0),
+    }
+    return agent
+
+
+def test_progressive_yields_in_completion_order_and_fills_cache_later(tmp_path, monkeypatch):
+    agent = _agent(tmp_path, monkeypatch)
+
+    async def _run():
+        seen = [source async for source, _ in agent.search_progressive("wireless mouse", deadline=0.2)]
+        assert agent.db_manager.get_cached_results("wireless mouse") is None
+        await asyncio.gather(*agent._background)
+        return seen
+
+    seen = asyncio.run(_run())
+    assert seen == ["Amazon", "Flipkart"]
+    cached = agent.db_manager.get_cached_results("wireless mouse")
+    assert {p["source"] for p in cached} == {"Amazon", "Flipkart", "eBay"}
+
+
+def test_deadline_search_returns_partial_ranked_results(tmp_path, monkeypatch):
+    agent = _agent(tmp_path, monkeypatch)
+
+    async def _run():
+        results = await agent.search_online_async("wireless mouse", deadline=0.2)
+        await asyncio.gather(*agent._background)
+        return results
+
+    results = asyncio.run(_run())
+    assert [p["source"] for p in results] == ["Flipkart", "Amazon"]
+    assert all("trend" in p for p in results)
+
+
+def test_concurrent_deadline_searches_share_one_scrape(tmp_path, monkeypatch):
+    agent = _agent(tmp_path, monkeypatch)
+    calls = []
+    for scraper in agent.scrapers.values():
+        search = scraper.search
+
+        async def counted(query, search=search):
+            calls.append(query)
+            return await search(query)
+
+        scraper.search = counted
+
+    async def _run():
+        results = await asyncio.gather(*(agent.search_online_async("wireless mouse", deadline=0.2) for _ in range(3)))
+        partial = [dict(p) for p in results[0]]
+        await asyncio.gather(*agent._background)
+        return results, partial
+
+    results, partial = asyncio.run(_run())
+    assert len(calls) == 3  # one search per source, not per caller
+    assert results[0] == results[1] == results[2]
+    # Finalizing the full result set in the background leaves returned results alone
+    assert results[0] == partial
+    assert agent.search_flight.stats()["coalesced"] == 2
+
+
+def test_sync_wrapper_survives_a_cancelled_search(tmp_path, monkeypatch):
+    agent = _agent(tmp_path, monkeypatch)
+
+    async def cancelled(query, deadline=None):
+        raise asyncio.CancelledError
+
+    monkeypatch.setattr(agent, "search_online_async", cancelled)
+    assert agent.search_online_sync_wrapper("wireless mouse") == []
+    assert isinstance(agent.chat("find a wireless mouse"), str)
+
+
+def test_cache_lookup_does_not_block_the_event_loop(tmp_path, monkeypatch):
+    agent = _agent(tmp_path, monkeypatch)
+    # Written by another worker: this agent's memory tier misses and reads (and touches) the disk entry
+    DatabaseManager().cache_results("wireless mouse", [{"title": "Mouse", "price": 10.0, "url": "u"}])
+    blocker = sqlite3.connect(str(tmp_path / "storage.sqlite3"), isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")  # another worker mid-transaction
+    ticks = []
+
+    async def ticker():
+        while len(ticks) < 20:
+            ticks.append(1)
+            await asyncio.sleep(0.01)
+        blocker.execute("COMMIT")
+
+    async def _run():
+        results, _ = await asyncio.gather(agent.search_online_async("wireless mouse"), ticker())
+        return results
+
+    assert asyncio.run(_run())[0]["title"] == "Mouse"
+    assert len(ticks) == 20
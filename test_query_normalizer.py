@@ -0,0 +1,82 @@
+import asyncio
+
+from scrapers.amazon import AmazonScraper
+from scrapers.ebay import EbayScraper
+from scrapers.flipkart import FlipkartScraper
+from scrapers.query_normalizer import cache_key, canonicalize, search_text
+from tools import DatabaseManager
+
+
+def test_equivalent_queries_share_a_canonical_form():
+    assert canonicalize("search for mouse gaming and tell") == "gaming mouse"
+    assert canonicalize("Gaming   Mice") == "gaming mouse"
+    assert canonicalize("find me a notebook") == canonicalize("laptops") == "laptop"
+    assert canonicalize("wireless headphones") == canonicalize("Headphone wireless")
+
+
+def test_plurals_and_meaningful_tokens_survive():
+    assert canonicalize("batteries") == "battery"
+    assert canonicalize("watches") == "watch"
+    assert canonicalize("laptop under 50000") == "50000 laptop under"
+    assert canonicalize("usb-c hubs") == "hub usb-c"
+
+
+def test_singular_exceptions_keep_their_spelling():
+    assert canonicalize("xbox series x") == "series x xbox"
+    assert canonicalize("camera lens") == canonicalize("camera lenses") == "camera lens"
+    assert canonicalize("adidas shoes") == "adidas shoe"
+    assert canonicalize("reading glasses") == "glasses reading"
+    assert canonicalize("is there any good mouse") == "mouse"
+    assert canonicalize("horror movies") == "horror movie"
+    assert canonicalize("toy buses") == "bus toy"
+    assert canonicalize("philips trimmer") == "philips trimmer"
+    assert canonicalize("tennis balls") == "ball tennis"
+
+
+def test_filler_only_query_falls_back_to_text():
+    assert canonicalize("Find  me") == "find me"
+    assert cache_key("") == ""
+
+
+def test_database_manager_shares_cache_entries(tmp_path, monkeypatch):
+    monkeypatch.setenv("STORAGE_BACKEND", "sqlite")
+    db = DatabaseManager(persist_path=str(tmp_path))
+    db.cache_results("gaming mouse", [{"title": "Mouse", "price": 10.0}])
+    assert db.get_cached_results("search for mouse gaming and tell") == [{"title": "Mouse", "price": 10.0}]
+
+
+def test_scraper_fallback_uses_canonical_category():
+    items = AmazonScraper()._fallback_items("show me some notebooks")
+    assert items and items[0]["url"] == "amazon://demo/hp-15s-i5"
+
+
+def test_scraper_search_coalesces_equivalent_queries(monkeypatch):
+    calls = []
+
+    async def fake_search(self, query):
+        calls.append(query)
+        await asyncio.sleep(0.05)
+        return [{"title": "Mouse", "price": 1.0, "currency": "INR", "source": "Amazon", "url": "u"}]
+
+    monkeypatch.setattr(AmazonScraper, "_search", fake_search)
+    scraper = AmazonScraper()
+
+    async def main():
+        return await asyncio.gather(scraper.search("gaming mouse"), scraper.search("Gaming Mice"))
+
+    a, b = asyncio.run(main())
+    assert len(calls) == 1 and a == b
+
+
+def test_storefronts_get_the_users_words(monkeypatch):
+    urls = []
+
+    async def fake_fetch(self, url, parse_only=None, use_cache=True):
+        urls.append(url)
+        return None
+
+    for scraper in (AmazonScraper, FlipkartScraper, EbayScraper):
+        monkeypatch.setattr(scraper, "fetch", fake_fetch)
+        asyncio.run(scraper()._search("  Xbox   Series X "))
+    assert search_text("  Xbox   Series X ") == "Xbox Series X"
+    assert len(urls) == 3 and all("Xbox+Series+X" in url for url in urls)
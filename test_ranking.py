@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from ranking import FAIR_PRICE, GOOD_DEAL, HIGH_PRICE, FxRates, Ranker
+
+RATES = FxRates({"USD": 1.0, "INR": 80.0}, base="USD")
+
+
+def _product(price, currency="INR", score=1.0, title=None):
+    return {"title": title or f"{price} {currency}", "price": price, "currency": currency, "score": score}
+
+
+def legacy_trends(products):
+    """The original peer percentile: share of prices <= this one, on raw prices."""
+    prices = sorted(p['price'] for p in products if p['price'] > 0)
+    trends = []
+    for p in products:
+        rank = sum(1 for x in prices if x <= p['price']) / len(prices)
+        trends.append(GOOD_DEAL if rank <= 0.30 else HIGH_PRICE if rank >= 0.70 else FAIR_PRICE)
+    return trends
+
+
+def test_same_currency_matches_legacy_percentiles():
+    rng = random.Random(4)
+    products = [_product(float(rng.choice([99, 499, 799, 799, 1299, 2999, rng.randint(1, 5000)]))) for _ in range(300)]
+    expected = {id(p): t for p, t in zip(products, legacy_trends(products))}
+    ranked = Ranker(RATES).rank(products)
+    assert [p['trend'] for p in ranked] == [expected[id(p)] for p in ranked]
+    assert [p['price'] for p in ranked] == sorted(p['price'] for p in products)
+
+
+def test_prices_are_compared_in_one_currency():
+    products = [_product(2400.0, "INR", title="amazon"), _product(25.0, "USD", title="ebay"), _product(1600.0, "INR", title="flipkart")]
+    ranked = Ranker(RATES, currency="INR").rank(products)
+    # 25 USD = 2000 INR: between the two INR offers, not the cheapest by far
+    assert [p['title'] for p in ranked] == ["flipkart", "ebay", "amazon"]
+    assert [p['trend'] for p in ranked] == [FAIR_PRICE, FAIR_PRICE, HIGH_PRICE]
+    assert [p['title'] for p in Ranker(RATES, currency="USD").rank(products)] == ["flipkart", "ebay", "amazon"]
+
+
+def test_uncomparable_prices_sort_last_without_trend():
+    products = [
+        _product(0.0, score=0.5, title="no price"),
+        _product(10.0, "XYZ", title="unknown currency"),
+        _product(500.0, score=0.9, title="b"),
+        _product(500.0, score=1.0, title="a"),
+        _product(5.0, score=0.1, title="filtered"),
+    ]
+    ranked = Ranker(RATES).rank(products)
+    assert [p['title'] for p in ranked] == ["a", "b", "unknown currency", "no price"]
+    assert "trend" not in ranked[2] and "trend" not in ranked[3]
+    assert Ranker(RATES).rank([]) == []
+
+
+def test_rates_file(tmp_path):
+    path = tmp_path / "fx.json"
+    path.write_text('{"base": "USD", "rates": {"INR": 80, "EUR": 0.5}}')
+    rates = FxRates.from_file(str(path))
+    assert rates.convert([1.0, 160.0, 1.0], ["EUR", "inr", "USD"], "USD").tolist() == pytest.approx([2.0, 2.0, 1.0])
+    missing = FxRates.from_file(str(tmp_path / "missing.json"))
+    assert missing.convert([3.0], ["USD"], "USD").tolist() == [3.0]
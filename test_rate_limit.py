@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+from scrapers.rate_limit import HostRateLimiter, TokenBucket
+
+
+def test_burst_goes_out_without_waiting():
+    limiter = HostRateLimiter(rate=1.0, burst=3)
+
+    async def _run():
+        start = time.monotonic()
+        waits = [await limiter.acquire("www.amazon.in") for _ in range(3)]
+        return waits, time.monotonic() - start
+
+    waits, elapsed = asyncio.run(_run())
+    assert waits == [0.0, 0.0, 0.0]
+    assert elapsed < 0.1
+
+
+def test_bucket_waits_when_hammered_and_tracks_stats():
+    bucket = TokenBucket(rate=10.0, burst=1)
+    assert bucket.reserve() == 0.0
+    assert 0.05 < bucket.reserve() <= 0.1
+    stats = bucket.stats()
+    assert stats["requests"] == 2 and stats["waited"] == 1
+    assert stats["max_wait_s"] > 0
+
+
+def test_penalize_halves_rate_and_reward_recovers():
+    bucket = TokenBucket(rate=1.0, burst=2)
+    bucket.penalize()
+    assert bucket.rate == 0.5
+    bucket.penalize(retry_after=5)
+    assert bucket.reserve() >= 4.9
+    for _ in range(20):
+        bucket.reward()
+    assert bucket.rate == 1.0
+
+
+def test_hosts_are_independent():
+    limiter = HostRateLimiter(rate=1.0, burst=1)
+    limiter.penalize("www.ebay.com", retry_after=30)
+
+    async def _run():
+        return await limiter.acquire("www.flipkart.com")
+
+    assert asyncio.run(_run()) == 0.0
+    assert set(limiter.stats()) == {"www.ebay.com", "www.flipkart.com"}
+
+
+if __name__ == "__main__":
+    test_burst_goes_out_without_waiting()
+    test_bucket_waits_when_hammered_and_tracks_stats()
+    test_penalize_halves_rate_and_reward_recovers()
+    test_hosts_are_independent()
+    print("✅ Rate limiter OK")
@@ -0,0 +1,101 @@
+import asyncio
+import datetime
+
+from rescan_scheduler import DAY_SECONDS, RescanScheduler
+from price_tracker import PriceTracker
+
+NOW = 1_700_000_000.0
+
+
+def _scheduler(tmp_path):
+    return RescanScheduler(str(tmp_path / "schedule.sqlite3"), min_days=1, max_days=30, half_life_days=7)
+
+
+def test_unscheduled_items_are_due(tmp_path):
+    scheduler = _scheduler(tmp_path)
+    assert scheduler.due_times(["a"]) == {"a": 0.0}
+    assert scheduler.is_due(0.0, NOW)
+
+
+def test_stable_items_drift_out_and_volatile_ones_stay_daily(tmp_path):
+    scheduler = _scheduler(tmp_path)
+    now = NOW
+    for day in range(12):
+        now = NOW + day * DAY_SECONDS
+        scheduler.record_checks([("stable", 100.0, 100.0), ("volatile", 100.0, 100.0 + (-5) ** (day % 2))], now=now)
+    due = scheduler.due_times(["stable", "volatile"])
+    assert (due["volatile"] - now) / DAY_SECONDS == 1
+    assert (due["stable"] - now) / DAY_SECONDS > 10
+    assert not scheduler.is_due(due["stable"], now + DAY_SECONDS)
+
+
+def test_failed_lookups_keep_their_schedule(tmp_path):
+    scheduler = _scheduler(tmp_path)
+    scheduler.record_checks([("checked", 100.0, 100.0)], now=NOW)
+    before = scheduler.due_times(["checked"])
+    scheduler.record_checks([("checked", 100.0, None), ("never", None, None)], now=NOW + 5 * DAY_SECONDS)
+    assert scheduler.due_times(["checked", "never"]) == {**before, "never": 0.0}
+
+
+def test_interest_pulls_checks_forward_and_decays(tmp_path):
+    scheduler = _scheduler(tmp_path)
+    for day in range(15):
+        scheduler.record_checks([("a", 100.0, 100.0), ("b", 100.0, 100.0)], now=NOW + day * DAY_SECONDS)
+    now = NOW + 14 * DAY_SECONDS
+    before = scheduler.due_times(["a"])["a"]
+    scheduler.note_interest(["a", "a", "#"], now=now)
+    due = scheduler.due_times(["a", "b"])
+    assert due["a"] < before and due["a"] < due["b"]
+    assert scheduler.interval_days(0.0, 0.0) == 30
+    assert scheduler.stats(now)["items"] == 2
+
+    # A month later the interest has mostly worn off
+    later = now + 30 * DAY_SECONDS
+    scheduler.record_checks([("a", 100.0, 100.0)], now=later)
+    assert scheduler.due_times(["a"])["a"] - later > (before - now) * 0.5
+
+
+class CountingScraper:
+    def __init__(self):
+        self.calls = []
+
+    async def search(self, title):
+        self.calls.append(title)
+        return [{"title": title, "price": 42.0, "currency": "INR"}]
+
+
+def test_scan_all_searches_due_items_within_budget(tmp_path):
+    tracker = PriceTracker(str(tmp_path / "price_history.json"))
+    urls = [f"amazon://demo/{i}" for i in range(10)]
+    tracker.store.append_many([(u, datetime.date(2025, 1, 1), 40.0, f"product {i}", "INR", "Amazon") for i, u in enumerate(urls)])
+
+    scraper = CountingScraper()
+    assert asyncio.run(tracker.scan_all({"Amazon": scraper}, budget=4)) == 4
+    assert tracker.last_scan["due_groups"] == 10 and tracker.last_scan["deferred_groups"] == 6
+
+    # The deferred six come next; the four just checked are not due again yet
+    scraper.calls.clear()
+    asyncio.run(tracker.scan_all({"Amazon": scraper}, budget=0))
+    assert len(scraper.calls) == 6
+    assert tracker.last_scan["not_due_groups"] == 4
+
+    scraper.calls.clear()
+    assert asyncio.run(tracker.scan_all({"Amazon": scraper})) == 0
+    assert scraper.calls == []
+
+
+class FlakyScraper(CountingScraper):
+    async def search(self, title):
+        self.calls.append(title)
+        return [] if title == "product 0" else [{"title": title, "price": 42.0, "currency": "INR"}]
+
+
+def test_scan_all_retries_items_it_could_not_find(tmp_path):
+    tracker = PriceTracker(str(tmp_path / "price_history.json"))
+    urls = [f"amazon://demo/{i}" for i in range(3)]
+    tracker.store.append_many([(u, datetime.date(2025, 1, 1), 40.0, f"product {i}", "INR", "Amazon") for i, u in enumerate(urls)])
+
+    asyncio.run(tracker.scan_all({"Amazon": FlakyScraper()}))
+    scraper = CountingScraper()
+    asyncio.run(tracker.scan_all({"Amazon": scraper}))
+    assert scraper.calls == ["product 0"]
@@ -0,0 +1,115 @@
+import asyncio
+import datetime
+import json
+
+import pytest
+
+from price_tracker import PriceTracker
+
+DAY = datetime.date(2025, 1, 1)
+
+
+class Crash(BaseException):
+    """Stands in for the run being killed mid-scan."""
+
+
+class CountingScraper:
+    def __init__(self, fail_after=None):
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self.fail_after = fail_after
+
+    async def search(self, title):
+        if self.fail_after is not None and len(self.calls) >= self.fail_after:
+            raise Crash
+        self.calls.append(title)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return [{"title": title, "price": 42.0, "currency": "INR"}]
+
+
+def _tracker(tmp_path, titles):
+    tracker = PriceTracker(str(tmp_path / "price_history.json"))
+    tracker.store.append_many([
+        (f"amazon://demo/{i}", DAY, 100.0, title, "INR", "Amazon") for i, title in enumerate(titles)
+    ])
+    return tracker
+
+
+def test_items_with_equivalent_titles_share_one_search(tmp_path):
+    tracker = _tracker(tmp_path, ["Gaming Mice", "gaming mouse", "Mechanical Keyboard"])
+    scraper = CountingScraper()
+    assert asyncio.run(tracker.scan_all({"Amazon": scraper})) == 3
+    assert len(scraper.calls) == 2
+    assert tracker.last_scan["items"] == 3 and tracker.last_scan["searches"] == 2
+    assert tracker.last_scan["items_per_sec"] > 0
+    assert tracker.store.prices("amazon://demo/1", last=1)[0] == 42.0
+
+
+class ListScraper:
+    def __init__(self, results):
+        self.results = results
+
+    async def search(self, title):
+        return [dict(r) for r in self.results]
+
+
+def test_updated_counts_points_written(tmp_path):
+    tracker = _tracker(tmp_path, ["Gaming Mice", "Mechanical Keyboard"])
+    today = datetime.date.today()
+    tracker.store.append("amazon://demo/0", today, 50.0)  # already has today's point
+    assert asyncio.run(tracker.scan_all({"Amazon": CountingScraper()})) == 1
+    assert tracker.last_scan["updated"] == 1
+    assert tracker.store.prices("amazon://demo/0", last=1)[0] == 50.0
+
+
+def test_search_update_prefers_same_url_and_ignores_fallback(tmp_path):
+    tracker = _tracker(tmp_path, ["Gaming Mice", "Mechanical Keyboard"])
+    scraper = ListScraper([
+        {"title": "Other", "price": 10.0, "currency": "INR", "url": "amazon://demo/other"},
+        {"title": "Gaming Mice", "price": 77.0, "currency": "INR", "url": "amazon://demo/0"},
+    ])
+    assert asyncio.run(tracker.scan_all({"Amazon": scraper})) == 2
+    assert tracker.store.prices("amazon://demo/0", last=1)[0] == 77.0
+    assert tracker.store.prices("amazon://demo/1", last=1)[0] == 10.0
+
+    blocked = _tracker(tmp_path / "blocked", ["Gaming Mice"])
+    demo = ListScraper([{"title": "Demo", "price": 799.0, "currency": "INR", "url": "amazon://demo/0", "fallback": True}])
+    assert asyncio.run(blocked.scan_all({"Amazon": demo})) == 0
+    assert list(blocked.store.prices("amazon://demo/0")) == [100.0]
+    assert blocked.track_many([{"url": "amazon://demo/0", "price": 799.0, "fallback": True}]) == 0
+
+
+def test_concurrency_is_capped_per_source(tmp_path):
+    tracker = _tracker(tmp_path, [f"product {i}" for i in range(12)])
+    scraper = CountingScraper()
+    asyncio.run(tracker.scan_all({"Amazon": scraper}, concurrency=3))
+    assert len(scraper.calls) == 12 and scraper.max_active == 3
+
+
+def test_interrupted_scan_resumes_from_checkpoint(tmp_path):
+    tracker = _tracker(tmp_path, [f"product {i}" for i in range(6)])
+    checkpoint = tmp_path / "scan_checkpoint.json"
+
+    with pytest.raises(Crash):
+        asyncio.run(tracker.scan_all({"Amazon": CountingScraper(fail_after=4)}, concurrency=1, checkpoint_every=2))
+    saved = json.loads(checkpoint.read_text())
+    assert saved["day"] == datetime.date.today().isoformat() and len(saved["done"]) == 4
+
+    scraper = CountingScraper()
+    asyncio.run(tracker.scan_all({"Amazon": scraper}))
+    assert len(scraper.calls) == 2
+    assert tracker.last_scan["skipped_groups"] == 4
+    assert not checkpoint.exists()
+    assert all(tracker.store.prices(f"amazon://demo/{i}", last=1)[0] == 42.0 for i in range(6))
+
+
+def test_stale_checkpoint_is_ignored(tmp_path):
+    tracker = _tracker(tmp_path, ["product"])
+    (tmp_path / "scan_checkpoint.json").write_text(json.dumps({"day": "2000-01-01", "done": [["Amazon", "product"]]}))
+    scraper = CountingScraper()
+    asyncio.run(tracker.scan_all({"Amazon": scraper}))
+    assert scraper.calls == ["product"]
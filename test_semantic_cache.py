@@ -0,0 +1,69 @@
+from semantic_cache import SemanticQueryIndex, embed, tokens_align
+from tools import DatabaseManager
+
+
+def test_embedding_is_normalised_and_order_free():
+    vector = embed("gaming mouse")
+    assert abs(sum(w * w for w in vector.values()) - 1.0) < 1e-9
+    assert embed("Mice gaming") == vector
+    assert embed("find me") == {}
+
+
+def test_typos_align_but_supersets_and_numbers_do_not():
+    assert tokens_align("mechanical keybord", "mechanical keyboard")
+    assert not tokens_align("wireless mouse pad", "wireless mouse")
+    assert not tokens_align("iphone 15", "iphone 14")
+    assert not tokens_align("smart patch", "smart watch")
+
+
+def test_real_words_are_not_misspellings_of_other_words():
+    for cached, asked in (("gaming chair", "gaming chain"), ("red shirt", "red skirt"),
+                          ("bluetooth speaker", "bluetooth sneaker"), ("steel bottle", "steel battle")):
+        index = SemanticQueryIndex()
+        index.add(cached, cached)
+        assert index.nearest(asked) is None, asked
+    index = SemanticQueryIndex()
+    index.add("bluetooth_speaker", "bluetooth speaker")
+    assert index.nearest("bluetooth speeker")[0] == "bluetooth_speaker"
+
+
+def test_words_of_indexed_queries_are_known():
+    index = SemanticQueryIndex()
+    index.add("camping_stove", "camping stove")
+    assert index.nearest("camping stone")[0] == "camping_stove"
+    index.add("stone_coaster", "stone coaster")
+    assert index.nearest("camping stone") is None
+    index.remove("stone_coaster")
+    assert index.nearest("camping stone")[0] == "camping_stove"
+
+
+def test_index_nearest_and_remove():
+    index = SemanticQueryIndex(threshold=0.6)
+    index.add("gaming_mouse", "gaming mouse")
+    index.add("wireless_mouse", "wireless mouse")
+    assert index.nearest("gaming mosue")[0] == "gaming_mouse"
+    assert index.nearest("wireless mouse pad") is None
+    index.remove("gaming_mouse")
+    assert index.nearest("gaming mosue") is None
+    stats = index.stats()
+    assert stats["lookups"] == 3 and stats["hits"] == 1 and stats["entries"] == 1
+
+
+def test_database_manager_serves_near_duplicates(tmp_path, monkeypatch):
+    monkeypatch.delenv("STORAGE_PATH", raising=False)
+    db = DatabaseManager(persist_path=str(tmp_path), backend="sqlite")
+    db.cache_results("mechanical keyboard", [{"title": "K2", "price": 5999.0}])
+    assert db.get_cached_results("mechanical keybord") is None
+    assert db.get_similar_cached_results("mechanical keybord") == [{"title": "K2", "price": 5999.0}]
+
+    # Index is rebuilt from storage on restart
+    restarted = DatabaseManager(persist_path=str(tmp_path), backend="sqlite")
+    assert restarted.get_similar_cached_results("mechanical keybord") == [{"title": "K2", "price": 5999.0}]
+
+
+def test_semantic_cache_can_be_disabled(tmp_path, monkeypatch):
+    monkeypatch.delenv("STORAGE_PATH", raising=False)
+    monkeypatch.setenv("SEMANTIC_CACHE_ENABLED", "false")
+    db = DatabaseManager(persist_path=str(tmp_path), backend="json")
+    db.cache_results("mechanical keyboard", [{"title": "K2"}])
+    assert db.semantic is None and db.get_similar_cached_results("mechanical keybord") is None
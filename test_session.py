@@ -0,0 +1,24 @@
+import asyncio
+
+from scrapers.session import get_session, close_session
+
+
+def test_session_is_shared_within_loop():
+    async def _run():
+        first = await get_session()
+        second = await get_session()
+        assert first is second
+        assert first.connector.limit_per_host >= 1
+        await close_session()
+        assert first.closed
+        # A fresh one is created after shutdown
+        third = await get_session()
+        assert third is not first
+        await close_session()
+
+    asyncio.run(_run())
+
+
+if __name__ == "__main__":
+    test_session_is_shared_within_loop()
+    print("✅ Shared session OK")
@@ -0,0 +1,132 @@
+import asyncio
+import threading
+
+from scrapers.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return [{"title": "Logitech M185", "price": 799.0}]
+
+    async def _run():
+        return await asyncio.gather(*[flight.do("wireless mouse", work) for _ in range(5)])
+
+    results = asyncio.run(_run())
+    assert len(runs) == 1
+    assert all(r == results[0] for r in results)
+    # followers get their own copy
+    results[1][0]["trend"] = "x"
+    assert "trend" not in results[0][0]
+    assert flight.stats() == {"executions": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_callers_on_different_threads_and_loops_share_one_execution():
+    flight = SingleFlight()
+    runs = []
+    started = threading.Event()
+    results = []
+
+    async def work():
+        runs.append(1)
+        started.set()
+        await asyncio.sleep(0.1)
+        return "done"
+
+    def leader():
+        results.append(asyncio.run(flight.do("k", work)))
+
+    def follower():
+        started.wait()
+        results.append(asyncio.run(flight.do("k", work)))
+
+    threads = [threading.Thread(target=leader), threading.Thread(target=follower)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ["done", "done"]
+    assert len(runs) == 1
+
+
+def test_errors_propagate_and_key_is_released():
+    flight = SingleFlight()
+
+    async def boom():
+        raise ValueError("blocked")
+
+    async def ok():
+        return 1
+
+    async def _run():
+        try:
+            await flight.do("k", boom)
+        except ValueError:
+            pass
+        return await flight.do("k", ok)
+
+    assert asyncio.run(_run()) == 1
+
+
+def test_cancelled_leader_does_not_fail_followers():
+    flight = SingleFlight()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.2)
+        return "done"
+
+    async def _run():
+        leader = asyncio.wait_for(flight.do("k", work), timeout=0.05)
+        follower = asyncio.wait_for(flight.do("k", work), timeout=5)
+        return await asyncio.gather(leader, follower, return_exceptions=True)
+
+    leader, follower = asyncio.run(_run())
+    assert isinstance(leader, asyncio.TimeoutError)
+    assert follower == "done" and len(runs) == 1
+
+
+def test_follower_restarts_work_cancelled_with_the_leaders_loop():
+    flight = SingleFlight()
+    runs = []
+    started = threading.Event()
+    results = []
+
+    async def work():
+        runs.append(1)
+        started.set()
+        await asyncio.sleep(0.2)
+        return "done"
+
+    def leader():
+        # Gives up early; asyncio.run then cancels the shared task with its loop
+        try:
+            asyncio.run(asyncio.wait_for(flight.do("k", work), timeout=0.05))
+        except asyncio.TimeoutError:
+            results.append("timeout")
+
+    def follower():
+        started.wait()
+        results.append(asyncio.run(flight.do("k", work)))
+
+    threads = [threading.Thread(target=leader), threading.Thread(target=follower)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(results) == ["done", "timeout"]
+    assert len(runs) == 2 and flight.stats()["in_flight"] == 0
+
+
+if __name__ == "__main__":
+    test_concurrent_callers_share_one_execution()
+    test_callers_on_different_threads_and_loops_share_one_execution()
+    test_errors_propagate_and_key_is_released()
+    test_cancelled_leader_does_not_fail_followers()
+    test_follower_restarts_work_cancelled_with_the_leaders_loop()
+    print("✅ Single-flight OK")
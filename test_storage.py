@@ -0,0 +1,52 @@
+import datetime
+import json
+import threading
+
+import pytest
+
+from tools import DatabaseManager
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "json"])
+def test_cache_and_history_roundtrip(tmp_path, monkeypatch, backend):
+    monkeypatch.delenv("STORAGE_PATH", raising=False)
+    db = DatabaseManager(persist_path=str(tmp_path), backend=backend)
+    assert db.get_cached_results("wireless mouse") is None
+    db.cache_results("wireless mouse", [{"title": "M185", "price": 799.0}])
+    assert db.get_cached_results("Wireless Mouse") == [{"title": "M185", "price": 799.0}]
+
+    for i in range(5):
+        db.log_interaction("u1", "user", f"msg {i}", ts=f"2025-01-0{i + 1}T00:00:00")
+    db.log_interaction("u2", "user", "other user")
+    recent = db.get_recent_interactions("u1", limit=3)
+    assert [e["text"] for e in recent] == ["msg 4", "msg 3", "msg 2"]
+
+
+def test_sqlite_migrates_existing_json_once(tmp_path, monkeypatch):
+    monkeypatch.delenv("STORAGE_PATH", raising=False)
+    (tmp_path / "product_cache.json").write_text(json.dumps({
+        "gaming_mouse": {"documents": [{"title": "G102"}], "metadata": {"timestamp": datetime.datetime.now().isoformat(), "query": "gaming mouse"}}
+    }))
+    (tmp_path / "user_history.json").write_text(json.dumps([
+        {"id": "current_user:1", "user_id": "current_user", "role": "user", "text": "hi", "ts": "2025-01-01T00:00:00"}
+    ]))
+    db = DatabaseManager(persist_path=str(tmp_path), backend="sqlite")
+    assert db.get_cached_results("gaming mouse") == [{"title": "G102"}]
+    assert db.get_recent_interactions("current_user")[0]["text"] == "hi"
+    assert db.storage.migrate_from_json(db.cache_file, db.history_file) is False
+
+
+def test_sqlite_concurrent_writers_lose_nothing(tmp_path, monkeypatch):
+    monkeypatch.delenv("STORAGE_PATH", raising=False)
+    db = DatabaseManager(persist_path=str(tmp_path), backend="sqlite")
+
+    def worker(n):
+        for i in range(25):
+            db.log_interaction("current_user", "user", f"{n}-{i}")
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(db.get_recent_interactions("current_user", limit=1000)) == 200
@@ -0,0 +1,75 @@
+import importlib
+import json
+import os
+import sqlite3
+from types import SimpleNamespace
+
+from storage import SQLiteStorage
+from tools import MockAmazonConnector
+from user_shards import shard_of
+
+
+def _connector(tmp_path):
+    seed = tmp_path / "mock_data.json"
+    seed.write_text(json.dumps({"users": {"current_user": {"name": "Anish", "purchase_history": []}}}))
+    return MockAmazonConnector(str(seed), profiles_dir=str(tmp_path / "profiles"))
+
+
+def test_profiles_are_sharded_per_user(tmp_path):
+    connector = _connector(tmp_path)
+    assert connector.get_user_data()["name"] == "Anish"  # seeded from mock_data.json
+    assert connector.get_user_data("alice") == {}
+
+    assert connector.simulate_purchase("Mouse", "Electronics", 799.0, user_id="alice")
+    assert connector.update_profile("liked_brands", ["Logitech"], user_id="bob")
+    assert [p["product_name"] for p in connector.get_user_data("alice")["purchase_history"]] == ["Mouse"]
+    assert connector.get_user_data("bob")["liked_brands"] == ["Logitech"]
+    assert connector.get_user_data("bob")["purchase_history"] == []
+    assert connector.get_user_data()["purchase_history"] == []
+
+    paths = {connector.profile_path(u) for u in ("alice", "bob", "current_user")}
+    assert len(paths) == 3
+    assert sum(os.path.exists(p) for p in paths) == 2
+
+
+def test_sqlite_interactions_are_sharded(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "storage.sqlite3"), interaction_shards=4)
+    users = [f"user{i}" for i in range(20)]
+    for i, user in enumerate(users):
+        storage.append_interaction({"id": f"{user}:1", "user_id": user, "role": "user", "text": f"hi {i}", "ts": "2025-01-01"})
+    assert storage.recent_interactions("user7", 5)[0]["text"] == "hi 7"
+
+    for shard, path in enumerate(storage.shard_paths):
+        stored = {r[0] for r in sqlite3.connect(path).execute("SELECT user_id FROM interactions")}
+        assert stored == {u for u in users if shard_of(u, 4) == shard}
+
+
+def test_unsharded_interactions_are_moved_once(tmp_path):
+    path = str(tmp_path / "storage.sqlite3")
+    SQLiteStorage(path, interaction_shards=2)
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO interactions VALUES ('u:1', 'u', 'user', 'old', '2024-01-01')")
+    conn.execute("DELETE FROM meta WHERE key = 'interactions_sharded'")
+    conn.commit()
+
+    storage = SQLiteStorage(path, interaction_shards=2)
+    assert [r["text"] for r in storage.recent_interactions("u", 5)] == ["old"]
+    assert conn.execute("SELECT COUNT(*) FROM interactions").fetchone()[0] == 0
+
+
+def test_session_user_id_reaches_the_agent(tmp_path, monkeypatch):
+    monkeypatch.setenv("STORAGE_PATH", str(tmp_path))
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    app_module = importlib.import_module("app")
+    seen = []
+    monkeypatch.setattr(app_module, "agent", SimpleNamespace(
+        chat=lambda text, user_id=None: seen.append(user_id) or "ok",
+        train_preference=lambda product, liked, user_id=None: seen.append(user_id) or True,
+    ))
+
+    first, second = app_module.app.test_client(), app_module.app.test_client()
+    first.post("/chat", data={"user_input": "mouse"})
+    first.post("/train", data={"product": "M185", "liked": "true"})
+    second.post("/chat", data={"user_input": "mouse"})
+    assert seen[0] == seen[1] and seen[0] != seen[2]
+    assert all(seen)
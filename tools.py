@@ -1,91 +1,177 @@
 import os
+import copy
 import json
 import logging
 import datetime
+import threading
 import uuid
 
+from product_cache import LRUCache, TieredProductCache
+from semantic_cache import SemanticQueryIndex
+from scrapers.query_normalizer import cache_key
+from storage import JSONStorage, SQLiteStorage
+from user_shards import shard_of, user_hash
+
 logger = logging.getLogger(__name__)
 
+class _JSONDocument:
+    """One JSON file kept in memory.
+
+    Every ``load`` checks the file's mtime/size (one ``os.stat``) and
+    re-parses only if another process changed it. ``save`` writes a temp
+    file that replaces the original, so readers never see a half-written
+    file. ``version`` changes whenever the data does.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self._data = None
+        self._stamp = None
+        self.version = 0
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def load(self):
+        """The parsed file (None if missing); treat it as read-only."""
+        with self.lock:
+            stamp = self._file_stamp()
+            if stamp != self._stamp:
+                if stamp is None:
+                    data = None
+                else:
+                    with open(self.path, 'r') as f:
+                        data = json.load(f)
+                self._data, self._stamp = data, stamp
+                self.version += 1
+            return self._data
+
+    def save(self, data):
+        """Write through temp-file-and-rename, then adopt ``data`` as the cached copy."""
+        with self.lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp, self.path)
+            self._data, self._stamp = data, self._file_stamp()
+            self.version += 1
+
+
 class MockAmazonConnector:
     """
     Enhanced User Profile Connector.
+
+    Each user's profile (preferences, purchases) is its own JSON file,
+    ``profiles/<hash[:2]>/<hash>.json`` keyed by a hash of the user ID, so
+    concurrent users never share a read-modify-write cycle. Profiles are
+    held in memory (see ``_JSONDocument``) for up to
+    ``PROFILE_CACHE_USERS`` recently active users. A user without a
+    profile file starts from their entry in ``mock_data.json`` (the
+    original all-users file, now read-only seed data), else from an empty
+    profile. ``data_version(user_id)`` changes whenever that user's data
+    does, for callers that memoize on it.
     """
-    def __init__(self, data_file_path=None):
+    DEFAULTS = {
+        "budget_range": "Medium ($50 - $200)",
+        "purpose": "General Use",
+        "liked_brands": [],
+        "disliked_brands": [],
+        "browsing_history": []
+    }
+
+    def __init__(self, data_file_path=None, profiles_dir=None):
         if data_file_path is None:
             data_file_path = os.path.join(os.getcwd(), 'data', 'mock_data.json')
         self.data_file_path = data_file_path
+        if profiles_dir is None:
+            base = os.getenv("STORAGE_PATH") or os.path.dirname(os.path.abspath(data_file_path))
+            profiles_dir = os.path.join(base, 'profiles')
+        self.profiles_dir = profiles_dir
         self.current_user_id = "current_user"
-        self._ensure_schema()
-
-    def _ensure_schema(self):
-        """Ensures the mock data has new profile fields."""
-        if not os.path.exists(self.data_file_path): return
-        
-        with open(self.data_file_path, 'r') as f:
-            data = json.load(f)
-        
-        user = data['users'].get(self.current_user_id, {})
-        updates = False
-        
-        defaults = {
-            "budget_range": "Medium ($50 - $200)",
-            "purpose": "General Use",
-            "liked_brands": [],
-            "disliked_brands": [],
-            "browsing_history": []
-        }
-        
-        for k, v in defaults.items():
-            if k not in user:
-                user[k] = v
-                updates = True
-                
-        if updates:
-            data['users'][self.current_user_id] = user
-            with open(self.data_file_path, 'w') as f:
-                json.dump(data, f, indent=2)
+        self._seed = _JSONDocument(data_file_path)
+        self._docs = LRUCache(max_entries=int(os.getenv("PROFILE_CACHE_USERS", "1024")))
+        self._docs_lock = threading.Lock()
+        # Per-user write locks, striped so they outlive cache evictions
+        self._write_locks = [threading.Lock() for _ in range(64)]
+
+    def profile_path(self, user_id):
+        digest = user_hash(user_id)
+        return os.path.join(self.profiles_dir, digest[:2], f"{digest}.json")
+
+    def _doc(self, user_id):
+        with self._docs_lock:
+            doc = self._docs.get(user_id)
+            if doc is None:
+                doc = _JSONDocument(self.profile_path(user_id))
+                self._docs.put(user_id, doc)
+            return doc
+
+    def _user(self, doc, user_id):
+        """The user's profile with defaults filled in (a private copy)."""
+        data = doc.load()
+        if data is None:
+            seed = self._seed.load() or {}
+            data = seed.get('users', {}).get(user_id)
+        user = copy.deepcopy(data) if data else {}
+        if user:
+            for k, v in self.DEFAULTS.items():
+                user.setdefault(k, copy.deepcopy(v))
+        return user
+
+    def data_version(self, user_id=None):
+        """Changes whenever ``user_id``'s profile data changes."""
+        user_id = user_id or self.current_user_id
+        doc = self._doc(user_id)
+        try:
+            doc.load()
+            self._seed.load()
+        except Exception as e:
+            logger.error(f"Error reading profile data: {e}")
+        return (doc.version, self._seed.version)
 
-    def get_user_data(self):
+    def get_user_data(self, user_id=None):
+        user_id = user_id or self.current_user_id
         try:
-            with open(self.data_file_path, 'r') as f:
-                data = json.load(f)
-                return data['users'].get(self.current_user_id, {})
+            doc = self._doc(user_id)
+            with doc.lock:
+                return self._user(doc, user_id)
         except Exception as e:
             logger.error(f"Error reading mock data: {e}")
             return {}
 
-    def update_profile(self, key, value):
+    def _update(self, user_id, change):
+        """Apply ``change(user)`` to the user's profile and save it atomically."""
+        user_id = user_id or self.current_user_id
+        with self._write_locks[shard_of(user_id, len(self._write_locks))]:
+            doc = self._doc(user_id)
+            user = self._user(doc, user_id) or copy.deepcopy(self.DEFAULTS)
+            user.setdefault("purchase_history", [])
+            change(user)
+            doc.save(user)
+
+    def update_profile(self, key, value, user_id=None):
         try:
-            with open(self.data_file_path, 'r') as f:
-                data = json.load(f)
-            
-            user = data['users'].get(self.current_user_id)
-            if user:
-                user[key] = value
-                with open(self.data_file_path, 'w') as f:
-                    json.dump(data, f, indent=2)
+            self._update(user_id, lambda user: user.__setitem__(key, value))
             return True
         except Exception as e:
+            logger.error(f"Error updating profile: {e}")
             return False
 
-    def simulate_purchase(self, product_name, category, price=0.0):
+    def simulate_purchase(self, product_name, category, price=0.0, user_id=None):
+        new_purchase = {
+            "product_name": product_name,
+            "category": category,
+            "price": price,
+            "purchase_date": datetime.date.today().isoformat()
+        }
         try:
-            with open(self.data_file_path, 'r') as f:
-                data = json.load(f)
-            
-            user = data['users'].get(self.current_user_id)
-            if not user: return False
-
-            new_purchase = {
-                "product_name": product_name,
-                "category": category,
-                "price": price,
-                "purchase_date": datetime.date.today().isoformat()
-            }
-            user['purchase_history'].append(new_purchase)
-            
-            with open(self.data_file_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            self._update(user_id, lambda user: user['purchase_history'].append(new_purchase))
             return True
         except Exception as e:
             logger.error(f"Error stimulating purchase: {e}")
@@ -93,54 +179,48 @@ class MockAmazonConnector:
 
 class DatabaseManager:
     """
-    Manages local JSON-backed caches and interaction history.
+    Manages local caches and interaction history.
+
+    Storage is pluggable (``STORAGE_BACKEND``): ``sqlite`` (default, WAL
+    mode, row-level writes) or ``json`` (the original single-document
+    files). The first SQLite start imports the existing JSON files.
+    Product lookups go through a two-tier cache (memory LRU + storage)
+    with a TTL and a disk quota, see ``product_cache.TieredProductCache``.
+    Near-duplicate queries (typos) can be answered from a cached neighbour
+    via ``get_similar_cached_results``, see ``semantic_cache``.
     """
-    def __init__(self, persist_path=None):
+    def __init__(self, persist_path=None, backend=None):
         base_path = os.getenv("STORAGE_PATH") or persist_path or os.path.join(os.getcwd(), 'chroma_db')
         os.makedirs(base_path, exist_ok=True)
         self.base_path = base_path
         self.cache_file = os.path.join(self.base_path, 'product_cache.json')
         self.history_file = os.path.join(self.base_path, 'user_history.json')
-        if not os.path.exists(self.cache_file):
-            with open(self.cache_file, 'w') as f:
-                json.dump({}, f)
-        if not os.path.exists(self.history_file):
-            with open(self.history_file, 'w') as f:
-                json.dump([], f)
-
-    def _read_cache(self):
-        try:
-            with open(self.cache_file, 'r') as f:
-                return json.load(f)
-        except Exception:
-            return {}
 
-    def _write_cache(self, data):
-        try:
-            with open(self.cache_file, 'w') as f:
-                json.dump(data, f, indent=2)
-        except Exception as e:
-            logger.error(f"Cache write error: {e}")
+        self.backend = (backend or os.getenv("STORAGE_BACKEND", "sqlite")).lower()
+        if self.backend == "json":
+            self.storage = JSONStorage(self.cache_file, self.history_file)
+        elif self.backend == "sqlite":
+            self.storage = SQLiteStorage(os.path.join(self.base_path, 'storage.sqlite3'))
+            self.storage.migrate_from_json(self.cache_file, self.history_file)
+        else:
+            raise ValueError(f"Unknown STORAGE_BACKEND '{self.backend}' (expected 'sqlite' or 'json')")
 
-    def _read_history(self):
-        try:
-            with open(self.history_file, 'r') as f:
-                return json.load(f)
-        except Exception:
-            return []
-
-    def _write_history(self, data):
-        try:
-            with open(self.history_file, 'w') as f:
-                json.dump(data, f, indent=2)
-        except Exception as e:
-            logger.error(f"History write error: {e}")
+        self.cache = TieredProductCache(
+            self.storage,
+            ttl_seconds=float(os.getenv("PRODUCT_CACHE_TTL_SECONDS", str(6 * 3600))),
+            memory_entries=int(os.getenv("PRODUCT_CACHE_MEMORY_ENTRIES", "256")),
+            quota_bytes=int(float(os.getenv("PRODUCT_CACHE_MAX_MB", "100")) * 1024 * 1024),
+        )
+        self.semantic = None
+        if os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true":
+            self.semantic = SemanticQueryIndex.from_storage(
+                self.storage, threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.7"))
+            )
 
     def get_cached_results(self, query):
         try:
-            all_cache = self._read_cache()
-            query_id = query.lower().replace(" ", "_")
-            entry = all_cache.get(query_id)
+            query_id = cache_key(query)
+            entry = self.cache.get(query_id)
             if entry and isinstance(entry.get('documents'), list):
                 return entry['documents']
             return None
@@ -148,42 +228,57 @@ class DatabaseManager:
             logger.error(f"Cache retrieval error: {e}")
             return None
 
+    def get_similar_cached_results(self, query):
+        """Results cached for the nearest equivalent query (e.g. a misspelling)."""
+        if self.semantic is None:
+            return None
+        try:
+            match = self.semantic.nearest(query)
+            if match is None:
+                return None
+            key, similarity = match
+            entry = self.cache.get(key)
+            if not entry or not isinstance(entry.get('documents'), list):
+                # Expired or evicted from the product cache
+                self.semantic.remove(key)
+                return None
+            logger.info(f"Semantic cache hit: '{query}' ~ '{entry['metadata'].get('query')}' ({similarity:.2f})")
+            return entry['documents']
+        except Exception as e:
+            logger.error(f"Semantic cache error: {e}")
+            return None
+
     def cache_results(self, query, products):
         try:
-            all_cache = self._read_cache()
-            query_id = query.lower().replace(" ", "_")
+            query_id = cache_key(query)
             timestamp = datetime.datetime.now().isoformat()
-            all_cache[query_id] = {
+            self.cache.put(query_id, {
                 "documents": products,
                 "metadata": {"timestamp": timestamp, "query": query}
-            }
-            self._write_cache(all_cache)
+            })
+            if self.semantic is not None:
+                self.semantic.add(query_id, query)
             logger.info(f"Cached {len(products)} items for '{query}'")
         except Exception as e:
             logger.error(f"Cache storage error: {e}")
 
     def log_interaction(self, user_id: str, role: str, text: str, ts: str | None = None):
         try:
-            history = self._read_history()
             if ts is None:
                 ts = datetime.datetime.utcnow().isoformat()
-            history.append({
+            self.storage.append_interaction({
                 "id": f"{user_id}:{uuid.uuid4().hex}",
                 "user_id": user_id,
                 "role": role,
                 "text": text,
                 "ts": ts,
             })
-            self._write_history(history)
         except Exception as e:
             logger.error(f"Interaction log error: {e}")
 
     def get_recent_interactions(self, user_id: str, limit: int = 10):
         try:
-            history = self._read_history()
-            entries = [h for h in history if h.get("user_id") == user_id]
-            entries.sort(key=lambda x: x.get("ts", ""), reverse=True)
-            return entries[:limit]
+            return self.storage.recent_interactions(user_id, limit)
         except Exception as e:
             logger.error(f"Interaction retrieval error: {e}")
             return []
@@ -0,0 +1,11 @@
+import hashlib
+
+
+def user_hash(user_id):
+    """Stable hex digest of a user ID; names the user's shard files and directories."""
+    return hashlib.sha1(str(user_id).encode("utf-8")).hexdigest()
+
+
+def shard_of(user_id, shards):
+    """Shard number in ``range(shards)`` for ``user_id``."""
+    return int(user_hash(user_id)[:8], 16) % shards